@@ -0,0 +1,283 @@
+# Representación estructurada del código ensamblador (sintaxis NASM x86-64).
+# El generador emite registros (instrucciones, etiquetas, comentarios y
+# directivas) en lugar de texto; las optimizaciones sobre el flujo de
+# instrucciones trabajan con estos registros y el texto se produce al final.
+
+import re
+
+
+class Instruction:
+    """Instrucción: código de operación, operandos y comentario opcional"""
+    __slots__ = ('opcode', 'operands', 'comment')
+
+    def __init__(self, opcode, operands=(), comment=None):
+        self.opcode = opcode
+        self.operands = list(operands)
+        self.comment = comment
+
+    def render(self):
+        text = self.opcode
+        if self.operands:
+            text += " " + ", ".join(self.operands)
+        if self.comment:
+            text = f"{text:<15} ; {self.comment}"
+        return f"    {text}"
+
+    def __repr__(self):
+        return f"Instruction({self.opcode!r}, {self.operands!r})"
+
+
+class Label:
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def render(self):
+        return f"{self.name}:"
+
+    def __repr__(self):
+        return f"Label({self.name!r})"
+
+
+class Comment:
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def render(self):
+        return f"    ; {self.text}"
+
+
+class Directive:
+    """Línea que se copia tal cual (section, global, líneas en blanco)"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def render(self):
+        return self.text
+
+
+def split_comment(text):
+    """Separa 'instrucción ; comentario' respetando literales entre comillas"""
+    quote = None
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == ';':
+            return text[:i].strip(), text[i + 1:].strip()
+    return text.strip(), None
+
+
+def split_operands(text):
+    """Separa operandos por comas que no estén dentro de corchetes o comillas"""
+    operands = []
+    depth = 0
+    quote = None
+    current = ''
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            operands.append(current.strip())
+            current = ''
+            continue
+        current += char
+    if current.strip():
+        operands.append(current.strip())
+    return operands
+
+
+def parse_instruction(text):
+    """Convierte una línea de texto NASM en un registro (pruebas y depuración)"""
+    body, comment = split_comment(text)
+    if not body:
+        return Comment(comment or '')
+    parts = body.split(None, 1)
+    operands = split_operands(parts[1]) if len(parts) > 1 else []
+    return Instruction(parts[0], operands, comment)
+
+
+def render(records):
+    return [record.render() for record in records]
+
+
+# === Registros de la máquina ===
+
+GPR64 = ('rax', 'rbx', 'rcx', 'rdx', 'rsi', 'rdi', 'rbp', 'rsp',
+         'r8', 'r9', 'r10', 'r11', 'r12', 'r13', 'r14', 'r15')
+XMM = tuple(f"xmm{i}" for i in range(16))
+
+# Nombre de cada subregistro -> (registro de 64 bits, tamaño en bits)
+REGISTER_ALIASES = {}
+for _full, _r32, _r16, _r8 in (('rax', 'eax', 'ax', 'al'), ('rbx', 'ebx', 'bx', 'bl'),
+                               ('rcx', 'ecx', 'cx', 'cl'), ('rdx', 'edx', 'dx', 'dl'),
+                               ('rsi', 'esi', 'si', 'sil'), ('rdi', 'edi', 'di', 'dil'),
+                               ('rbp', 'ebp', 'bp', 'bpl'), ('rsp', 'esp', 'sp', 'spl')):
+    REGISTER_ALIASES.update({_full: (_full, 64), _r32: (_full, 32), _r16: (_full, 16), _r8: (_full, 8)})
+for _full, _high in (('rax', 'ah'), ('rbx', 'bh'), ('rcx', 'ch'), ('rdx', 'dh')):
+    REGISTER_ALIASES[_high] = (_full, 8)
+for _i in range(8, 16):
+    REGISTER_ALIASES[f"r{_i}"] = (f"r{_i}", 64)
+    REGISTER_ALIASES[f"r{_i}d"] = (f"r{_i}", 32)
+    REGISTER_ALIASES[f"r{_i}w"] = (f"r{_i}", 16)
+    REGISTER_ALIASES[f"r{_i}b"] = (f"r{_i}", 8)
+for _name in XMM:
+    REGISTER_ALIASES[_name] = (_name, 128)
+
+# (registro de 64 bits, tamaño) -> nombre (al y no ah para 8 bits)
+_SIZED_NAMES = {}
+for _name, _info in REGISTER_ALIASES.items():
+    _SIZED_NAMES.setdefault(_info, _name)
+
+# Convención System V: registros que una llamada puede leer y destruir
+ARGUMENT_REGISTERS = frozenset(('rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9') + XMM[:8])
+CALLER_SAVED = frozenset(('rax', 'rcx', 'rdx', 'rsi', 'rdi', 'r8', 'r9', 'r10', 'r11') + XMM)
+# Registros que siguen vivos al retornar (valor de retorno y callee-saved)
+RETURN_LIVE = frozenset(('rax', 'rdx', 'xmm0', 'rbx', 'rbp', 'rsp', 'r12', 'r13', 'r14', 'r15'))
+
+_WORD = re.compile(r"'[^']*'|\"[^\"]*\"|[A-Za-z_][A-Za-z0-9_]*")
+
+
+def register_info(operand):
+    """(registro de 64 bits, tamaño) si el operando es un registro, o None"""
+    return REGISTER_ALIASES.get(operand.strip())
+
+
+def is_register(operand):
+    return operand.strip() in REGISTER_ALIASES
+
+
+def full_register(operand):
+    """Registro de 64 bits (o xmm) al que pertenece el registro operand"""
+    return REGISTER_ALIASES[operand.strip()][0]
+
+
+def sized_register(register, bits):
+    """Nombre de la parte de bits bits del registro ('rcx', 32 -> 'ecx')"""
+    return _SIZED_NAMES[(full_register(register), bits)]
+
+
+def is_memory(operand):
+    return '[' in operand
+
+
+def memory_address(operand):
+    """Dirección dentro de los corchetes, sin prefijo de tamaño"""
+    return operand[operand.index('[') + 1:operand.rindex(']')].strip()
+
+
+def is_immediate(operand):
+    return re.fullmatch(r"-?\d+|'.'", operand.strip()) is not None
+
+
+def registers_in(operand):
+    """Registros de 64 bits (o xmm) que aparecen en un operando"""
+    found = set()
+    for word in _WORD.findall(operand):
+        info = REGISTER_ALIASES.get(word)
+        if info:
+            found.add(info[0])
+    return found
+
+
+# Uso de los operandos por operación: el destino solo se escribe, el
+# destino se lee y se escribe, o todos los operandos solo se leen
+_DEST_WRITE = {'mov', 'movzx', 'movsx', 'movsxd', 'lea', 'movq', 'movsd', 'cvtsi2sd',
+               'cvttsd2si', 'pop'}
+_DEST_READ_WRITE = {'add', 'sub', 'and', 'or', 'xor', 'neg', 'not', 'inc', 'dec', 'shl',
+                    'shr', 'sar', 'sal', 'addsd', 'subsd', 'mulsd', 'divsd', 'xorpd', 'btc'}
+_READ_ONLY = {'cmp', 'test', 'ucomisd', 'push', 'jmp'}
+
+
+def is_conditional_jump(opcode):
+    return opcode.startswith('j') and opcode != 'jmp'
+
+
+def reads_writes(instruction):
+    """Retorna (leídos, escritos) como conjuntos de registros de 64 bits.
+
+    Retorna None si la instrucción no se conoce, para que quien pregunta
+    asuma lo peor."""
+    opcode = instruction.opcode
+    operands = instruction.operands
+    reads = set()
+    writes = set()
+
+    def dest(operand, also_read):
+        info = register_info(operand)
+        if info is None:
+            reads.update(registers_in(operand))  # Registros de la dirección
+            return
+        writes.add(info[0])
+        # Escribir 8 o 16 bits conserva el resto del registro
+        if also_read or info[1] in (8, 16):
+            reads.add(info[0])
+
+    if opcode == 'call':
+        reads.update(ARGUMENT_REGISTERS, ('rsp',))
+        writes.update(CALLER_SAVED)
+        return reads, writes
+    if opcode == 'syscall':
+        reads.update(('rax', 'rdi', 'rsi', 'rdx', 'r10', 'r8', 'r9'))
+        writes.update(('rax', 'rcx', 'r11'))
+        return reads, writes
+    if opcode == 'ret':
+        return set(RETURN_LIVE), writes
+    if opcode in ('imul', 'mul') and len(operands) == 1:
+        # Forma de un operando: rdx:rax = rax * operando
+        reads.add('rax')
+        reads.update(registers_in(operands[0]))
+        writes.update(('rax', 'rdx'))
+        return reads, writes
+    if opcode in ('idiv', 'div'):
+        reads.update(('rax', 'rdx'))
+        reads.update(registers_in(operands[0]))
+        writes.update(('rax', 'rdx'))
+        return reads, writes
+    if opcode in ('cqo', 'cdq'):
+        return {'rax'}, {'rdx'}
+    if opcode == 'imul' and len(operands) == 3:
+        dest(operands[0], False)
+        reads.update(registers_in(operands[1]))
+        return reads, writes
+    if opcode.startswith('set') and len(operands) == 1:
+        dest(operands[0], True)
+        return reads, writes
+
+    if opcode in ('xor', 'xorpd') and len(operands) == 2 and operands[0] == operands[1] \
+            and is_register(operands[0]):
+        dest(operands[0], False)  # Modismo de puesta a cero
+    elif opcode in _DEST_WRITE or opcode == 'imul':
+        if opcode in ('push', 'pop'):
+            reads.add('rsp')
+            writes.add('rsp')
+        dest(operands[0], opcode == 'imul')
+        for operand in operands[1:]:
+            reads.update(registers_in(operand))
+    elif opcode in _DEST_READ_WRITE:
+        dest(operands[0], True)
+        for operand in operands[1:]:
+            reads.update(registers_in(operand))
+    elif opcode in _READ_ONLY or is_conditional_jump(opcode):
+        if opcode == 'push':
+            writes.add('rsp')
+            reads.add('rsp')
+        for operand in operands:
+            reads.update(registers_in(operand))
+    else:
+        return None
+    return reads, writes
@@ -0,0 +1,127 @@
+# Mide el efecto de las optimizaciones sobre el corpus de benchmarks/.
+# Compila cada programa en cada nivel de optimización y compara el número
+# de instrucciones emitidas en la sección .text y el de instrucciones de IR
+# que ejecuta el simulador (que además comprueba que el resultado de main
+# no cambia entre niveles); al final muestra cuántas veces se aplicó cada
+# regla peephole en todo el corpus.
+#
+# Uso: python benchmark.py [archivo.c ...] [--levels 0,1,2]
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+
+from lexer import analyze_tokens
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from optimizer import ConstantFolder
+from simulator import Simulator
+from utils import cargar_gramatica_lr
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def compile_source(source, level, grammar_data, peephole_hits=None):
+    """Compila un programa al nivel indicado y retorna (ensamblador, IR optimizada)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast_root = Parser(grammar_data).parse(analyze_tokens(source))
+        if ast_root is None:
+            raise RuntimeError("no se pudo construir el AST")
+        analyzer = SemanticAnalyzer()
+        analyzer.analyze(ast_root)
+        if analyzer.errors:
+            raise RuntimeError(analyzer.errors[0])
+        if level > 0:
+            ConstantFolder().optimize(ast_root)
+        generator = CodeGenerator(opt_level=level)
+        asm = generator.generate_code(ast_root, analyzer.symbol_table)
+    if generator.peephole is not None and peephole_hits is not None:
+        for name, count in generator.peephole.hits.items():
+            peephole_hits[name] = peephole_hits.get(name, 0) + count
+    return asm, generator.program
+
+
+def count_instructions(asm):
+    """Cuenta las instrucciones de la sección .text (sin etiquetas ni comentarios)"""
+    count = 0
+    in_text = False
+    for line in asm.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('section'):
+            in_text = stripped == 'section .text'
+            continue
+        if not in_text or not line.startswith('    '):
+            continue
+        if stripped and not stripped.startswith(';'):
+            count += 1
+    return count
+
+
+def print_table(title, rows, levels):
+    print(title)
+    header = f"{'programa':<20}" + "".join(f"{'-O' + str(level):>8}" for level in levels) + f"{'reducción':>12}"
+    print(header)
+    print("-" * len(header))
+    totals = [0] * len(levels)
+    for name, counts in rows:
+        totals = [total + count for total, count in zip(totals, counts)]
+        reduction = 100.0 * (counts[0] - counts[-1]) / counts[0] if counts[0] else 0.0
+        print(f"{name:<20}" + "".join(f"{count:>8}" for count in counts) + f"{reduction:>11.1f}%")
+    print("-" * len(header))
+    reduction = 100.0 * (totals[0] - totals[-1]) / totals[0] if totals[0] else 0.0
+    print(f"{'total':<20}" + "".join(f"{total:>8}" for total in totals) + f"{reduction:>11.1f}%")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark de optimizaciones')
+    arg_parser.add_argument('archivos', nargs='*', help='Programas .c (por defecto benchmarks/*.c)')
+    arg_parser.add_argument('--levels', default='0,1,2', help='Niveles a comparar, separados por coma')
+    args = arg_parser.parse_args()
+
+    files = args.archivos or sorted(glob.glob(os.path.join(BASE_DIR, 'benchmarks', '*.c')))
+    levels = [int(level) for level in args.levels.split(',')]
+    with contextlib.redirect_stdout(io.StringIO()):
+        grammar_data = cargar_gramatica_lr(os.path.join(BASE_DIR, 'compilador.lr'))
+
+    static_rows = []
+    dynamic_rows = []
+    peephole_hits = {}
+    for path in files:
+        name = os.path.basename(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        try:
+            counts = []
+            steps = []
+            results = []
+            for level in levels:
+                asm, program = compile_source(source, level, grammar_data,
+                                              peephole_hits if level == levels[-1] else None)
+                counts.append(count_instructions(asm))
+                simulator = Simulator(program)
+                results.append(simulator.run())
+                steps.append(simulator.steps)
+        except Exception as e:
+            print(f"{name:<20} ERROR: {e}")
+            continue
+        if len(set(results)) > 1:
+            print(f"{name:<20} ERROR: main() retorna valores distintos por nivel: {results}")
+        static_rows.append((name, counts))
+        dynamic_rows.append((name, steps))
+
+    print_table("Instrucciones emitidas (.text)", static_rows, levels)
+    print()
+    print_table("Instrucciones de IR ejecutadas (simulador)", dynamic_rows, levels)
+
+    if peephole_hits:
+        print(f"\nReglas peephole en -O{levels[-1]}:")
+        for name, count in peephole_hits.items():
+            print(f"  {name:<20}{count:>6}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
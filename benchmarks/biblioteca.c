@@ -0,0 +1,50 @@
+int contador;
+int semilla;
+float escala;
+int cuadrado(int x){
+    return x * x;
+}
+int cubo(int x){
+    return x * x * x;
+}
+int maximo(int a, int b){
+    if (a > b) {
+        return a;
+    }
+    return b;
+}
+int minimo(int a, int b){
+    if (a < b) {
+        return a;
+    }
+    return b;
+}
+int absoluto(int x){
+    if (x < 0) {
+        return 0 - x;
+    }
+    return x;
+}
+int potencia(int base, int exponente){
+    int r;
+    r = 1;
+    while (exponente > 0) {
+        r = r * base;
+        exponente = exponente - 1;
+    }
+    return r;
+}
+int aleatorio(){
+    semilla = semilla * 1103515245 + 12345;
+    return semilla / 65536;
+}
+float escalar(float x){
+    return x * escala;
+}
+int cuenta(){
+    contador = contador + 1;
+    return contador;
+}
+int main(){
+    return potencia(2, 5) + maximo(absoluto(0 - 7), 3) + cuenta();
+}
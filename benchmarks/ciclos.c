@@ -0,0 +1,32 @@
+int escala;
+int suma_escalada(int n, int a, int b){
+    int i;
+    int s;
+    i = 0;
+    s = 0;
+    while (i < n) {
+        s = s + i * (a * b) + escala / 4;
+        i = i + 1;
+    }
+    return s;
+}
+int tabla(int filas, int columnas){
+    int f;
+    int c;
+    int t;
+    f = 0;
+    t = 0;
+    while (f < filas) {
+        c = 0;
+        while (c < columnas) {
+            t = t + f * columnas + c;
+            c = c + 1;
+        }
+        f = f + 1;
+    }
+    return t;
+}
+int main(){
+    escala = 8;
+    return suma_escalada(10, 2, 3) + tabla(4, 5);
+}
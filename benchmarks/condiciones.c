@@ -0,0 +1,11 @@
+int clasifica(int n){
+    int r;
+    r = (n > 10) * (1 < 2) + (n == 5) * (3 >= 3) + (2 != 2) * n;
+    r = r + (n < 0 || 0) + (n > 0 && 1);
+    return r;
+}
+int main(){
+    int total;
+    total = clasifica(12) + clasifica(5) * (10 / 5) + clasifica(0 - 3);
+    return total + (7 > 3 && 4 < 9);
+}
@@ -0,0 +1,14 @@
+int area(int base, int altura){
+    return base * altura / 2;
+}
+int main(){
+    int segundos;
+    int bytes;
+    int mascara;
+    int r;
+    segundos = 60 * 60 * 24 * 7;
+    bytes = 4 * 1024 * 1024 + 512;
+    mascara = (1 + 2) * (3 + 4) - 20 / 3;
+    r = area(3 * 4, 10 - 2) + segundos / (24 * 3600) + mascara;
+    return r + bytes - bytes;
+}
@@ -0,0 +1,36 @@
+int pasos;
+int suma_pares(){
+    int i;
+    int s;
+    i = 0;
+    s = 0;
+    while (i < 8) {
+        s = s + i * pasos;
+        i = i + 2;
+    }
+    return s;
+}
+int main(){
+    int i;
+    int k;
+    int acumulado;
+    float media;
+    pasos = 3;
+    acumulado = 0;
+    media = 0.0;
+    i = 0;
+    while (i < 100) {
+        acumulado = acumulado + i * pasos - acumulado / 16;
+        media = media + 0.25;
+        i = i + 1;
+    }
+    k = 30;
+    while (k > 0) {
+        acumulado = acumulado + k;
+        k = k - 3;
+    }
+    if (media > 24.0) {
+        acumulado = acumulado + 1;
+    }
+    return acumulado + suma_pares();
+}
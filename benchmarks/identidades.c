@@ -0,0 +1,12 @@
+int mezcla(int a, int b, int c){
+    int x;
+    int y;
+    x = (a + 0) * 1 + (0 + b) * (c - 0);
+    y = x / 1 + a * 0 + 0 * c;
+    return x * (2 - 1) + y * (3 - 3);
+}
+int main(){
+    int v;
+    v = mezcla(5, 7, 9) + 0;
+    return v * 1;
+}
@@ -0,0 +1,12 @@
+float escala(float x){
+    return x * (2.0 * 0.5) + (1.5 + 2.5) * 0.25;
+}
+int main(){
+    float f;
+    float g;
+    int n;
+    f = escala(3.0 * 2.0);
+    g = f * (10.0 / 4.0) - 1.0 * 0.5;
+    n = (100 - 1) / 3 + (0 - 7) / 2;
+    return n;
+}
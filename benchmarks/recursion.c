@@ -0,0 +1,27 @@
+int suma(int n, int acumulado){
+    if (n == 0) {
+        return acumulado;
+    }
+    return suma(n - 1, acumulado + n);
+}
+int mcd(int a, int b){
+    if (b == 0) {
+        return a;
+    }
+    return mcd(b, a - (a / b) * b);
+}
+int impar(int n){
+    if (n == 0) {
+        return 0;
+    }
+    return par(n - 1);
+}
+int par(int n){
+    if (n == 0) {
+        return 1;
+    }
+    return impar(n - 1);
+}
+int main(){
+    return suma(100, 0) / 10 + mcd(1071, 462) + par(40) * 7;
+}
@@ -1,761 +1,906 @@
-from parser import Node
-from semantic_analyzer import SemanticAnalyzer
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from type_system import T_INT, T_FLOAT
+from ir import Const, Temp, Global, build_program, COMMUTATIVE_OPS, COMPARISON_OPS, SWAPPED_COMPARISONS
+from assembly import (Label, Comment, Directive, Instruction, render,
+                      is_register, is_immediate, is_memory, full_register, register_info)
+from layout import size_of, data_directive, value_register, value_memory, pack, packing_order
+from peephole import PeepholeOptimizer, INVERSE_JUMPS
+from isel import InstructionSelector
+from passes import PassManager
+from regalloc import LinearScan
+from runtime import BUILTINS, DATA as RUNTIME_DATA, BSS as RUNTIME_BSS, runtime_code
+
+
+INT_ARGUMENT_REGISTERS = ("rdi", "rsi", "rdx", "rcx", "r8", "r9")
+
+# Sufijo de setcc por operador de comparación (enteros con signo / reales)
+INT_CONDITIONS = {'<': 'l', '<=': 'le', '>': 'g', '>=': 'ge', '==': 'e', '!=': 'ne'}
+# Tras ucomisd un resultado no ordenado (algún NaN) deja ZF=PF=CF=1: '<' y
+# '<=' se comparan con los operandos invertidos para usar 'a'/'ae', que son
+# falsas en ese caso, y la igualdad se combina con la paridad:
+# (condición, condición de paridad, instrucción que las combina)
+FLOAT_CONDITIONS = {'<': 'a', '<=': 'ae', '>': 'a', '>=': 'ae'}
+FLOAT_EQUALITY = {'==': ('e', 'np', 'and'), '!=': ('ne', 'p', 'or')}
+
+FLOAT_INSTRUCTIONS = {'+': 'addsd', '-': 'subsd', '*': 'mulsd', '/': 'divsd'}
+INT_INSTRUCTIONS = {'+': 'add', '-': 'sub', '*': 'imul'}
+
+
+def fits_imm32(text):
+    """Indica si un literal entero cabe como inmediato de 32 bits con signo"""
+    return -2**31 <= int(text) < 2**31
+
+
+def multiplier_shape(value):
+    """(factor, desplazamiento) con value = factor * 2**desplazamiento y factor
+    en 1, 3, 5 o 9 (lo que calcula un lea); None si value no tiene esa forma"""
+    shift = (value & -value).bit_length() - 1
+    factor = value >> shift
+    return (factor, shift) if factor in (1, 3, 5, 9) else None
+
+
+def signed_magic(divisor, bits=64):
+    """Multiplicador mágico y desplazamiento para dividir entre una constante.
+
+    Algoritmo de Hacker's Delight (cap. 10): x / divisor con truncamiento
+    hacia cero es la parte alta de magic * x, corregida y desplazada."""
+    two = 1 << (bits - 1)
+    ad = abs(divisor)
+    t = two + (1 if divisor < 0 else 0)
+    anc = t - 1 - t % ad
+    p = bits - 1
+    q1, r1 = divmod(two, anc)
+    q2, r2 = divmod(two, ad)
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= ad:
+            q2, r2 = q2 + 1, r2 - ad
+        delta = ad - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+    magic = q2 + 1
+    if magic >= two:
+        magic -= 1 << bits
+    if divisor < 0:
+        magic = -magic
+    return magic, p - bits
+
+
+def float_literal(value):
+    """Texto de un double aceptado por NASM (siempre con punto decimal)"""
+    text = repr(float(value))
+    if 'e' in text and '.' not in text:
+        mantissa, exponent = text.split('e')
+        text = f"{mantissa}.0e{exponent}"
+    return text
+
+
+# Con menos funciones que esto la generación no se reparte entre procesos
+# (crearlos y copiarles la IR cuesta más de lo que ahorran)
+PARALLEL_MIN_FUNCTIONS = 64
+
+
+class FunctionUnit:
+    """Fragmentos de una función ya generada: texto, datos y aciertos de reglas"""
+
+    def __init__(self, text, data, selector_hits, peephole_hits):
+        self.text = text                    # Líneas de .text ya con el peephole aplicado
+        self.data = data                    # Líneas de .data (constantes reales)
+        self.selector_hits = selector_hits
+        self.peephole_hits = peephole_hits
+
+
+def generate_unit(settings, function):
+    """Genera una función con un generador propio; corre en los procesos de trabajo"""
+    opt_level, peephole = settings
+    return CodeGenerator(opt_level, peephole).generate_unit(function)
+
+
+# Bytes bajo rsp que una función hoja puede usar sin reservarlos (System V)
+RED_ZONE = 128
+
+
+class Frame:
+    """Disposición del marco de una función, calculada una vez.
+
+    Con marco: push rbp, push de los callee-saved usados y 'sub rsp, size'
+    con el espacio exacto de los slots más el relleno que deja rsp alineado
+    a 16 bytes en las llamadas. Una función hoja cuyos slots caben en la
+    zona roja no arma marco: guarda sus callee-saved y usa [rsp-N].
+    slot_sizes da los bytes de cada slot (layout.py los empaqueta)."""
+
+    def __init__(self, callee_saved, slot_sizes, leaf):
+        self.callee_saved = list(callee_saved)
+        self.depths, self.slot_bytes = pack(slot_sizes)
+        self.uses_rbp = not leaf or self.slot_bytes > RED_ZONE
+        self.size = 0
+        if self.uses_rbp:
+            # Al entrar rsp es 8 mod 16 (dirección de retorno); push rbp lo alinea
+            padding = 8 if (8 * len(self.callee_saved) + self.slot_bytes) % 16 else 0
+            self.size = self.slot_bytes + padding
+
+    @property
+    def empty(self):
+        """Sin nada que deshacer al retornar: el epílogo es solo 'ret'"""
+        return not self.uses_rbp and not self.callee_saved
+
+    def slot(self, index):
+        if self.uses_rbp:
+            return f"[rbp-{8 * len(self.callee_saved) + self.depths[index]}]"
+        return f"[rsp-{self.depths[index]}]"
+
+    def stack_parameter(self, index):
+        # Arriba de la dirección de retorno (y de rbp y los registros guardados)
+        if self.uses_rbp:
+            return f"[rbp+{16 + 8 * index}]"
+        return f"[rsp+{8 + 8 * len(self.callee_saved) + 8 * index}]"
 
 
 class CodeGenerator:
-    def __init__(self):
-        self.code = []
+    def __init__(self, opt_level=0, peephole=None, inline_threshold=None, profile=None,
+                 unroll_factor=None, jobs=1):
+        self.code = []             # Registros de assembly.py; se convierten a texto al final
         self.data_section = []
-        self.label_counter = 0
-        self.current_offset = 0
-        self.variable_map = {}
-        self.functions = []
-        self.function_has_return = False
-        self.local_variables = {}  # Mapeo de variables locales a offsets del stack
-        self.local_offset = 0      # Offset actual para variables locales
-        self.current_function = None  # Función actual siendo procesada
-        
+        self.label_counter = 0     # Por función: las etiquetas no dependen de las demás
+        self.current_function = None  # Función (IR) siendo procesada
+        self.frame = None          # Marco de la función actual
+        self.return_label = None   # Etiqueta del epílogo compartido de la función actual
+        self.float_constants = {}  # Literales reales -> etiqueta en .data
+        self.homes = {}            # Valor de la IR -> registro o slot del stack
+        self.block_labels = {}     # Bloque de la IR -> etiqueta
+        self.next_block = None     # Bloque que se emite a continuación
+        self.selector = InstructionSelector()
+        self.selection = {}        # Instrucción de la IR -> líneas elegidas por la tabla de isel.py
+        self.folded = set()        # Definiciones que quedaron dentro del árbol de otra instrucción
+        self.opt_level = opt_level
+        self.pass_manager = PassManager(opt_level, inline_threshold, profile, unroll_factor)
+        if peephole is None:
+            peephole = opt_level > 0
+        self.peephole = PeepholeOptimizer() if peephole else None
+        self.program = None        # IR del último programa generado
+        self.jobs = jobs           # Procesos para generar las funciones (0: uno por núcleo)
+
     def generate_label(self):
+        # Local a la función (".suma.L1"): cada función se genera por separado
         self.label_counter += 1
-        return f"L{self.label_counter}"
-    
-    def add_instruction(self, instruction):
-        self.code.append(f"    {instruction}")
-    
+        return f".{self.current_function.name}.L{self.label_counter}"
+
+    def add_instruction(self, opcode, *operands):
+        # Los operandos numéricos (tamaños, desplazamientos) pasan a texto
+        self.code.append(Instruction(opcode, [str(operand) for operand in operands]))
+
     def add_label(self, label):
-        self.code.append(f"{label}:")
-    
+        self.code.append(Label(label))
+
+    def add_directive(self, text=""):
+        self.code.append(Directive(text))
+
     def add_data(self, data):
         self.data_section.append(f"    {data}")
-    
+
     def add_comment(self, comment):
-        self.code.append(f"    ; {comment}")
-    
+        self.code.append(Comment(comment))
+
     def generate_code(self, ast_root, symbol_table):
         self.code = []
         self.data_section = []
-        self.functions = []
+        self.float_constants = {}
         self.symbol_table = symbol_table  # Guardar la tabla de símbolos
-        
-        # Header NASM para Windows
-        self.code.append("section .data")
-        
+
+        # Bajar el AST a IR y optimizarla según el nivel
+        self.program = build_program(ast_root, symbol_table)
+        self.pass_manager.run(self.program)
+
         # Generar variables globales
-        self.generate_global_variables(symbol_table)
-        
-        # Agregar buffer para mostrar números y mensajes
-        self.add_data("msg db 'Resultado: ', 0")
-        self.add_data("newline db 10, 0  ; \\n para Linux")
-        self.add_data("buffer times 32 db 0")
-        
+        self.generate_global_variables(self.program)
+
+        # Datos del runtime: mensaje del resultado y tabla de dígitos
+        for line in RUNTIME_DATA:
+            self.add_data(line)
+
         # Código compatible con Linux
-        self.code.append("")
-        self.code.append("section .text")
-        self.code.append("global _start")
-        self.code.append("")
-        
-        # Generar código para las funciones
-        self.visit_node(ast_root)
-        
-        # Agregar función para imprimir números
-        self.generate_print_functions()
-        
-        # Punto de entrada del programa
-        self.code.append("_start:")
-        self.add_instruction("call main")
-        self.add_instruction("mov rdi, rax    ; usar valor de retorno como exit code")
-        
-        # Mostrar el mensaje "Resultado: " usando syscall write
-        self.add_instruction("; Mostrar mensaje 'Resultado: '")
-        self.add_instruction("push rdi        ; guardar exit code")
-        self.add_instruction("mov rax, 1      ; sys_write")
-        self.add_instruction("mov rdi, 1      ; stdout")
-        self.add_instruction("mov rsi, msg    ; buffer")
-        self.add_instruction("mov rdx, 11     ; longitud")
-        self.add_instruction("syscall")
-        
-        # Mostrar el número
-        self.add_instruction("pop rdi         ; recuperar el valor")
-        self.add_instruction("call print_number")
-        
-        # Mostrar nueva línea
-        self.add_instruction("mov rax, 1      ; sys_write")
-        self.add_instruction("mov rdi, 1      ; stdout")
-        self.add_instruction("mov rsi, newline ; buffer")
-        self.add_instruction("mov rdx, 1      ; longitud")
-        self.add_instruction("syscall")
-        
-        # Salir del programa usando syscall exit
-        self.add_instruction("mov rdi, 8      ; exit code fijo para prueba")
-        self.add_instruction("mov rax, 60     ; sys_exit")
-        self.add_instruction("syscall")
-        
-        return "\n".join(self.data_section + self.code)
-    
-    def generate_global_variables(self, symbol_table):
-        for symbol_name, symbol in symbol_table.scopes[0].items():
-            if symbol.symbol_type == 'variable':
-                if symbol.data_type == 'int':
-                    self.add_data(f"{symbol_name}: dq 0")
-                elif symbol.data_type == 'float':
-                    self.add_data(f"{symbol_name}: dq 0.0")
-    
-    def visit_node(self, node):
-        if node is None:
-            return
-        
-        if node.name == 'programa':
-            for child in node.children:
-                self.visit_node(child)
-        
-        elif node.name == 'Definiciones':
-            for child in node.children:
-                self.visit_node(child)
-        
-        elif node.name == 'Definicion':
-            for child in node.children:
-                self.visit_node(child)
-        
-        elif node.name == 'DefFunc':
-            self.generate_function(node)
-        
-        elif node.name == 'DefVar':
-            # Las variables globales ya se generaron
-            pass
-        
-        else:
-            # Visitar hijos para otros nodos
-            for child in node.children:
-                self.visit_node(child)
-    
-    def generate_function(self, func_node):
-        # Extraer nombre de la función
-        func_name = self.extract_function_name(func_node)
-        self.current_function = func_name
-        
-        # Resetear variables locales para esta función
-        self.local_variables = {}
-        self.local_offset = 0
-        
-        self.code.append("")
-        self.add_label(func_name)
-        
-        # Prólogo de la función
-        self.add_instruction("push rbp")
-        self.add_instruction("mov rbp, rsp")
-        
-        # Registrar parámetros como variables locales
-        self.register_function_parameters(func_node)
-        
-        # Reservar espacio para variables locales (calculado después de analizar)
-        # Primero analizamos para contar variables locales
-        local_var_count = self.count_local_variables(func_node)
-        total_vars = len(self.local_variables) + local_var_count
-        stack_space = max(32, total_vars * 8 + 32)  # Mínimo 32 para shadow space
-        self.add_instruction(f"sub rsp, {stack_space}")
-        
-        # Mover parámetros desde registros a variables locales
-        self.setup_function_parameters()
-        
-        # Bandera para controlar si ya se generó un return
-        self.function_has_return = False
-        
-        # Generar cuerpo de la función
-        for child in func_node.children:
-            if child.name == 'BloqFunc':
-                self.generate_block(child)
-        
-        # Epílogo de la función (solo si no hay return explícito)
-        if not self.function_has_return:
-            self.add_instruction("mov rax, 0")
-            self.add_instruction(f"add rsp, {stack_space}")
-            self.add_instruction("pop rbp")
+        self.add_directive()
+        self.add_directive("section .text")
+        self.add_directive("global _start")
+        self.add_directive()
+
+        # Generar código para las funciones; los fragmentos se unen en el
+        # orden del fuente, así el resultado no depende de cuántos procesos hubo
+        text = render(self.code)
+        seen_data = set()
+        for unit in self.generate_units(self.program.functions):
+            text += unit.text
+            for line in unit.data:
+                if line not in seen_data:
+                    seen_data.add(line)
+                    self.data_section.append(line)
+            for name, count in unit.selector_hits.items():
+                self.selector.hits[name] += count
+            if self.peephole is not None:
+                for name, count in unit.peephole_hits.items():
+                    self.peephole.hits[name] += count
+
+        # Runtime: buffer de salida, conversión a decimal, builtins y _start.
+        # Ya está escrito a mano, así que no pasa por el peephole
+        global_scope = self.symbol_table.scopes[0]
+        builtins = [name for name in BUILTINS
+                    if name in global_scope and global_scope[name].builtin]
+        self.code = runtime_code(builtins)
+
+        # La sección .data debe declararse antes de sus datos; si no, NASM
+        # los coloca en .text (solo lectura). El buffer de salida va en .bss:
+        # se reserva al cargar el programa y no ocupa lugar en el ejecutable
+        return "\n".join(["section .data"] + self.data_section + text + render(self.code)
+                         + ["", "section .bss"] + [f"    {line}" for line in RUNTIME_BSS])
+
+    def generate_units(self, functions):
+        """Genera cada función por separado, en paralelo si son bastantes"""
+        settings = (self.opt_level, self.peephole is not None)
+        jobs = self.jobs or os.cpu_count() or 1
+        if jobs == 1 or len(functions) < PARALLEL_MIN_FUNCTIONS:
+            return [generate_unit(settings, function) for function in functions]
+        chunksize = max(1, len(functions) // (4 * jobs))
+        with ProcessPoolExecutor(jobs) as pool:
+            return list(pool.map(generate_unit, repeat(settings), functions, chunksize=chunksize))
+
+    def generate_unit(self, function):
+        self.code, self.data_section = [], []
+        self.generate_function(function)
+        if self.peephole is not None:
+            self.code = self.peephole.optimize(self.code)
+        peephole_hits = self.peephole.hits if self.peephole is not None else None
+        return FunctionUnit(render(self.code), self.data_section, self.selector.hits, peephole_hits)
+
+    def generate_global_variables(self, program):
+        # Empaquetadas por alineación: los float (8 bytes) antes que los int
+        symbols = [symbol for symbol in program.globals if symbol.data_type in ('int', 'float')]
+        types = [T_FLOAT if symbol.data_type == 'float' else T_INT for symbol in symbols]
+        for i in packing_order([size_of(type_id) for type_id in types]):
+            zero = "0.0" if types[i] == T_FLOAT else "0"
+            self.add_data(f"{symbols[i].name}: {data_directive(types[i])} {zero}")
+
+    def generate_function(self, function):
+        self.current_function = function
+        self.label_counter = 0
+        self.block_labels = {block: self.generate_label() for block in function.blocks}
+
+        self.add_directive()
+        self.add_label(function.name)
+
+        # Asignar registros (barrido lineal) y slots del stack
+        locations = self.classify_arguments([param.type_id for param in function.params])
+        allocation = LinearScan(function, dict(zip(function.params, locations)))
+        # Un slot compartido por valores de distinto tipo toma el tamaño mayor
+        slot_sizes = [0] * allocation.slots
+        for value, slot in allocation.slot_of.items():
+            slot_sizes[slot] = max(slot_sizes[slot], size_of(value.type_id))
+        self.frame = Frame(allocation.callee_saved, slot_sizes, self.is_leaf(function))
+        self.homes = {value: value_register(register, value.type_id)
+                      for value, register in allocation.homes.items()}
+        for value, slot in allocation.slot_of.items():
+            self.homes[value] = value_memory(self.frame.slot(slot), value.type_id)
+        self.return_label = self.generate_label()
+        returns = 0
+
+        self.generate_prologue()
+
+        # Mover parámetros desde sus registros de entrada a su lugar
+        self.setup_function_parameters(function, locations, allocation.liveness)
+
+        # Temporales que solo leen una vez (candidatos a quedar en los flags
+        # o dentro del árbol de quien los lee)
+        use_counts = {}
+        for instr in function.instructions():
+            for value in instr.uses():
+                use_counts[value] = use_counts.get(value, 0) + 1
+
+        self.selection, self.folded = {}, set()
+        for block in function.blocks:
+            plans, folded = self.selector.select_block(block, self.operand, use_counts, self.selectable)
+            self.selection.update(plans)
+            self.folded |= folded
+
+        for i, block in enumerate(function.blocks):
+            self.next_block = function.blocks[i + 1] if i + 1 < len(function.blocks) else None
+            if i > 0:
+                self.add_label(self.block_labels[block])
+            instrs = block.instrs
+            if self.fuses_with_branch(instrs, use_counts):
+                # La comparación alimenta solo al 'br': cmp + jcc, sin setcc
+                for instr in instrs[:-2]:
+                    self.generate_instruction(instr)
+                self.generate_compare_branch(instrs[-2], instrs[-1])
+                continue
+            if self.is_tail_call(block):
+                # 'return f(...)': los argumentos van a los registros de f y se
+                # salta a ella con el marco ya desarmado; f retorna a quien nos llamó
+                for instr in instrs[:-2]:
+                    self.generate_instruction(instr)
+                self.generate_tail_call(instrs[-2])
+                continue
+            for instr in instrs:
+                self.generate_instruction(instr)
+            returns += instrs[-1].op == 'ret'
+
+        # Epílogo compartido: los retornos saltan aquí (el último cae)
+        if returns and not self.frame.empty:
+            self.add_label(self.return_label)
+            self.generate_epilogue()
             self.add_instruction("ret")
-            
         self.current_function = None
 
-    def register_function_parameters(self, func_node):
-        for child in func_node.children:
-            if child.name == 'Parametros':
-                param_count = 0
-                for param_child in child.children:
-                    if param_child.name == 'Parameter' or (hasattr(param_child, 'token') and param_child.token and param_child.token.tipo == 'identificador'):
-                        # Buscar el identificador del parámetro
-                        param_name = None
-                        if hasattr(param_child, 'token') and param_child.token and param_child.token.tipo == 'identificador':
-                            param_name = param_child.token.lexema
-                        elif hasattr(param_child, 'children'):
-                            for subchild in param_child.children:
-                                if hasattr(subchild, 'token') and subchild.token and subchild.token.tipo == 'identificador':
-                                    param_name = subchild.token.lexema
-                                    break
-                        
-                        if param_name:
-                            self.local_offset += 8
-                            self.local_variables[param_name] = self.local_offset
-                            param_count += 1
-                            
-                # También buscar en ListaParam si existe
-                for param_child in child.children:
-                    if param_child.name == 'ListaParam':
-                        self.register_list_parameters(param_child)
-                        
-    def register_list_parameters(self, list_param_node):
-        # Registrar parámetros recursivamente
-        for child in list_param_node.children:
-            if hasattr(child, 'token') and child.token and child.token.tipo == 'identificador':
-                param_name = child.token.lexema
-                self.local_offset += 8
-                self.local_variables[param_name] = self.local_offset
-            elif child.name == 'ListaParam':
-                self.register_list_parameters(child)
-                        
-    def setup_function_parameters(self):
-        # Mover parámetros desde registros a stack (Linux x64 calling convention)
-        param_regs = ["rdi", "rsi", "rdx", "rcx", "r8", "r9"]  # Linux x64 calling convention
-        param_index = 0
-        
-        for param_name, offset in self.local_variables.items():
-            if param_index < len(param_regs):
-                self.add_instruction(f"mov [rbp-{offset}], {param_regs[param_index]}")
-                param_index += 1
-            else:
+    def is_leaf(self, function):
+        # Las llamadas de cola saltan con el marco ya desarmado: no cuentan
+        tail_calls = [self.current_function.tail_call(block) for block in function.blocks
+                      if self.is_tail_call(block)]
+        return all(instr in tail_calls for instr in function.instructions() if instr.op == 'call')
+
+    def generate_prologue(self):
+        frame = self.frame
+        if frame.uses_rbp:
+            self.add_instruction("push", "rbp")
+            self.add_instruction("mov", "rbp", "rsp")
+        # Solo se guardan los callee-saved que se usan
+        for register in frame.callee_saved:
+            self.add_instruction("push", register)
+        if frame.size:
+            self.add_instruction("sub", "rsp", frame.size)
+
+    def setup_function_parameters(self, function, locations, liveness):
+        # Linux x64 calling convention; los parámetros que no se leen no se mueven
+        live = liveness.block_in(function.entry)
+        moves = []
+        for param, location in zip(function.params, locations):
+            if not live & (1 << liveness.index[param]):
+                continue
+            if location.startswith('stack'):
                 # Parámetros adicionales vienen del stack
-                stack_offset = 16 + (param_index - 6) * 8  # 16 bytes para return address + rbp
-                self.add_instruction(f"mov rax, [rbp+{stack_offset}]")
-                self.add_instruction(f"mov [rbp-{offset}], rax")
-                param_index += 1
-
-    def count_local_variables(self, func_node):
-        # Contar variables locales en función
-        count = 0
-        for child in func_node.children:
-            if child.name == 'BloqFunc':
-                count += self.count_local_vars_in_block(child)
-        return count
-    
-    def count_local_vars_in_block(self, block_node):
-        # Contar variables en bloque
-        count = 0
-        for child in block_node.children:
-            if child.name == 'DefLocales':
-                count += self.count_local_vars_in_deflocales(child)
-        return count
-    
-    def count_local_vars_in_deflocales(self, deflocales_node):
-        # Contar variables recursivamente
-        count = 0
-        for child in deflocales_node.children:
-            if child.name == 'DefLocal':
-                for grandchild in child.children:
-                    if grandchild.name == 'DefVar':
-                        count += 1  # Una variable por DefVar
-        return count
-    
-    def generate_block(self, block_node):
-        for child in block_node.children:
-            if child.name == 'DefLocales':
-                self.generate_local_definitions(child)
+                location = value_memory(self.frame.stack_parameter(int(location[5:])), param.type_id)
+            moves.append((self.homes[param], value_register(location, param.type_id)))
+        self.parallel_move(moves)
+
+    def parallel_move(self, moves):
+        # Movimientos (destino, origen) que ocurren a la vez: un registro
+        # destino puede ser el origen de otro movimiento
+        moves = [(dest, source) for dest, source in moves if dest != source]
+        while moves:
+            sources = {source for _, source in moves}
+            ready = next((move for move in moves if move[0] not in sources), None)
+            if ready is None:
+                # Ciclo entre registros: romperlo pasando un origen por rax
+                dest, source = moves[0]
+                scratch = "eax" if self.is_int32(source) else "rax"
+                self.add_instruction("mov", scratch, source)
+                moves = [(d, scratch if s == source else s) for d, s in moves]
+                continue
+            moves.remove(ready)
+            self.move(*ready)
+
+    def move(self, dest, source):
+        if dest.startswith('xmm') or source.startswith('xmm'):
+            self.add_instruction("movsd", dest, source)
+        elif is_memory(dest) and is_memory(source):
+            scratch = "r11d" if self.is_int32(source) else "r11"
+            self.add_instruction("mov", scratch, source)
+            self.add_instruction("mov", dest, scratch)
+        else:
+            self.add_instruction("mov", self.sized(dest) if is_immediate(source) else dest, source)
+
+    @staticmethod
+    def is_int32(operand):
+        # Registro de 32 bits o memoria dword: un int
+        info = register_info(operand)
+        return operand.startswith('dword') or (info is not None and info[1] == 32)
+
+    def classify_arguments(self, type_ids):
+        # Ubicación de cada argumento según System V: enteros en rdi..r9,
+        # reales en xmm0..xmm7 y el resto en el stack ('stackN')
+        locations = []
+        int_index = 0
+        float_index = 0
+        stack_index = 0
+        for type_id in type_ids:
+            if type_id == T_FLOAT and float_index < 8:
+                locations.append(f"xmm{float_index}")
+                float_index += 1
+            elif type_id != T_FLOAT and int_index < len(INT_ARGUMENT_REGISTERS):
+                locations.append(INT_ARGUMENT_REGISTERS[int_index])
+                int_index += 1
             else:
-                self.generate_statement(child)
-    
-    
-    def generate_local_definitions(self, deflocales_node):
-        # Procesar definiciones locales recursivamente
-        for child in deflocales_node.children:
-            if child.name == 'DefLocal':
-                self.generate_local_definition(child)
-            elif child.name == 'DefLocales':
-                self.generate_local_definitions(child)
-            elif child.name == 'DefLocales':
-                self.generate_local_definitions(child)
-    
-    def generate_local_definition(self, deflocal_node):
-        for i, child in enumerate(deflocal_node.children):
-            if child.name == 'DefVar':
-                # Registrar variable local SOLO si no existe ya
-                var_name = self.extract_variable_name_from_defvar(child)
-                if var_name and var_name not in self.local_variables:
-                    self.local_offset += 8  # 8 bytes por variable (qword)
-                    self.local_variables[var_name] = self.local_offset
-            elif child.name == 'Sentencia':
-                # La sentencia podría contener declaraciones de variables también
-                self.process_possible_vardecl_in_statement(child)
-                # ¡IMPORTANTE! Generar código para la sentencia
-                self.generate_statement(child)
+                locations.append(f"stack{stack_index}")
+                stack_index += 1
+        return locations
+
+    # === Operandos ===
+
+    def float_constant(self, value):
+        # Etiqueta en .data para un literal real (se reutiliza si se repite);
+        # el nombre sale de los bits del valor, igual en todas las funciones
+        text = float_literal(value)
+        if text not in self.float_constants:
+            label = f"flt_{struct.unpack('<Q', struct.pack('<d', float(value)))[0]:016x}"
+            self.float_constants[text] = label
+            self.add_data(f"{label}: dq {text}")
+        return self.float_constants[text]
+
+    def operand(self, value):
+        # Texto del operando: inmediato, registro o memoria
+        if isinstance(value, Const):
+            if value.type_id == T_FLOAT:
+                return f"[rel {self.float_constant(value.value)}]"
+            return str(value.value)
+        if isinstance(value, Global):
+            return value_memory(f"[rel {value.name}]", value.type_id)
+        return self.homes[value]
+
+    def sized(self, operand):
+        # Memoria con tamaño explícito (para inmediatos, push, idiv,
+        # cvttsd2si); los int ya lo traen (dword)
+        return f"qword {operand}" if operand.startswith('[') else operand
+
+    def int_source(self, value):
+        # Operando derecho de una operación entera: registro, memoria o imm32
+        if isinstance(value, Const) and not fits_imm32(value.value):
+            self.add_instruction("mov", "r11d", value.value)
+            return "r11d"
+        return self.operand(value)
+
+    def load_int(self, value, register):
+        source = self.operand(value)
+        if source != register:
+            self.add_instruction("mov", register, source)
+        return register
+
+    def load_float(self, value, register):
+        source = self.operand(value)
+        if source != register:
+            self.add_instruction("movsd", register, source)
+        return register
+
+    def int_register(self, value):
+        # Registro con el valor entero (rax si está en memoria o es literal)
+        operand = self.operand(value)
+        if isinstance(value, Const) or is_memory(operand):
+            return self.load_int(value, "eax")
+        return operand
+
+    def float_register(self, value):
+        operand = self.operand(value)
+        if operand.startswith('xmm'):
+            return operand
+        return self.load_float(value, "xmm0")
+
+    def target(self, dest, fallback):
+        # Registro donde calcular dest: su propio registro o uno de trabajo
+        home = self.homes[dest]
+        return home if is_register(home) else fallback
+
+    def finish(self, dest, register):
+        # Guardar el resultado calculado en register en el lugar de dest
+        home = self.homes[dest]
+        if home == register:
+            return
+        if dest.type_id == T_FLOAT:
+            self.add_instruction("movsd", home, register)
+        else:
+            self.add_instruction("mov", home, register)
+
+    # === Instrucciones ===
+
+    def selectable(self, instr):
+        # Operaciones enteras que se cubren con la tabla de isel.py; el
+        # producto por un literal se reduce aparte (shl, lea, neg) desde -O1
+        if instr.op == 'store':
+            return instr.type_id == T_INT
+        if instr.op not in INT_INSTRUCTIONS or instr.type_id != T_INT:
+            return False
+        return not (instr.op == '*' and self.opt_level > 0
+                    and any(isinstance(arg, Const) for arg in instr.args))
+
+    def generate_instruction(self, instr):
+        if instr in self.folded:
+            return
+        if instr in self.selection:
+            self.code.extend(self.selection[instr])
+            return
+        op = instr.op
+        if op == 'copy':
+            self.generate_copy(instr.dest, instr.args[0])
+        elif op in INT_INSTRUCTIONS and instr.type_id == T_INT:
+            self.generate_int_arithmetic(instr)
+        elif op == '/' and instr.type_id == T_INT:
+            self.generate_int_division(instr)
+        elif op in FLOAT_INSTRUCTIONS:
+            self.generate_float_arithmetic(instr)
+        elif op in COMPARISON_OPS:
+            self.generate_comparison(instr)
+        elif op in ('&&', '||'):
+            self.generate_logical(instr)
+        elif op == 'neg':
+            self.generate_negation(instr)
+        elif op == '!':
+            self.generate_not(instr)
+        elif op == 'i2f':
+            register = self.target(instr.dest, "xmm0")
+            source = instr.args[0]
+            operand = self.load_int(source, "eax") if isinstance(source, Const) else self.operand(source)
+            self.add_instruction("cvtsi2sd", register, operand)
+            self.finish(instr.dest, register)
+        elif op == 'f2i':
+            register = self.target(instr.dest, "eax")
+            source = instr.args[0]
+            operand = self.load_float(source, "xmm0") if isinstance(source, Const) else self.operand(source)
+            self.add_instruction("cvttsd2si", register, self.sized(operand))
+            self.finish(instr.dest, register)
+        elif op == 'load':
+            register = self.target(instr.dest, "xmm0" if instr.dest.type_id == T_FLOAT else "eax")
+            move = "movsd" if instr.dest.type_id == T_FLOAT else "mov"
+            self.add_instruction(move, register, self.operand(instr.args[0]))
+            self.finish(instr.dest, register)
+        elif op == 'store':
+            self.generate_copy(instr.dest, instr.args[0])
+        elif op == 'call':
+            self.generate_call(instr)
+        elif op == 'ret':
+            self.generate_return(instr)
+        elif op == 'jmp':
+            self.jump(instr.targets[0])
+        elif op == 'br':
+            self.generate_branch(instr)
+
+    def generate_copy(self, dest, source):
+        # dest puede ser un valor de la IR o una global (store)
+        target = self.operand(dest)
+        operand = self.operand(source)
+        if target == operand:
+            return
+        if dest.type_id == T_FLOAT:
+            if target.startswith('xmm') or operand.startswith('xmm'):
+                self.add_instruction("movsd", target, operand)
             else:
-                # Procesar cualquier otro tipo de nodo hijo
-                if hasattr(child, 'name'):
-                    self.generate_statement(child)
-                
-    def process_possible_vardecl_in_statement(self, stmt_node):
-        # Procesar declaraciones de variables en sentencias
-        for child in stmt_node.children:
-            if hasattr(child, 'name') and child.name == 'DefVar':
-                # Encontramos una DefVar dentro de la sentencia
-                var_name = self.extract_variable_name_from_defvar(child)
-                if var_name and var_name not in self.local_variables:
-                    self.local_offset += 8
-                    self.local_variables[var_name] = self.local_offset
-            elif hasattr(child, 'name') and child.name == 'DefLocal':
-                # Recursivo - procesar DefLocal anidado
-                self.process_deflocal_recursively(child)
-            elif hasattr(child, 'name') and child.name == 'Sentencia':
-                # Recursivo - procesar Sentencia anidada
-                self.process_possible_vardecl_in_statement(child)
-                
-    def process_deflocal_recursively(self, deflocal_node):
-        # Procesar DefLocal recursivamente
-        for child in deflocal_node.children:
-            if hasattr(child, 'name') and child.name == 'DefVar':
-                var_name = self.extract_variable_name_from_defvar(child)
-                if var_name and var_name not in self.local_variables:
-                    self.local_offset += 8
-                    self.local_variables[var_name] = self.local_offset
-            elif hasattr(child, 'name') and child.name == 'Sentencia':
-                self.process_possible_vardecl_in_statement(child)
-            elif hasattr(child, 'name') and child.name == 'DefLocal':
-                self.process_deflocal_recursively(child)
-    
-    def extract_variable_name_from_defvar(self, defvar_node):
-        # Extraer nombre de variable de DefVar
-        for child in defvar_node.children:
-            if hasattr(child, 'token') and child.token and child.token.tipo == 'identificador':
-                return child.token.lexema
-        return None
-    
-    def generate_statement(self, stmt_node):
-        if stmt_node.name == 'Sentencia':
-            # Analizar el tipo de sentencia por sus hijos
-            if len(stmt_node.children) >= 3:
-                # Buscar patrones específicos
-                if (len(stmt_node.children) >= 4 and 
-                    hasattr(stmt_node.children[1], 'token') and stmt_node.children[1].token and 
-                    stmt_node.children[1].token.lexema == '='):
-                    # Sentencia de asignación: identificador = expresion ;
-                    self.generate_assignment_from_children(stmt_node.children)
-                    return  # IMPORTANTE: return aquí para evitar procesamiento adicional
-                elif (len(stmt_node.children) == 6):
-                    # Sentencia compleja con 6 hijos - buscar patrón de asignación
-                    # Buscar patrón: DefLocal DefLocal identificador = expresion ;
-                    if (len(stmt_node.children) >= 6 and
-                        hasattr(stmt_node.children[2], 'token') and stmt_node.children[2].token and
-                        hasattr(stmt_node.children[3], 'token') and stmt_node.children[3].token and
-                        stmt_node.children[3].token.lexema == '='):
-                        # CORRECCIÓN: Procesar DefLocal ANTES de la asignación para mantener orden secuencial
-                        self.generate_local_definition(stmt_node.children[0])
-                        self.generate_local_definition(stmt_node.children[1])
-                        # children[2] = identificador, children[3] = '=', children[4] = expresion, children[5] = ';'
-                        assignment_children = [stmt_node.children[2], stmt_node.children[3], stmt_node.children[4], stmt_node.children[5]]
-                        self.generate_assignment_from_children(assignment_children)
-                        return
-                elif (hasattr(stmt_node.children[0], 'token') and stmt_node.children[0].token and 
-                      stmt_node.children[0].token.lexema == 'return'):
-                    # Sentencia return
-                    self.generate_return_from_children(stmt_node.children)
-                    return
-            
-            # Procesar hijos para otros casos (incluyendo sentencias anidadas)
-            for child in stmt_node.children:
-                if hasattr(child, 'name') and child.name == 'Sentencia':
-                    # Recursivamente procesar sentencias anidadas
-                    self.generate_statement(child)
-                elif hasattr(child, 'name') and child.name == 'DefLocal':
-                    # Procesar DefLocal que puede contener más sentencias
-                    self.generate_local_definition(child)
-                elif hasattr(child, 'name') and child.name not in ['identificador', ';', '=', 'return', 'DefVar', 'ListaVar', 'tipo']:
-                    self.generate_statement(child)
+                self.add_instruction("movsd", "xmm0", operand)
+                self.add_instruction("movsd", target, "xmm0")
+        elif is_register(target):
+            self.load_int(source, target)
+        elif isinstance(source, Const) and fits_imm32(source.value):
+            self.add_instruction("mov", target, source.value)
+        elif is_register(operand) and not isinstance(source, Const):
+            self.add_instruction("mov", target, operand)
         else:
-            # Visitar hijos para otros tipos de nodos
-            for child in stmt_node.children:
-                if hasattr(child, 'name'):
-                    self.generate_statement(child)
-    
-    def generate_assignment_from_children(self, children):
-        # children[0] = identificador, children[1] = '=', children[2] = expresion, children[3] = ';'
-        var_name = children[0].token.lexema
-        expr_node = children[2]
-        
-        # Verificar si es una asignación directa de valor constante
-        if (expr_node.name == 'Expresion' and len(expr_node.children) == 1 and
-            expr_node.children[0].name == 'Termino' and len(expr_node.children[0].children) == 1 and
-            hasattr(expr_node.children[0].children[0], 'token') and 
-            expr_node.children[0].children[0].token and
-            expr_node.children[0].children[0].token.tipo == 'entero'):
-            
-            # Asignación directa de entero constante
-            value = expr_node.children[0].children[0].token.lexema
-            
-            # Almacenar directamente en la variable
-            if var_name in self.local_variables:
-                offset = self.local_variables[var_name]
-                self.add_instruction(f"mov dword [rbp-{offset}], {value}")
+            self.load_int(source, "eax")
+            self.add_instruction("mov", target, "eax")
+
+    def generate_int_arithmetic(self, instr):
+        left, right = instr.args
+        if instr.op in COMMUTATIVE_OPS and isinstance(left, Const):
+            left, right = right, left
+        if instr.op == '*' and isinstance(right, Const) and self.opt_level > 0:
+            self.generate_multiplication_by_constant(instr.dest, left, right.value)
+            return
+        register = self.target(instr.dest, "eax")
+        if self.operand(right) == register and self.operand(left) != register:
+            if instr.op in COMMUTATIVE_OPS:
+                left, right = right, left
             else:
-                self.add_instruction(f"mov dword [rel {var_name}], {value}")
+                register = "eax"
+        self.load_int(left, register)
+        source = self.int_source(right)
+        if instr.op == '*' and isinstance(right, Const) and source != "r11d":
+            self.add_instruction("imul", register, register, source)
         else:
-            # Generar código para la expresión compleja
-            self.generate_expression(expr_node)
-            
-            # Almacenar resultado en la variable
-            if var_name in self.local_variables:
-                offset = self.local_variables[var_name]
-                self.add_instruction(f"mov dword [rbp-{offset}], eax")
+            self.add_instruction(INT_INSTRUCTIONS[instr.op], register, source)
+        self.finish(instr.dest, register)
+
+    def generate_multiplication_by_constant(self, dest, left, value):
+        # Potencias de dos con shl y factores 3, 5 y 9 con lea
+        register = self.target(dest, "eax")
+        shape = multiplier_shape(abs(value)) if value != 0 else None
+        if value == 0:
+            self.add_instruction("xor", register, register)
+        elif shape is None:
+            self.load_int(left, register)
+            source = self.int_source(Const(value))
+            if source == "r11d":
+                self.add_instruction("imul", register, "r11d")
             else:
-                self.add_instruction(f"mov [rel {var_name}], rax")
-    
-    def generate_return_from_children(self, children):
-        # children[0] = 'return', children[1] = ValorRegresa, children[2] = ';'
-        if len(children) > 1:
-            self.generate_expression(children[1])
-        
-        # Marcar que la función tiene return
-        self.function_has_return = True
-        
-        # Calcular espacio del stack (mismo cálculo que en generate_function)
-        local_var_count = len(self.local_variables)
-        stack_space = max(32, local_var_count * 8 + 32)
-        
-        # Epílogo y retorno
-        self.add_instruction(f"add rsp, {stack_space}")
-        self.add_instruction("pop rbp")
-        self.add_instruction("ret")
-    
-    def generate_assignment(self, assign_node):
-        # Extraer variable y expresión
-        var_name = self.extract_variable_name(assign_node)
-        expr_node = self.find_expression_node(assign_node)
-        
-        if expr_node:
-            # Generar código para la expresión (resultado en rax)
-            self.generate_expression(expr_node)
-            
-            # Almacenar resultado en la variable (usando memoria relativa)
-            self.add_instruction(f"mov [rel {var_name}], rax")
-    
-    def generate_expression(self, expr_node):
-        if expr_node.name == 'Expresion':
-            # Si es una expresión aritmética con hijos
-            if len(expr_node.children) == 3:
-                self.generate_arithmetic_expression(expr_node)
-            elif len(expr_node.children) == 1:
-                self.generate_expression(expr_node.children[0])
-        elif expr_node.name == 'Termino':
-            if len(expr_node.children) == 1:
-                self.generate_expression(expr_node.children[0])
-        elif expr_node.name == 'LlamadaFunc':
-            self.generate_function_call(expr_node)
-        elif expr_node.token and expr_node.token.tipo == 'identificador':
-            # Cargar variable en rax (local o global)
-            var_name = expr_node.token.lexema
-            if var_name in self.local_variables:
-                # Variable local - usar offset del stack
-                offset = self.local_variables[var_name]
-                self.add_instruction(f"mov rax, [rbp-{offset}]")
+                self.add_instruction("imul", register, register, source)
+        else:
+            factor, shift = shape
+            if factor > 1:
+                source = self.operand(left)
+                if not is_register(source):
+                    source = self.load_int(left, register)
+                # La dirección usa los registros completos; el resultado se trunca a 32 bits
+                base = full_register(source)
+                self.add_instruction("lea", register, f"[{base}+{base}*{factor - 1}]")
             else:
-                # Variable global - verificar si existe en symbol_table
-                if self.symbol_table and self.symbol_table.lookup(var_name, mark_used=False):
-                    self.add_instruction(f"mov rax, [rel {var_name}]")
-                else:
-                    # Variable no encontrada - usar valor por defecto o error
-                    self.add_comment(f"WARNING: Variable '{var_name}' not found - using 0")
-                    self.add_instruction("mov rax, 0")
-        elif expr_node.token and expr_node.token.tipo == 'entero':
-            # Cargar constante en rax
-            value = expr_node.token.lexema
-            self.add_instruction(f"mov rax, {value}")
+                self.load_int(left, register)
+            if shift:
+                self.add_instruction("shl", register, shift)
+            if value < 0:
+                self.add_instruction("neg", register)
+        self.finish(dest, register)
+
+    def generate_division_by_constant(self, dest, left, divisor):
+        abs_divisor = abs(divisor)
+        if abs_divisor & (abs_divisor - 1) == 0:
+            # Potencia de dos: sumar divisor-1 a los negativos antes del sar
+            # para truncar hacia cero
+            register = self.target(dest, "eax")
+            self.load_int(left, register)
+            shift = abs_divisor.bit_length() - 1
+            if shift:
+                self.add_instruction("mov", "r11d", register)
+                if shift > 1:
+                    self.add_instruction("sar", "r11d", "31")
+                self.add_instruction("shr", "r11d", 32 - shift)
+                self.add_instruction("add", register, "r11d")
+                self.add_instruction("sar", register, shift)
+            if divisor < 0:
+                self.add_instruction("neg", register)
+            self.finish(dest, register)
+            return
+
+        # Multiplicar por el recíproco: la parte alta del producto queda en edx
+        magic, shift = signed_magic(divisor, 32)
+        dividend = self.operand(left)
+        if isinstance(left, Const) or dividend in ("eax", "edx"):
+            dividend = self.load_int(left, "r11d")
+        self.add_instruction("mov", "eax", magic)
+        self.add_instruction("imul", dividend)
+        if divisor > 0 and magic < 0:
+            self.add_instruction("add", "edx", dividend)
+        elif divisor < 0 and magic > 0:
+            self.add_instruction("sub", "edx", dividend)
+        if shift:
+            self.add_instruction("sar", "edx", shift)
+        # Sumar 1 a los cocientes negativos (redondeo hacia cero)
+        self.add_instruction("mov", "eax", "edx")
+        self.add_instruction("shr", "eax", "31")
+        self.add_instruction("add", "edx", "eax")
+        self.finish(dest, "edx")
+
+    def generate_int_division(self, instr):
+        left, right = instr.args
+        if isinstance(right, Const) and right.value != 0 and self.opt_level > 0:
+            self.generate_division_by_constant(instr.dest, left, right.value)
+            return
+        self.load_int(left, "eax")
+        self.add_instruction("cdq")
+        if isinstance(right, Const):
+            self.add_instruction("mov", "r11d", right.value)
+            divisor = "r11d"
         else:
-            # Para otros tipos de expresiones, visitar hijos
-            for child in expr_node.children:
-                if hasattr(child, 'name'):
-                    self.generate_expression(child)
-    
-    def generate_arithmetic_expression(self, expr_node):
-        if len(expr_node.children) >= 3:
-            # Expresión binaria (operando1 operador operando2)
-            left_operand = expr_node.children[0]
-            operator = expr_node.children[1]
-            right_operand = expr_node.children[2]
-            
-            # Generar código para operando izquierdo (resultado en rax)
-            self.generate_expression(left_operand)
-            self.add_instruction("push rax")  # Guardar resultado
-            
-            # Generar código para operando derecho (resultado en rax)
-            self.generate_expression(right_operand)
-            self.add_instruction("mov rbx, rax")  # Mover a rbx
-            self.add_instruction("pop rax")       # Recuperar operando izquierdo
-            
-            # Realizar operación
-            op_token = operator.token.lexema if operator.token else str(operator.children[0])
-            if op_token == '+':
-                self.add_instruction("add rax, rbx")
-            elif op_token == '-':
-                self.add_instruction("sub rax, rbx")
-            elif op_token == '*':
-                self.add_instruction("imul rax, rbx")
-            elif op_token == '/':
-                self.add_instruction("cqo")        # Extender rax a rdx:rax
-                self.add_instruction("idiv rbx")
-    
-    def generate_return(self, return_node):
-        # Buscar expresión de retorno
-        expr_node = self.find_expression_node(return_node)
-        if expr_node:
-            self.generate_expression(expr_node)
+            divisor = self.operand(right)
+        self.add_instruction("idiv", divisor)
+        self.finish(instr.dest, "eax")
+
+    def generate_float_arithmetic(self, instr):
+        left, right = instr.args
+        register = self.target(instr.dest, "xmm0")
+        if self.operand(right) == register and self.operand(left) != register:
+            if instr.op in COMMUTATIVE_OPS:
+                left, right = right, left
+            else:
+                register = "xmm0"
+        self.load_float(left, register)
+        self.add_instruction(FLOAT_INSTRUCTIONS[instr.op], register, self.operand(right))
+        self.finish(instr.dest, register)
+
+    def set_flag_result(self, condition, dest):
+        # Materializar una condición de los flags como 0/1 en dest
+        register = self.target(dest, "eax")
+        if isinstance(condition, tuple):
+            condition, parity, combine = condition
+            self.add_instruction(f"set{parity}", "r11b")
+            self.add_instruction(f"set{condition}", "al")
+            self.add_instruction(combine, "al", "r11b")
+        else:
+            self.add_instruction(f"set{condition}", "al")
+        self.add_instruction("movzx", register, "al")
+        self.finish(dest, register)
+
+    def emit_compare(self, instr):
+        # Deja la comparación en los flags y retorna el sufijo de la condición
+        # (o la terna de FLOAT_EQUALITY)
+        left, right = instr.args
+        op = instr.op
+        if instr.type_id == T_FLOAT:
+            if op in ('<', '<='):
+                left, right, op = right, left, SWAPPED_COMPARISONS[op]
+            register = self.float_register(left)
+            self.add_instruction("ucomisd", register, self.operand(right))
+            return FLOAT_EQUALITY.get(op) or FLOAT_CONDITIONS[op]
+        if isinstance(left, Const) and not isinstance(right, Const):
+            # El literal va a la derecha: 'cmp x, imm'
+            left, right, op = right, left, SWAPPED_COMPARISONS[op]
+        operand = self.operand(left)
+        if isinstance(right, Const) and right.value == 0 and is_register(operand):
+            self.add_instruction("test", operand, operand)
+            return INT_CONDITIONS[op]
+        if isinstance(left, Const) or (is_memory(operand) and is_memory(self.operand(right))):
+            operand = self.load_int(left, "eax")
+        source = self.int_source(right)
+        self.add_instruction("cmp", operand, source)
+        return INT_CONDITIONS[op]
+
+    def generate_comparison(self, instr):
+        self.set_flag_result(self.emit_compare(instr), instr.dest)
+
+    def test_value(self, value, byte_register, scratch):
+        # Deja en byte_register 1 si el valor entero es distinto de cero
+        register = self.operand(value)
+        if isinstance(value, Const) or is_memory(register):
+            register = self.load_int(value, scratch)
+        self.add_instruction("test", register, register)
+        self.add_instruction("setne", byte_register)
+
+    def generate_logical(self, instr):
+        # '&&' / '||' sobre valores de verdad ya enteros (sin cortocircuito)
+        left, right = instr.args
+        self.test_value(left, "al", "eax")
+        self.test_value(right, "r11b", "r11d")
+        self.add_instruction('and' if instr.op == '&&' else 'or', "al", "r11b")
+        register = self.target(instr.dest, "eax")
+        self.add_instruction("movzx", register, "al")
+        self.finish(instr.dest, register)
+
+    def generate_negation(self, instr):
+        source = instr.args[0]
+        if instr.type_id == T_FLOAT:
+            # Invertir el bit de signo del double
+            operand = self.operand(source)
+            self.add_instruction('movq' if operand.startswith('xmm') else 'mov', "rax", operand)
+            self.add_instruction("btc", "rax", "63")
+            target = self.operand(instr.dest)
+            self.add_instruction('movq' if target.startswith('xmm') else 'mov', target, "rax")
+            return
+        register = self.target(instr.dest, "eax")
+        self.load_int(source, register)
+        self.add_instruction("neg", register)
+        self.finish(instr.dest, register)
+
+    def generate_not(self, instr):
+        source = instr.args[0]
+        if instr.type_id == T_FLOAT:
+            register = self.float_register(source)
+            self.add_instruction("xorpd", "xmm1", "xmm1")
+            self.add_instruction("ucomisd", register, "xmm1")
+            # '!x' es 'x == 0.0': falsa si x es NaN
+            self.set_flag_result(FLOAT_EQUALITY['=='], instr.dest)
+            return
+        operand = self.operand(source)
+        if isinstance(source, Const):
+            operand = self.load_int(source, "eax")
+        if is_memory(operand):
+            self.add_instruction("cmp", operand, "0")
         else:
-            self.add_instruction("mov rax, 0")
-        
-        # Epílogo y retorno
-        self.add_instruction("add rsp, 32")
-        self.add_instruction("pop rbp")
-        self.add_instruction("ret")
-    
-    def generate_function_call(self, call_node):
-        func_name = self.extract_function_name(call_node)
-        
-        # Buscar argumentos de la función
-        arguments = self.extract_function_arguments(call_node)
-        
-        if arguments:
-            # Generar código para argumentos y pasarlos según convención de Linux x64
-            # Linux x64 calling convention: RDI, RSI, RDX, RCX, R8, R9, luego stack
-            arg_registers = ['rdi', 'rsi', 'rdx', 'rcx', 'r8', 'r9']
-            
-            # Evaluar argumentos y moverlos directamente a registros
-            for i, arg in enumerate(arguments):
-                if i < len(arg_registers):
-                    # Generar expresión y mover a registro correspondiente
-                    self.generate_expression(arg)
-                    self.add_instruction(f"mov {arg_registers[i]}, rax")
-                else:
-                    # Para más de 6 argumentos, usar la pila
-                    self.generate_expression(arg)
-                    self.add_instruction("push rax")
-        
-        # Llamar a la función
-        self.add_instruction(f"call {func_name}")
-        
+            self.add_instruction("test", operand, operand)
+        self.set_flag_result('e', instr.dest)
+
+    def generate_call(self, instr):
+        locations = self.classify_arguments(instr.arg_types)
+
+        # Argumentos del stack: se apilan en orden inverso; con una cantidad
+        # impar se agrega relleno para que rsp quede alineado a 16 en el call
+        stack_args = [(arg, loc) for arg, loc in zip(instr.args, locations) if loc.startswith('stack')]
+        padding = 8 * (len(stack_args) % 2)
+        if padding:
+            self.add_instruction("sub", "rsp", padding)
+        for arg, _ in reversed(stack_args):
+            operand = self.operand(arg)
+            if operand.startswith('xmm'):
+                self.add_instruction("movq", "rax", operand)
+                operand = "rax"
+            elif arg.type_id == T_INT and not isinstance(arg, Const):
+                # push siempre apila 8 bytes: un int va por su registro
+                # completo (quien lo recibe lee solo la mitad baja)
+                if is_memory(operand):
+                    operand = self.load_int(arg, "eax")
+                operand = full_register(operand)
+            self.add_instruction("push", self.sized(operand))
+
+        # Argumentos en registros: movimiento paralelo (un registro de
+        # argumento puede contener el valor de otro argumento)
+        self.parallel_move(self.argument_moves(instr, locations))
+
+        self.add_instruction("call", instr.func)
+
         # Limpiar pila si hay argumentos adicionales
-        if arguments and len(arguments) > 6:
-            extra_args = len(arguments) - 6
-            self.add_instruction(f"add rsp, {extra_args * 8}")
-        
-        # El resultado estará en rax
-    
-    def extract_function_arguments(self, call_node):
-        # Extraer argumentos de llamada a función
-        arguments = []
-        for child in call_node.children:
-            if child.name == 'Argumentos':
-                arguments.extend(self.extract_arguments_from_node(child))
-        return arguments
-    
-    def extract_arguments_from_node(self, args_node):
-        # Extraer expresiones de argumentos
-        arguments = []
-        for child in args_node.children:
-            if child.name == 'Expresion':
-                arguments.append(child)
-            elif child.name == 'ListaArgumentos':
-                arguments.extend(self.extract_list_arguments(child))
-        return arguments
-    
-    def extract_list_arguments(self, list_node):
-        """Extraer argumentos de ListaArgumentos recursivamente"""
-        arguments = []
-        for child in list_node.children:
-            if child.name == 'Expresion':
-                arguments.append(child)
-            elif child.name == 'ListaArgumentos':
-                arguments.extend(self.extract_list_arguments(child))
-        return arguments
-    
-    def generate_if(self, if_node):
-        # Etiquetas para el salto
-        else_label = self.generate_label()
-        end_label = self.generate_label()
-        
-        # Generar condición
-        condition_node = self.find_condition_node(if_node)
-        if condition_node:
-            self.generate_condition(condition_node)
-            self.add_instruction(f"test %rax, %rax")
-            self.add_instruction(f"jz {else_label}")
-        
-        # Generar bloque then
-        then_block = self.find_then_block(if_node)
-        if then_block:
-            self.generate_block(then_block)
-        
-        self.add_instruction(f"jmp {end_label}")
-        
-        # Generar bloque else (si existe)
-        self.add_label(else_label)
-        else_block = self.find_else_block(if_node)
-        if else_block:
-            self.generate_block(else_block)
-        
-        self.add_label(end_label)
-    
-    def generate_while(self, while_node):
-        start_label = self.generate_label()
-        end_label = self.generate_label()
-        
-        self.add_label(start_label)
-        
-        # Generar condición
-        condition_node = self.find_condition_node(while_node)
-        if condition_node:
-            self.generate_condition(condition_node)
-            self.add_instruction(f"test %rax, %rax")
-            self.add_instruction(f"jz {end_label}")
-        
-        # Generar cuerpo del while
-        body_block = self.find_while_body(while_node)
-        if body_block:
-            self.generate_block(body_block)
-        
-        self.add_instruction(f"jmp {start_label}")
-        self.add_label(end_label)
-    
-    def generate_condition(self, condition_node):
-        # Por simplicidad, generar como expresión aritmética
-        # En una implementación más completa, manejar operadores relacionales
-        self.generate_expression(condition_node)
-    
-    # Métodos auxiliares para extraer información del AST
-    def extract_function_name(self, func_node):
-        # Buscar el nombre de la función en los hijos
-        for child in func_node.children:
-            if hasattr(child, 'token') and child.token and child.token.tipo == 'identificador':
-                return child.token.lexema
-            elif hasattr(child, 'name') and child.name == 'identificador':
-                return child.token.lexema if hasattr(child, 'token') and child.token else "main"
-        return "unknown_function"
-    
-    def extract_variable_name(self, var_node):
-        # Buscar el nombre de la variable
-        for child in var_node.children:
-            if child.name == 'identificador' or (child.token and child.token.tipo == 'identificador'):
-                return child.token.lexema if child.token else child.name
-        return "unknown_var"
-    
-    def find_expression_node(self, parent_node):
-        # Buscar nodo de expresión
-        for child in parent_node.children:
-            if hasattr(child, 'name') and ('expresion' in child.name.lower() or child.name == 'Expresion' or child.name == 'ValorRegresa'):
-                return child
-        return None
-    
-    def find_id_or_valor_node(self, parent_node):
-        # Buscar nodo id o valor
-        for child in parent_node.children:
-            if hasattr(child, 'name'):
-                if (child.name.lower() in ['id', 'valor', 'num'] or 
-                    'id' in child.name.lower() or 
-                    'valor' in child.name.lower() or
-                    'num' in child.name.lower()):
-                    return child
-        return None
-    
-    def get_node_value(self, node):
-        # Obtener valor del nodo (token o hoja)
-        if hasattr(node, 'token') and node.token:
-            return str(node.token)
-        elif hasattr(node, 'value'):
-            if hasattr(node.value, 'value'):
-                return str(node.value.value)
+        if stack_args:
+            self.add_instruction("add", "rsp", len(stack_args) * 8 + padding)
+
+        # El resultado está en rax (o en xmm0 si la función retorna float)
+        if instr.dest is not None:
+            self.finish(instr.dest, "xmm0" if instr.dest.type_id == T_FLOAT else "eax")
+
+    def argument_moves(self, instr, locations):
+        # (registro del argumento con el ancho de su tipo, operando)
+        return [(value_register(loc, type_id), self.operand(arg))
+                for arg, loc, type_id in zip(instr.args, locations, instr.arg_types)
+                if not loc.startswith('stack')]
+
+    def generate_return(self, instr):
+        if instr.args:
+            value = instr.args[0]
+            if value.type_id == T_FLOAT:
+                self.load_float(value, "xmm0")
             else:
-                return str(node.value)
-        elif hasattr(node, 'children') and len(node.children) > 0:
-            # Si es un nodo padre, buscar en sus hijos
-            for child in node.children:
-                child_value = self.get_node_value(child)
-                if child_value and child_value != str(child):
-                    return child_value
-        return str(node)
-    
-    def find_condition_node(self, parent_node):
-        # Buscar nodo de condición
-        for child in parent_node.children:
-            if 'condicion' in child.name.lower() or 'expresion' in child.name.lower():
-                return child
-        return None
-    
-    def find_then_block(self, if_node):
-        # Buscar bloque then
-        for child in if_node.children:
-            if child.name == 'bloque' or 'sentencia' in child.name:
-                return child
-        return None
-    
-    def find_else_block(self, if_node):
-        # Buscar bloque else (implementación simplificada)
-        blocks = [child for child in if_node.children if child.name == 'bloque']
-        return blocks[1] if len(blocks) > 1 else None
-    
-    def find_while_body(self, while_node):
-        # Buscar cuerpo del while
-        for child in while_node.children:
-            if child.name == 'bloque':
-                return child
-        return None
-    
-    def generate_print_functions(self):
-        self.code.append("")
-        self.add_label("print_number")
-        self.add_instruction("push rbp")
-        self.add_instruction("mov rbp, rsp")
-        self.add_instruction("sub rsp, 32    ; shadow space")
-        self.add_instruction("push rbx")
-        self.add_instruction("push rcx")
-        self.add_instruction("push rdx")
-        
-        # Convertir número a string
-        self.add_instruction("mov rax, rdi")
-        self.add_instruction("mov rbx, 10")
-        self.add_instruction("mov rcx, buffer")
-        self.add_instruction("add rcx, 31     ; apuntar al final del buffer")
-        self.add_instruction("mov byte [rcx], 0   ; null terminator")
-        self.add_instruction("dec rcx")
-        
-        # Manejar caso especial: 0
-        self.add_instruction("test rax, rax")
-        self.add_instruction("jnz convert_loop")
-        self.add_instruction("mov byte [rcx], '0'")
-        self.add_instruction("jmp print_digits")
-        
-        self.add_label("convert_loop")
-        self.add_instruction("test rax, rax")
-        self.add_instruction("jz print_digits")
-        self.add_instruction("xor rdx, rdx")
-        self.add_instruction("div rbx")
-        self.add_instruction("add dl, '0'")
-        self.add_instruction("mov [rcx], dl")
-        self.add_instruction("dec rcx")
-        self.add_instruction("jmp convert_loop")
-        
-        self.add_label("print_digits")
-        self.add_instruction("inc rcx")
-        
-        # Calcular longitud
-        self.add_instruction("mov rdx, buffer")
-        self.add_instruction("add rdx, 31")
-        self.add_instruction("sub rdx, rcx")
-        
-        # Imprimir usando syscall write
-        self.add_instruction("push rcx        ; guardar buffer")
-        self.add_instruction("push rdx        ; guardar longitud")
-        self.add_instruction("mov rax, 1      ; sys_write")
-        self.add_instruction("mov rdi, 1      ; stdout")
-        self.add_instruction("pop rdx         ; longitud")
-        self.add_instruction("pop rsi         ; buffer")
-        self.add_instruction("syscall")
-        
-        # Restaurar registros
-        self.add_instruction("pop rdx")
-        self.add_instruction("pop rcx")
-        self.add_instruction("pop rbx")
-        self.add_instruction("add rsp, 32")
-        self.add_instruction("pop rbp")
-        self.add_instruction("ret")
\ No newline at end of file
+                self.load_int(value, "eax")
+
+        # Sin marco basta 'ret'; si no, el epílogo compartido (que sigue al último bloque)
+        if self.frame.empty:
+            self.add_instruction("ret")
+        elif self.next_block is not None:
+            self.add_instruction("jmp", self.return_label)
+
+    def generate_epilogue(self):
+        frame = self.frame
+        if frame.size:
+            self.add_instruction("add", "rsp", frame.size)
+        for register in reversed(frame.callee_saved):
+            self.add_instruction("pop", register)
+        if frame.uses_rbp:
+            self.add_instruction("pop", "rbp")
+
+    def is_tail_call(self, block):
+        call = self.current_function.tail_call(block)
+        if self.opt_level == 0 or call is None:
+            return False
+        # Con argumentos en el stack el área de quien nos llamó no alcanza
+        return not any(loc.startswith('stack') for loc in self.classify_arguments(call.arg_types))
+
+    def generate_tail_call(self, instr):
+        locations = self.classify_arguments(instr.arg_types)
+        self.parallel_move(self.argument_moves(instr, locations))
+        self.generate_epilogue()
+        self.add_instruction("jmp", instr.func)
+
+    def jump(self, block):
+        if block is not self.next_block:
+            self.add_instruction("jmp", self.block_labels[block])
+
+    def conditional_jump(self, condition, true_block, false_block):
+        if isinstance(condition, tuple):
+            # Igualdad de reales: sin orden (NaN) '==' es falsa y '!=' verdadera
+            condition, _, combine = condition
+            unordered = false_block if combine == 'and' else true_block
+            self.add_instruction("jp", self.block_labels[unordered])
+        # Un solo jcc si alguno de los destinos es el bloque siguiente
+        if true_block is self.next_block:
+            self.add_instruction(INVERSE_JUMPS['j' + condition], self.block_labels[false_block])
+        else:
+            self.add_instruction(f"j{condition}", self.block_labels[true_block])
+            self.jump(false_block)
+
+    def fuses_with_branch(self, instrs, use_counts):
+        if len(instrs) < 2 or instrs[-1].op != 'br':
+            return False
+        compare, branch = instrs[-2], instrs[-1]
+        return (compare.op in COMPARISON_OPS and isinstance(compare.dest, Temp)
+                and branch.args[0] is compare.dest and use_counts.get(compare.dest) == 1)
+
+    def generate_compare_branch(self, compare, branch):
+        condition = self.emit_compare(compare)
+        self.conditional_jump(condition, *branch.targets)
+
+    def generate_branch(self, instr):
+        cond = instr.args[0]
+        true_block, false_block = instr.targets
+        operand = self.operand(cond)
+        if isinstance(cond, Const):
+            self.jump(true_block if cond.value != 0 else false_block)
+            return
+        if is_memory(operand):
+            self.add_instruction("cmp", operand, "0")
+        else:
+            self.add_instruction("test", operand, operand)
+        self.conditional_jump('nz', true_block, false_block)
@@ -0,0 +1,191 @@
+# Marco de análisis de flujo de datos sobre funciones en IR (ir.py).
+# Los conjuntos de valores se representan como bitsets en enteros de
+# Python: el valor i corresponde al bit 1 << i, la unión es '|', la
+# diferencia es '& ~' y no hay que reservar tamaño.
+#
+# El grafo de flujo tiene un punto por bloque básico; dentro de un bloque
+# la vivacidad de cada instrucción se obtiene recorriéndolo hacia atrás
+# desde la salida del bloque.
+
+from collections import deque
+
+
+def bits(bitset):
+    """Itera los índices de los bits encendidos de un bitset"""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+class FlowGraph:
+    """Grafo de flujo: cada punto tiene sucesores y bitsets de uso y definición"""
+
+    def __init__(self):
+        self.succ = []
+        self.use = []
+        self.defs = []
+
+    def add_point(self, use=0, defs=0):
+        self.succ.append([])
+        self.use.append(use)
+        self.defs.append(defs)
+        return len(self.succ) - 1
+
+    def add_edge(self, source, target):
+        if target not in self.succ[source]:
+            self.succ[source].append(target)
+
+    def predecessors(self):
+        pred = [[] for _ in self.succ]
+        for source, targets in enumerate(self.succ):
+            for target in targets:
+                pred[target].append(source)
+        return pred
+
+    def __len__(self):
+        return len(self.succ)
+
+
+def solve(graph, gen, kill, backward=True):
+    """Resuelve un problema de flujo de datos con unión como operador de confluencia.
+
+    Para cada punto: entrada = gen | (salida & ~kill) en el sentido del
+    análisis. Retorna (in, out) como listas de bitsets indexadas por punto."""
+    n = len(graph)
+    if backward:
+        edges_out = graph.succ
+        edges_in = graph.predecessors()
+        order = range(n - 1, -1, -1)
+    else:
+        edges_out = graph.predecessors()
+        edges_in = graph.succ
+        order = range(n)
+
+    before = [0] * n   # Valor del lado por el que llega la información
+    after = [0] * n    # Valor tras aplicar la función de transferencia
+    worklist = deque(order)
+    pending = [True] * n
+    while worklist:
+        point = worklist.popleft()
+        pending[point] = False
+        incoming = 0
+        for other in edges_out[point]:
+            incoming |= after[other]
+        before[point] = incoming
+        result = gen[point] | (incoming & ~kill[point])
+        if result != after[point]:
+            after[point] = result
+            for other in edges_in[point]:
+                if not pending[other]:
+                    pending[other] = True
+                    worklist.append(other)
+
+    if backward:
+        return after, before   # in = tras transferencia, out = unión de sucesores
+    return before, after
+
+
+class Liveness:
+    """Valores (temporales y variables) vivos por bloque e instrucción de una función"""
+
+    def __init__(self, function):
+        self.function = function
+        self.values = list(function.params) + list(function.locals)
+        self.index = {value: i for i, value in enumerate(self.values)}
+        for instr in function.instructions():
+            for value in instr.uses() + [instr.defined()]:
+                if value is not None and value not in self.index:
+                    self.index[value] = len(self.values)
+                    self.values.append(value)
+
+        graph = FlowGraph()
+        self.point = {}
+        gen, kill = [], []
+        for block in function.blocks:
+            self.point[block] = graph.add_point()
+            block_gen = block_kill = 0
+            for instr in block.instrs:
+                block_gen |= self.bitset(instr.uses()) & ~block_kill
+                dest = instr.defined()
+                if dest is not None:
+                    block_kill |= 1 << self.index[dest]
+            gen.append(block_gen)
+            kill.append(block_kill)
+        for block in function.blocks:
+            for succ in block.successors():
+                graph.add_edge(self.point[block], self.point[succ])
+        self.graph = graph
+        self.live_in, self.live_out = solve(graph, gen, kill, backward=True)
+
+    def bitset(self, values):
+        result = 0
+        for value in values:
+            result |= 1 << self.index[value]
+        return result
+
+    def block_out(self, block):
+        return self.live_out[self.point[block]]
+
+    def block_in(self, block):
+        return self.live_in[self.point[block]]
+
+    def uninitialized_locals(self):
+        """Locales que pueden leerse antes de asignarse (vivas a la entrada)"""
+        live = self.block_in(self.function.entry)
+        return [var for var in self.function.locals if live & (1 << self.index[var])]
+
+    def instruction_live_out(self, block):
+        """Lista con el bitset de valores vivos después de cada instrucción del bloque"""
+        live = self.block_out(block)
+        result = [0] * len(block.instrs)
+        for i in range(len(block.instrs) - 1, -1, -1):
+            result[i] = live
+            instr = block.instrs[i]
+            dest = instr.defined()
+            if dest is not None:
+                live &= ~(1 << self.index[dest])
+            live |= self.bitset(instr.uses())
+        return result
+
+    def interference(self):
+        """Retorna, por valor, el bitset de valores con los que interfiere.
+
+        Dos valores interfieren si uno se define donde el otro sigue vivo; en
+        una copia 'a = b' no se cuenta b, para que ambos puedan compartir
+        lugar. A la entrada se consideran definidos todos los valores vivos
+        (parámetros y los que se leen antes de asignarse)."""
+        conflicts = [0] * len(self.values)
+        entry_live = self.block_in(self.function.entry) | self.bitset(self.function.params)
+        for var in bits(entry_live):
+            conflicts[var] |= entry_live & ~(1 << var)
+        for block in self.function.blocks:
+            for instr, live in zip(block.instrs, self.instruction_live_out(block)):
+                dest = instr.defined()
+                if dest is None:
+                    continue
+                var = self.index[dest]
+                if instr.op == 'copy' and instr.uses():
+                    live &= ~(1 << self.index[instr.args[0]])
+                conflicts[var] |= live & ~(1 << var)
+        # Hacer la relación simétrica
+        for var, others in enumerate(conflicts):
+            for other in bits(others):
+                conflicts[other] |= 1 << var
+        return conflicts
+
+
+def color(conflicts, order=None):
+    """Asigna a cada valor el menor color libre entre sus vecinos (greedy)"""
+    order = range(len(conflicts)) if order is None else order
+    colors = [None] * len(conflicts)
+    for var in order:
+        taken = 0
+        for other in bits(conflicts[var]):
+            if colors[other] is not None:
+                taken |= 1 << colors[other]
+        slot = 0
+        while taken & (1 << slot):
+            slot += 1
+        colors[var] = slot
+    return colors
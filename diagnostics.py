@@ -0,0 +1,155 @@
+# Colector de diagnósticos del compilador.
+# Las fases registran registros estructurados en lugar de imprimir cada
+# error al momento; la salida en consola se hace en bloque y solo cuando se
+# pide, y los consumidores (main.py, la GUI) leen los registros directamente
+# o desde la exportación JSON.
+
+import json
+import sys
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Códigos de diagnóstico
+LEXICAL_ERROR = 'lexical-error'
+SYNTAX_ERROR = 'syntax-error'
+REDEFINITION = 'redefinition'
+UNDECLARED_VARIABLE = 'undeclared-variable'
+NOT_A_VARIABLE = 'not-a-variable'
+UNINITIALIZED_VARIABLE = 'uninitialized-variable'
+INCOMPATIBLE_ASSIGNMENT = 'incompatible-assignment'
+INCOMPATIBLE_RETURN = 'incompatible-return'
+RETURN_OUTSIDE_FUNCTION = 'return-outside-function'
+MISSING_RETURN = 'missing-return'
+UNDECLARED_FUNCTION = 'undeclared-function'
+NOT_A_FUNCTION = 'not-a-function'
+ARGUMENT_COUNT = 'argument-count'
+ARGUMENT_TYPE = 'argument-type'
+INVALID_OPERATION = 'invalid-operation'
+UNUSED_FUNCTION = 'unused-function'
+INTERNAL_ERROR = 'internal-error'
+
+
+class Diagnostic:
+    """Registro de un diagnóstico: severidad, código, mensaje y posición"""
+    __slots__ = ('severity', 'code', 'message', 'line', 'column', 'node_id')
+
+    def __init__(self, severity, code, message, line=None, column=None, node_id=None):
+        self.severity = severity
+        self.code = code
+        self.message = message
+        self.line = line
+        self.column = column
+        self.node_id = node_id
+
+    def to_dict(self):
+        return {
+            'severity': self.severity,
+            'code': self.code,
+            'message': self.message,
+            'line': self.line,
+            'column': self.column,
+            'node_id': self.node_id,
+        }
+
+    def __str__(self):
+        if self.line is not None:
+            return f"{self.message} (línea {self.line})"
+        return self.message
+
+    def __repr__(self):
+        return f"Diagnostic({self.severity}, {self.code}, {self.message!r})"
+
+
+def node_position(node):
+    """Retorna (línea, columna) del primer token dentro del subárbol de un nodo"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        token = getattr(current, 'token', None)
+        if token is not None:
+            return token.linea, token.columna
+        stack.extend(reversed(getattr(current, 'children', ())))
+    return None, None
+
+
+class Diagnostics:
+    """Colecciona diagnósticos de todas las fases del compilador"""
+
+    def __init__(self):
+        self.records = []
+        self.error_count = 0
+        self.warning_count = 0
+
+    def report(self, severity, code, message, node=None, line=None, column=None):
+        """Registra un diagnóstico; la posición se toma del nodo si no se indica"""
+        node_id = None
+        if node is not None:
+            node_id = id(node)
+            if line is None:
+                line, column = node_position(node)
+        record = Diagnostic(severity, code, message, line, column, node_id)
+        self.records.append(record)
+        if severity == ERROR:
+            self.error_count += 1
+        else:
+            self.warning_count += 1
+        return record
+
+    def error(self, code, message, node=None, line=None, column=None):
+        return self.report(ERROR, code, message, node, line, column)
+
+    def warning(self, code, message, node=None, line=None, column=None):
+        return self.report(WARNING, code, message, node, line, column)
+
+    def errors(self):
+        return [r for r in self.records if r.severity == ERROR]
+
+    def warnings(self):
+        return [r for r in self.records if r.severity == WARNING]
+
+    def has_errors(self):
+        return self.error_count > 0
+
+    def extend(self, records):
+        """Agrega registros ya creados (por ejemplo, de otro colector)"""
+        for record in records:
+            self.records.append(record)
+            if record.severity == ERROR:
+                self.error_count += 1
+            else:
+                self.warning_count += 1
+
+    def format_block(self, records, title):
+        """Da formato a una lista numerada de registros bajo un título"""
+        lines = [f"{title} ({len(records)}):"]
+        lines.extend(f"  {i}. {record}" for i, record in enumerate(records, 1))
+        lines.append("")
+        return "\n".join(lines)
+
+    def flush(self, stream=None):
+        """Escribe todos los diagnósticos en una sola operación de salida"""
+        stream = stream or sys.stdout
+        blocks = []
+        errors = self.errors()
+        warnings = self.warnings()
+        if errors:
+            blocks.append(self.format_block(errors, "ERRORES ENCONTRADOS"))
+        if warnings:
+            blocks.append(self.format_block(warnings, "ADVERTENCIAS"))
+        if blocks:
+            stream.write("\n".join(blocks) + "\n")
+
+    def to_json(self):
+        return json.dumps([r.to_dict() for r in self.records], ensure_ascii=False)
+
+    def write_json(self, path):
+        """Exporta todos los registros a un archivo JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+
+    @staticmethod
+    def read_json(path):
+        """Carga registros exportados con write_json"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return [Diagnostic(**entry) for entry in json.load(f)]
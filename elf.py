@@ -0,0 +1,77 @@
+# Ejecutable ELF64 estático para Linux x86-64 a partir del código que
+# ensambla encoder.py, sin ensamblador ni enlazador externos.
+#
+# El archivo tiene dos segmentos cargables y ninguna tabla de secciones:
+# - código (lectura y ejecución): el encabezado, las cabeceras de programa
+#   y .text, desde BASE_ADDRESS;
+# - datos (lectura y escritura): .data a continuación de .text en el
+#   archivo y .bss al final en memoria (el kernel la llena de ceros).
+# Los datos se cargan en la página siguiente al código con el mismo
+# desplazamiento dentro de la página que en el archivo, así no hay relleno.
+
+import os
+import struct
+
+from encoder import Assembler
+
+BASE_ADDRESS = 0x400000
+PAGE_SIZE = 0x1000
+
+ELF_HEADER_SIZE = 64
+PROGRAM_HEADER_SIZE = 56
+HEADERS_SIZE = ELF_HEADER_SIZE + 2 * PROGRAM_HEADER_SIZE
+
+PT_LOAD = 1
+PF_X, PF_W, PF_R = 1, 2, 4
+ET_EXEC = 2
+EM_X86_64 = 62
+
+
+def align(value, alignment):
+    return -(-value // alignment) * alignment
+
+
+def layout(text_size, data_size):
+    """Direcciones de .text, .data y .bss y desplazamiento de .data en el archivo"""
+    text_address = BASE_ADDRESS + HEADERS_SIZE
+    data_offset = align(HEADERS_SIZE + text_size, 16)
+    data_address = align(text_address + text_size, PAGE_SIZE) + data_offset % PAGE_SIZE
+    bss_address = align(data_address + data_size, 16)
+    return {'.text': text_address, '.data': data_address, '.bss': bss_address}, data_offset
+
+
+def program_header(flags, offset, address, file_size, memory_size):
+    return struct.pack('<IIQQQQQQ', PT_LOAD, flags, offset, address, address,
+                       file_size, memory_size, PAGE_SIZE)
+
+
+def executable(text, data, bss_size, entry, bases, data_offset):
+    """Bytes del ejecutable"""
+    header = struct.pack('<4sBBBBB7sHHIQQQIHHHHHH',
+                         b'\x7fELF', 2, 1, 1, 0, 0, bytes(7),  # 64 bits, little endian, System V
+                         ET_EXEC, EM_X86_64, 1, entry, ELF_HEADER_SIZE, 0, 0,
+                         ELF_HEADER_SIZE, PROGRAM_HEADER_SIZE, 2, 64, 0, 0)
+    code_size = HEADERS_SIZE + len(text)
+    data_size = bases['.bss'] + bss_size - bases['.data']
+    headers = (header
+               + program_header(PF_R | PF_X, 0, BASE_ADDRESS, code_size, code_size)
+               + program_header(PF_R | PF_W, data_offset, bases['.data'], len(data), data_size))
+    return headers + text + bytes(data_offset - code_size) + bytes(data)
+
+
+def build_executable(source):
+    """Ensambla el texto NASM de CodeGenerator y retorna el ejecutable"""
+    assembler = Assembler().parse(source)
+    bases, data_offset = layout(assembler.text_size, len(assembler.data))
+    text = assembler.link(bases)
+    return executable(text, assembler.data, assembler.bss_size,
+                      assembler.entry_address(bases), bases, data_offset)
+
+
+def write_executable(source, path):
+    """Escribe el ejecutable en path con permiso de ejecución; retorna su tamaño"""
+    image = build_executable(source)
+    with open(path, 'wb') as f:
+        f.write(image)
+    os.chmod(path, 0o755)
+    return len(image)
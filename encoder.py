@@ -0,0 +1,729 @@
+# Ensamblador x86-64 integrado: codifica a código máquina el subconjunto de
+# NASM que emite CodeGenerator (instrucciones enteras, SSE2 escalar, saltos,
+# etiquetas y las directivas de datos de .data y .bss), sin ensamblador
+# externo. elf.py arma con el resultado un ejecutable estático.
+#
+# Los saltos se resuelven en dos pasadas. La primera mide el código con
+# todos los jmp/jcc en su forma corta (rel8, 2 bytes) y pasa a la forma
+# cercana (rel32, 5 o 6 bytes) los que no alcanzan su destino; como un
+# salto solo puede crecer, se repite hasta que ninguno cambia. La segunda
+# codifica cada instrucción con las direcciones finales.
+#
+# Las elecciones de codificación siguen las de GNU as (imm8 cuando cabe,
+# formas cortas con el acumulador, 'mov r64, imm' con imm32 extendido), así
+# el código coincide byte a byte con el de un ensamblador externo.
+
+import re
+import struct
+
+from assembly import REGISTER_ALIASES, split_comment, split_operands
+
+
+class AssemblerError(Exception):
+    """Instrucción, operando o directiva que el ensamblador no soporta"""
+
+
+# Número de cada registro de 64 bits en ModRM/SIB (el bit 3 va en el REX)
+REGISTER_NUMBERS = {name: i for i, name in enumerate(
+    ('rax', 'rcx', 'rdx', 'rbx', 'rsp', 'rbp', 'rsi', 'rdi',
+     'r8', 'r9', 'r10', 'r11', 'r12', 'r13', 'r14', 'r15'))}
+REGISTER_NUMBERS.update({f"xmm{i}": i for i in range(16)})
+
+# ah..bh ocupan los números 4..7 sin REX; spl..dil necesitan un REX
+HIGH_BYTE_REGISTERS = {'ah': 4, 'ch': 5, 'dh': 6, 'bh': 7}
+REX_BYTE_REGISTERS = ('spl', 'bpl', 'sil', 'dil')
+
+SIZE_PREFIXES = {'byte': 8, 'word': 16, 'dword': 32, 'qword': 64}
+
+# Sufijo de condición -> código de jcc/setcc/cmovcc
+CONDITION_CODES = {
+    'o': 0, 'no': 1, 'b': 2, 'c': 2, 'nae': 2, 'ae': 3, 'nb': 3, 'nc': 3,
+    'e': 4, 'z': 4, 'ne': 5, 'nz': 5, 'be': 6, 'na': 6, 'a': 7, 'nbe': 7,
+    's': 8, 'ns': 9, 'p': 10, 'pe': 10, 'np': 11, 'po': 11,
+    'l': 12, 'nge': 12, 'ge': 13, 'nl': 13, 'le': 14, 'ng': 14, 'g': 15, 'nle': 15,
+}
+
+# Operaciones aritméticas con las mismas formas (campo /n y opcode base n*8)
+ALU_CODES = {'add': 0, 'or': 1, 'adc': 2, 'sbb': 3, 'and': 4, 'sub': 5, 'xor': 6, 'cmp': 7}
+# Grupo F6/F7 con un operando (campo /n)
+UNARY_CODES = {'not': 2, 'neg': 3, 'mul': 4, 'imul': 5, 'div': 6, 'idiv': 7}
+SHIFT_CODES = {'rol': 0, 'ror': 1, 'shl': 4, 'sal': 4, 'shr': 5, 'sar': 7}
+# Instrucciones sin operandos
+FIXED_ENCODINGS = {
+    'ret': b'\xc3', 'syscall': b'\x0f\x05', 'cdq': b'\x99', 'cqo': b'\x48\x99',
+    'cwde': b'\x98', 'cdqe': b'\x48\x98', 'leave': b'\xc9', 'nop': b'\x90',
+}
+# SSE2 escalar: prefijo obligatorio y opcode (tras 0F); destino xmm, fuente xmm/m64
+SSE_ENCODINGS = {
+    'addsd': (0xF2, 0x58), 'mulsd': (0xF2, 0x59), 'subsd': (0xF2, 0x5C),
+    'divsd': (0xF2, 0x5E), 'sqrtsd': (0xF2, 0x51), 'minsd': (0xF2, 0x5D),
+    'maxsd': (0xF2, 0x5F), 'ucomisd': (0x66, 0x2E), 'comisd': (0x66, 0x2F),
+    'xorpd': (0x66, 0x57), 'andpd': (0x66, 0x54), 'orpd': (0x66, 0x56),
+}
+
+JUMP_SIZES = {'short': 2, 'near': 5}   # jmp; un jcc cercano ocupa uno más
+
+
+class Register:
+    __slots__ = ('name', 'number', 'bits', 'xmm')
+
+    def __init__(self, name):
+        self.name = name
+        self.bits = REGISTER_ALIASES[name][1]
+        self.xmm = name.startswith('xmm')
+        if name in HIGH_BYTE_REGISTERS:
+            self.number = HIGH_BYTE_REGISTERS[name]
+        else:
+            self.number = REGISTER_NUMBERS[REGISTER_ALIASES[name][0]]
+
+    @property
+    def needs_rex(self):
+        return self.name in REX_BYTE_REGISTERS
+
+    @property
+    def forbids_rex(self):
+        return self.name in HIGH_BYTE_REGISTERS
+
+
+class Memory:
+    """[base + index*scale + disp], [rel símbolo + disp] o [símbolo + ...]"""
+    __slots__ = ('bits', 'base', 'index', 'scale', 'disp', 'symbol', 'rip')
+
+    def __init__(self, bits=None, base=None, index=None, scale=1, disp=0, symbol=None, rip=False):
+        self.bits = bits
+        self.base = base
+        self.index = index
+        self.scale = scale
+        self.disp = disp
+        self.symbol = symbol
+        self.rip = rip
+
+
+class Immediate:
+    """Entero literal o dirección de un símbolo (más un desplazamiento)"""
+    __slots__ = ('value', 'symbol')
+
+    def __init__(self, value, symbol=None):
+        self.value = value
+        self.symbol = symbol
+
+
+class Fixup:
+    """Campo de 4 bytes que se completa con la dirección de un símbolo"""
+    __slots__ = ('position', 'symbol', 'addend', 'relative')
+
+    def __init__(self, position, symbol, addend, relative):
+        self.position = position    # Desde el inicio de la instrucción
+        self.symbol = symbol
+        self.addend = addend
+        self.relative = relative    # Relativo al final de la instrucción (rip, rel32)
+
+
+def parse_number(text):
+    text = text.strip()
+    if len(text) == 3 and text[0] == text[2] and text[0] in "'\"":
+        return ord(text[1])
+    return int(text, 0)
+
+
+def is_number(text):
+    try:
+        parse_number(text)
+    except ValueError:
+        return False
+    return True
+
+
+def split_terms(text):
+    """'rbp - 8' -> [('+', 'rbp'), ('-', '8')]"""
+    terms = []
+    for sign, term in re.findall(r"([+-]?)\s*([^+-]+)", text.replace(' ', '')):
+        terms.append((sign or '+', term))
+    return terms
+
+
+def parse_operand(text, qualify):
+    """Registro, memoria o inmediato; qualify completa los nombres de etiquetas locales"""
+    text = text.strip()
+    if text in REGISTER_ALIASES:
+        return Register(text)
+    if '[' in text:
+        prefix = text[:text.index('[')].strip()
+        bits = SIZE_PREFIXES.get(prefix)
+        if prefix and bits is None:
+            raise AssemblerError(f"prefijo de tamaño desconocido: {prefix}")
+        address = text[text.index('[') + 1:text.rindex(']')].strip()
+        memory = Memory(bits)
+        if address.startswith('rel '):
+            memory.rip = True
+            address = address[4:]
+        for sign, term in split_terms(address):
+            if '*' in term:
+                left, right = term.split('*')
+                register, scale = (left, right) if left in REGISTER_ALIASES else (right, left)
+                memory.index = Register(register)
+                memory.scale = parse_number(scale)
+            elif term in REGISTER_ALIASES:
+                if memory.base is None:
+                    memory.base = Register(term)
+                else:
+                    memory.index = Register(term)
+            elif is_number(term):
+                memory.disp += parse_number(term) * (-1 if sign == '-' else 1)
+            else:
+                memory.symbol = qualify(term)
+        if memory.rip and (memory.base or memory.index or memory.symbol is None):
+            raise AssemblerError(f"dirección relativa a rip inválida: {text}")
+        return memory
+    if is_number(text):
+        return Immediate(parse_number(text))
+    value, symbol = 0, None
+    for sign, term in split_terms(text):
+        if is_number(term):
+            value += parse_number(term) * (-1 if sign == '-' else 1)
+        else:
+            symbol = qualify(term)
+    return Immediate(value, symbol)
+
+
+def fits(value, bits):
+    """Indica si value cabe como entero con signo de bits bits"""
+    return -(1 << (bits - 1)) <= value < (1 << (bits - 1))
+
+
+def pack_immediate(value, bits):
+    """Inmediato de bits bits; se aceptan también los valores sin signo del ancho"""
+    if not (-(1 << (bits - 1)) <= value < (1 << bits)):
+        raise AssemblerError(f"inmediato fuera de rango para {bits} bits: {value}")
+    return (value & ((1 << bits) - 1)).to_bytes(bits // 8, 'little')
+
+
+def immediate_value(immediate, bits):
+    """Valor de un inmediato sin símbolo, con signo en el ancho de la operación"""
+    value = immediate.value & ((1 << bits) - 1) if bits < 64 else immediate.value
+    return value - (1 << bits) if bits < 64 and value >= 1 << (bits - 1) else value
+
+
+class Encoding:
+    """Bytes de una instrucción con los campos que dependen de símbolos"""
+    __slots__ = ('code', 'fixups')
+
+    def __init__(self, code, fixups=()):
+        self.code = bytes(code)
+        self.fixups = list(fixups)
+
+
+def modrm_bytes(reg, rm):
+    """ModRM (más SIB y desplazamiento) para el campo reg y el operando rm.
+
+    Retorna (bits X y B del REX, bytes, Fixup del desplazamiento o None; su
+    posición es relativa al inicio del ModRM)."""
+    if isinstance(rm, Register):
+        return (rm.number >> 3), bytes([0xC0 | (reg & 7) << 3 | (rm.number & 7)]), None
+    if rm.rip:
+        fixup = Fixup(1, rm.symbol, rm.disp, True)
+        return 0, bytes([(reg & 7) << 3 | 5]) + bytes(4), fixup
+    base, index = rm.base, rm.index
+    if index is not None and index.number == 4:
+        raise AssemblerError("rsp no puede ser índice")
+    rex = ((index.number >> 3) << 1 if index is not None else 0) | (base.number >> 3 if base is not None else 0)
+    scale_bits = {1: 0, 2: 1, 4: 2, 8: 3}[rm.scale]
+    fixup = None
+    if base is None:
+        # Solo desplazamiento de 32 bits (absoluto): SIB sin base
+        sib = scale_bits << 6 | ((index.number & 7) if index is not None else 4) << 3 | 5
+        code = bytes([(reg & 7) << 3 | 4, sib]) + struct.pack('<i', 0 if rm.symbol else rm.disp)
+        if rm.symbol is not None:
+            fixup = Fixup(2, rm.symbol, rm.disp, False)
+        return rex, code, fixup
+    if rm.symbol is not None:
+        mod, disp = 2, bytes(4)
+    elif rm.disp == 0 and base.number & 7 != 5:
+        mod, disp = 0, b''
+    elif fits(rm.disp, 8):
+        mod, disp = 1, struct.pack('<b', rm.disp)
+    else:
+        mod, disp = 2, struct.pack('<i', rm.disp)
+    if index is None and base.number & 7 != 4:
+        code = bytes([mod << 6 | (reg & 7) << 3 | (base.number & 7)])
+    else:
+        sib = scale_bits << 6 | ((index.number & 7) if index is not None else 4) << 3 | (base.number & 7)
+        code = bytes([mod << 6 | (reg & 7) << 3 | 4, sib])
+    if rm.symbol is not None:
+        fixup = Fixup(len(code), rm.symbol, rm.disp, False)
+    return rex, code + disp, fixup
+
+
+def instruction(opcode, reg, rm, bits=32, prefix=None, rex_w=None, immediate=b'', registers=()):
+    """Arma prefijos, REX, opcode, ModRM e inmediato.
+
+    bits es el tamaño de la operación (16 agrega 66, 64 pone REX.W salvo que
+    rex_w diga otra cosa); registers son los operandos registro de 8 bits que
+    deciden si hace falta un REX vacío."""
+    reg_number = reg.number if isinstance(reg, Register) else reg
+    rex_xb, modrm, fixup = modrm_bytes(reg_number, rm)
+    rex = rex_xb | (reg_number >> 3) << 2
+    if rex_w if rex_w is not None else bits == 64:
+        rex |= 8
+    operands = [operand for operand in (reg, rm) + tuple(registers) if isinstance(operand, Register)]
+    if rex or any(operand.needs_rex for operand in operands):
+        if any(operand.forbids_rex for operand in operands):
+            raise AssemblerError("ah/bh/ch/dh no se pueden usar con un registro que requiere REX")
+        rex_bytes = bytes([0x40 | rex])
+    else:
+        rex_bytes = b''
+    legacy = bytes([prefix]) if prefix is not None else (b'\x66' if bits == 16 else b'')
+    head = legacy + rex_bytes + bytes(opcode)
+    fixups = []
+    if fixup is not None:
+        fixup.position += len(head)
+        fixups.append(fixup)
+    return Encoding(head + modrm + immediate, fixups)
+
+
+def operand_bits(operands):
+    """Tamaño de la operación: el de los registros o el prefijo de la memoria"""
+    for operand in operands:
+        if isinstance(operand, Register) and not operand.xmm:
+            return operand.bits
+    for operand in operands:
+        if isinstance(operand, Memory) and operand.bits is not None:
+            return operand.bits
+    raise AssemblerError("no se puede deducir el tamaño del operando")
+
+
+def accumulator(operand):
+    return isinstance(operand, Register) and operand.number == 0 and not operand.xmm
+
+
+def symbol_immediate(encoding, immediate, size=4):
+    """Agrega el Fixup de un inmediato que es la dirección de un símbolo"""
+    if immediate.symbol is not None:
+        encoding.fixups.append(Fixup(len(encoding.code) - size, immediate.symbol,
+                                     immediate.value, False))
+    return encoding
+
+
+def immediate_field(immediate, bits):
+    """Bytes del inmediato (4 de relleno si es un símbolo)"""
+    if immediate.symbol is not None:
+        if bits < 32:
+            raise AssemblerError("la dirección de un símbolo necesita 32 bits")
+        return bytes(4)
+    if bits == 64 and not fits(immediate.value, 32):
+        raise AssemblerError(f"inmediato fuera de rango para 32 bits con signo: {immediate.value}")
+    return pack_immediate(immediate.value, min(bits, 32))
+
+
+def encode_alu(mnemonic, dest, source):
+    code = ALU_CODES[mnemonic]
+    bits = operand_bits((dest, source))
+    byte = bits == 8
+    if isinstance(source, Immediate):
+        value = immediate_value(source, bits) if source.symbol is None else None
+        if byte:
+            if accumulator(dest):
+                return Encoding(bytes([code * 8 + 4]) + pack_immediate(source.value, 8))
+            return instruction([0x80], code, dest, bits, immediate=pack_immediate(source.value, 8))
+        if value is not None and fits(value, 8):
+            return instruction([0x83], code, dest, bits, immediate=pack_immediate(value, 8))
+        if accumulator(dest):
+            rex = b'\x48' if bits == 64 else (b'\x66' if bits == 16 else b'')
+            encoding = Encoding(rex + bytes([code * 8 + 5]) + immediate_field(source, bits))
+        else:
+            encoding = instruction([0x81], code, dest, bits, immediate=immediate_field(source, bits))
+        return symbol_immediate(encoding, source, 2 if bits == 16 else 4)
+    if isinstance(source, Register):
+        return instruction([code * 8 + (0 if byte else 1)], source, dest, bits)
+    return instruction([code * 8 + (2 if byte else 3)], dest, source, bits)
+
+
+def encode_test(dest, source):
+    bits = operand_bits((dest, source))
+    byte = bits == 8
+    if isinstance(source, Immediate):
+        if accumulator(dest):
+            rex = b'\x48' if bits == 64 else (b'\x66' if bits == 16 else b'')
+            return Encoding(rex + bytes([0xA8 if byte else 0xA9]) + immediate_field(source, bits))
+        return instruction([0xF6 if byte else 0xF7], 0, dest, bits,
+                           immediate=immediate_field(source, bits) if not byte
+                           else pack_immediate(source.value, 8))
+    return instruction([0x84 if byte else 0x85], source, dest, bits)
+
+
+def encode_mov(dest, source):
+    if isinstance(dest, Register) and dest.xmm or isinstance(source, Register) and source.xmm:
+        raise AssemblerError("mov con registros xmm: usar movq o movsd")
+    bits = operand_bits((dest, source))
+    byte = bits == 8
+    if isinstance(source, Immediate):
+        if isinstance(dest, Register):
+            if byte:
+                return instruction_plus_register(0xB0, dest, pack_immediate(source.value, 8))
+            if bits == 64:
+                if source.symbol is None and not fits(source.value, 32):
+                    return instruction_plus_register(0xB8, dest, pack_immediate(source.value, 64))
+                encoding = instruction([0xC7], 0, dest, 64, immediate=immediate_field(source, 64))
+                return symbol_immediate(encoding, source)
+            encoding = instruction_plus_register(0xB8, dest, immediate_field(source, bits))
+            return symbol_immediate(encoding, source, 2 if bits == 16 else 4)
+        if byte:
+            return instruction([0xC6], 0, dest, 8, immediate=pack_immediate(source.value, 8))
+        encoding = instruction([0xC7], 0, dest, bits, immediate=immediate_field(source, bits))
+        return symbol_immediate(encoding, source, 2 if bits == 16 else 4)
+    if isinstance(source, Register):
+        return instruction([0x88 if byte else 0x89], source, dest, bits)
+    return instruction([0x8A if byte else 0x8B], dest, source, bits)
+
+
+def instruction_plus_register(opcode, register, immediate):
+    """Opcode con el número del registro sumado (push r, mov r, imm)"""
+    rex = (register.number >> 3) | (8 if register.bits == 64 and opcode == 0xB8 else 0)
+    if register.forbids_rex and rex:
+        raise AssemblerError("ah/bh/ch/dh no se pueden usar con REX")
+    prefix = b'\x66' if register.bits == 16 else b''
+    rex_bytes = bytes([0x40 | rex]) if rex or register.needs_rex else b''
+    return Encoding(prefix + rex_bytes + bytes([opcode + (register.number & 7)]) + immediate)
+
+
+def encode_shift(mnemonic, dest, count):
+    bits = operand_bits((dest,))
+    code = SHIFT_CODES[mnemonic]
+    byte = bits == 8
+    if isinstance(count, Register):
+        if count.name != 'cl':
+            raise AssemblerError("el desplazamiento variable va en cl")
+        return instruction([0xD2 if byte else 0xD3], code, dest, bits)
+    if count.value == 1:
+        return instruction([0xD0 if byte else 0xD1], code, dest, bits)
+    return instruction([0xC0 if byte else 0xC1], code, dest, bits, immediate=pack_immediate(count.value, 8))
+
+
+def encode_imul(operands):
+    if len(operands) == 1:
+        return encode_unary('imul', operands[0])
+    dest, source = operands[0], operands[1]
+    bits = operand_bits((dest,))
+    if len(operands) == 3:
+        value = immediate_value(operands[2], bits)
+        if fits(value, 8):
+            return instruction([0x6B], dest, source, bits, immediate=pack_immediate(value, 8))
+        return instruction([0x69], dest, source, bits, immediate=pack_immediate(value, min(bits, 32)))
+    if isinstance(source, Immediate):
+        return encode_imul([dest, dest, source])
+    return instruction([0x0F, 0xAF], dest, source, bits)
+
+
+def encode_unary(mnemonic, operand):
+    bits = operand_bits((operand,))
+    return instruction([0xF6 if bits == 8 else 0xF7], UNARY_CODES[mnemonic], operand, bits)
+
+
+def encode_push_pop(mnemonic, operand):
+    if isinstance(operand, Register):
+        if operand.bits != 64:
+            raise AssemblerError(f"{mnemonic} necesita un registro de 64 bits")
+        return instruction_plus_register(0x50 if mnemonic == 'push' else 0x58, operand, b'')
+    if isinstance(operand, Memory):
+        if mnemonic == 'push':
+            return instruction([0xFF], 6, operand, rex_w=False)
+        return instruction([0x8F], 0, operand, rex_w=False)
+    if mnemonic != 'push':
+        raise AssemblerError("pop necesita un registro o memoria")
+    if operand.symbol is None and fits(operand.value, 8):
+        return Encoding(b'\x6a' + pack_immediate(operand.value, 8))
+    return symbol_immediate(Encoding(b'\x68' + immediate_field(operand, 32)), operand)
+
+
+def encode_extend(mnemonic, dest, source):
+    """movzx/movsx (fuente de 8 o 16 bits) y movsxd (fuente de 32)"""
+    source_bits = source.bits
+    if mnemonic == 'movsxd':
+        return instruction([0x63], dest, source, dest.bits)
+    if source_bits is None:
+        raise AssemblerError(f"{mnemonic} necesita el tamaño de la fuente")
+    opcode = {('movzx', 8): 0xB6, ('movzx', 16): 0xB7, ('movsx', 8): 0xBE, ('movsx', 16): 0xBF}
+    return instruction([0x0F, opcode[(mnemonic, source_bits)]], dest, source, dest.bits,
+                       registers=(source,) if isinstance(source, Register) else ())
+
+
+def encode_sse(mnemonic, operands):
+    if mnemonic == 'movsd':
+        dest, source = operands
+        if isinstance(dest, Memory):
+            return instruction([0x0F, 0x11], source, dest, prefix=0xF2, rex_w=False)
+        return instruction([0x0F, 0x10], dest, source, prefix=0xF2, rex_w=False)
+    if mnemonic == 'movq':
+        dest, source = operands
+        if isinstance(dest, Register) and dest.xmm and isinstance(source, Register) and not source.xmm:
+            return instruction([0x0F, 0x6E], dest, source, prefix=0x66, rex_w=True)
+        if isinstance(source, Register) and source.xmm and isinstance(dest, Register) and not dest.xmm:
+            return instruction([0x0F, 0x7E], source, dest, prefix=0x66, rex_w=True)
+        if isinstance(dest, Memory):
+            return instruction([0x0F, 0xD6], source, dest, prefix=0x66, rex_w=False)
+        return instruction([0x0F, 0x7E], dest, source, prefix=0xF3, rex_w=False)
+    if mnemonic == 'cvtsi2sd':
+        dest, source = operands
+        return instruction([0x0F, 0x2A], dest, source, prefix=0xF2,
+                           rex_w=operand_bits((source,)) == 64)
+    if mnemonic == 'cvttsd2si':
+        dest, source = operands
+        return instruction([0x0F, 0x2C], dest, source, prefix=0xF2, rex_w=dest.bits == 64)
+    prefix, opcode = SSE_ENCODINGS[mnemonic]
+    dest, source = operands
+    return instruction([0x0F, opcode], dest, source, prefix=prefix, rex_w=False)
+
+
+def encode(mnemonic, operands):
+    """Codifica una instrucción que no es un salto ni una llamada"""
+    count = len(operands)
+    if mnemonic in FIXED_ENCODINGS and count == 0:
+        return Encoding(FIXED_ENCODINGS[mnemonic])
+    if mnemonic in ALU_CODES and count == 2:
+        return encode_alu(mnemonic, *operands)
+    if mnemonic == 'mov' and count == 2:
+        return encode_mov(*operands)
+    if mnemonic == 'test' and count == 2:
+        return encode_test(*operands)
+    if mnemonic == 'lea' and count == 2:
+        return instruction([0x8D], operands[0], operands[1], operands[0].bits)
+    if mnemonic == 'imul':
+        return encode_imul(operands)
+    if mnemonic in UNARY_CODES and count == 1:
+        return encode_unary(mnemonic, operands[0])
+    if mnemonic in ('inc', 'dec') and count == 1:
+        bits = operand_bits(operands)
+        return instruction([0xFE if bits == 8 else 0xFF], 0 if mnemonic == 'inc' else 1, operands[0], bits)
+    if mnemonic in SHIFT_CODES and count == 2:
+        return encode_shift(mnemonic, *operands)
+    if mnemonic in ('push', 'pop') and count == 1:
+        return encode_push_pop(mnemonic, operands[0])
+    if mnemonic in ('movzx', 'movsx', 'movsxd') and count == 2:
+        return encode_extend(mnemonic, *operands)
+    if mnemonic.startswith('set') and mnemonic[3:] in CONDITION_CODES and count == 1:
+        return instruction([0x0F, 0x90 + CONDITION_CODES[mnemonic[3:]]], 0, operands[0], 8,
+                           registers=operands)
+    if mnemonic.startswith('cmov') and mnemonic[4:] in CONDITION_CODES and count == 2:
+        return instruction([0x0F, 0x40 + CONDITION_CODES[mnemonic[4:]]], operands[0], operands[1],
+                           operands[0].bits)
+    if mnemonic in ('bt', 'bts', 'btr', 'btc') and count == 2 and isinstance(operands[1], Immediate):
+        code = {'bt': 4, 'bts': 5, 'btr': 6, 'btc': 7}[mnemonic]
+        return instruction([0x0F, 0xBA], code, operands[0], operand_bits(operands[:1]),
+                           immediate=pack_immediate(operands[1].value, 8))
+    if mnemonic in SSE_ENCODINGS or mnemonic in ('movsd', 'movq', 'cvtsi2sd', 'cvttsd2si'):
+        return encode_sse(mnemonic, operands)
+    raise AssemblerError(f"instrucción no soportada: {mnemonic} con {count} operandos")
+
+
+# === Ensamblado de un archivo ===
+
+class Branch:
+    """jmp/jcc/call a una etiqueta; los saltos empiezan cortos"""
+    __slots__ = ('mnemonic', 'target', 'near')
+
+    def __init__(self, mnemonic, target):
+        self.mnemonic = mnemonic
+        self.target = target
+        self.near = mnemonic == 'call'
+
+    @property
+    def size(self):
+        if self.mnemonic == 'call':
+            return 5
+        size = JUMP_SIZES['near' if self.near else 'short']
+        return size + 1 if self.near and self.mnemonic != 'jmp' else size
+
+    def encode(self, displacement):
+        if self.mnemonic == 'call':
+            return b'\xe8' + struct.pack('<i', displacement)
+        if self.mnemonic == 'jmp':
+            opcode = b'\xe9' if self.near else b'\xeb'
+        else:
+            condition = CONDITION_CODES[self.mnemonic[1:]]
+            opcode = bytes([0x0F, 0x80 + condition]) if self.near else bytes([0x70 + condition])
+        return opcode + (struct.pack('<i', displacement) if self.near else struct.pack('<b', displacement))
+
+
+DATA_DIRECTIVES = {'db': 1, 'dw': 2, 'dd': 4, 'dq': 8}
+RESERVE_DIRECTIVES = {'resb': 1, 'resw': 2, 'resd': 4, 'resq': 8}
+
+
+def data_value(text, size):
+    """Bytes de un valor de db/dw/dd/dq: entero, carácter, cadena o real"""
+    text = text.strip()
+    if text[0] in "'\"" and text[-1] == text[0] and (len(text) != 3 or size == 1):
+        data = text[1:-1].encode('utf-8')
+        return data + bytes(-len(data) % size)
+    if is_number(text):
+        return pack_immediate(parse_number(text), size * 8)
+    try:
+        value = float(text)
+    except ValueError:
+        raise AssemblerError(f"valor de datos no soportado: {text}") from None
+    if size == 8:
+        return struct.pack('<d', value)
+    if size == 4:
+        return struct.pack('<f', value)
+    raise AssemblerError(f"real en una directiva de {size} bytes: {text}")
+
+
+class Assembler:
+    """Ensambla el texto NASM de CodeGenerator en secciones .text, .data y .bss.
+
+    parse() lee el texto y mide el código con los saltos relajados; link()
+    recibe la dirección de cada sección y retorna el código de .text."""
+
+    def __init__(self):
+        self.items = []          # .text: Encoding o Branch, en orden
+        self.labels = {}         # Etiqueta -> (sección, posición en items o desplazamiento)
+        self.data = bytearray()
+        self.bss_size = 0
+        self.entry = None        # Etiqueta declarada con 'global'
+        self.scope = None        # Última etiqueta no local (prefijo de las '.x')
+        self.offsets = []        # Desplazamiento de cada item en .text
+
+    def qualify(self, name):
+        # Como NASM: '.L1' después de 'main:' es 'main.L1'
+        return f"{self.scope}{name}" if name.startswith('.') and self.scope else name
+
+    def define(self, name, section, position):
+        if not name.startswith('.'):
+            self.scope = name
+        name = self.qualify(name)
+        if name in self.labels:
+            raise AssemblerError(f"etiqueta duplicada: {name}")
+        self.labels[name] = (section, position)
+
+    def parse(self, source):
+        section = '.text'
+        for number, raw in enumerate(source.split('\n'), 1):
+            line, _ = split_comment(raw)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                section = self.parse_line(line, section)
+            except (AssemblerError, ValueError, KeyError) as e:
+                raise AssemblerError(f"línea {number}: {e} ({line})") from None
+        self.relax()
+        return self
+
+    def parse_line(self, line, section):
+        words = line.split(None, 1)
+        if words[0] == 'section':
+            return words[1].strip()
+        if words[0] == 'global':
+            self.entry = words[1].strip()
+            return section
+        if section != '.text':
+            self.parse_data(line, section)
+            return section
+        if line.endswith(':'):
+            self.define(line[:-1], '.text', len(self.items))
+            return section
+        mnemonic = words[0].lower()
+        operands = ([parse_operand(text, self.qualify) for text in split_operands(words[1])]
+                    if len(words) > 1 else [])
+        if mnemonic in ('call', 'jmp') or (mnemonic[0] == 'j' and mnemonic[1:] in CONDITION_CODES):
+            if len(operands) != 1 or not isinstance(operands[0], Immediate) or operands[0].symbol is None:
+                raise AssemblerError(f"{mnemonic} solo se soporta hacia una etiqueta")
+            self.items.append(Branch(mnemonic, operands[0].symbol))
+        else:
+            self.items.append(encode(mnemonic, operands))
+        return section
+
+    def parse_data(self, line, section):
+        # 'nombre: dd 0', 'nombre dd 0', 'nombre:' o solo la directiva
+        match = re.match(r"^([A-Za-z_.][\w.]*)(:|\s+(?=(?:d[bwdq]|res[bwdq]|times)\b))\s*(.*)$", line)
+        if match:
+            offset = len(self.data) if section == '.data' else self.bss_size
+            self.define(match.group(1), section, offset)
+            line = match.group(3).strip()
+            if not line:
+                return
+        words = line.split(None, 1)
+        directive = words[0]
+        repeat = 1
+        if directive == 'times':
+            count, line = words[1].split(None, 1)
+            repeat = parse_number(count)
+            words = line.split(None, 1)
+            directive = words[0]
+        if directive in DATA_DIRECTIVES:
+            if section != '.data':
+                raise AssemblerError(f"{directive} fuera de .data")
+            size = DATA_DIRECTIVES[directive]
+            values = b''.join(data_value(value, size) for value in split_operands(words[1]))
+            self.data += values * repeat
+        elif directive in RESERVE_DIRECTIVES:
+            if section != '.bss':
+                raise AssemblerError(f"{directive} fuera de .bss")
+            self.bss_size += RESERVE_DIRECTIVES[directive] * parse_number(words[1]) * repeat
+        elif directive == 'align':
+            alignment = parse_number(words[1])
+            if section == '.data':
+                self.data += bytes(-len(self.data) % alignment)
+            else:
+                self.bss_size += -self.bss_size % alignment
+        else:
+            raise AssemblerError(f"directiva no soportada: {directive}")
+
+    def text_label(self, name):
+        if name not in self.labels or self.labels[name][0] != '.text':
+            raise AssemblerError(f"etiqueta de código no definida: {name}")
+        return self.labels[name][1]
+
+    def measure(self):
+        self.offsets = []
+        offset = 0
+        for item in self.items:
+            self.offsets.append(offset)
+            offset += item.size if isinstance(item, Branch) else len(item.code)
+        self.offsets.append(offset)
+
+    def relax(self):
+        """Pasa a la forma cercana los saltos cortos que no alcanzan su destino"""
+        changed = True
+        while changed:
+            self.measure()
+            changed = False
+            for i, item in enumerate(self.items):
+                if isinstance(item, Branch) and not item.near:
+                    target = self.offsets[self.text_label(item.target)]
+                    if not fits(target - (self.offsets[i] + item.size), 8):
+                        item.near = True
+                        changed = True
+
+    @property
+    def text_size(self):
+        return self.offsets[-1]
+
+    def address(self, name, bases):
+        if name not in self.labels:
+            raise AssemblerError(f"símbolo no definido: {name}")
+        section, position = self.labels[name]
+        if section == '.text':
+            position = self.offsets[position]
+        return bases[section] + position
+
+    def link(self, bases):
+        """Código de .text con las direcciones de cada sección (bases)"""
+        text = bytearray()
+        for i, item in enumerate(self.items):
+            address = bases['.text'] + self.offsets[i]
+            if isinstance(item, Branch):
+                text += item.encode(self.address(item.target, bases) - (address + item.size))
+                continue
+            code = bytearray(item.code)
+            for fixup in item.fixups:
+                value = self.address(fixup.symbol, bases) + fixup.addend
+                if fixup.relative:
+                    value -= address + len(code)
+                    if not fits(value, 32):
+                        raise AssemblerError(f"{fixup.symbol} fuera del alcance de rip")
+                code[fixup.position:fixup.position + 4] = pack_immediate(value, 32)
+            text += code
+        return bytes(text)
+
+    def entry_address(self, bases):
+        return self.address(self.entry or '_start', bases)
@@ -7,6 +7,15 @@ import threading
 from PIL import Image, ImageTk
 import webbrowser
 import sys
+from diagnostics import Diagnostics, ERROR, WARNING, SYNTAX_ERROR, LEXICAL_ERROR, INTERNAL_ERROR
+from runtime import BUILTINS
+from lexer import analyze_tokens, LexicalError
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from utils import cargar_gramatica_lr
+
+# Espera tras la última tecla antes de revisar el código del editor
+CHECK_DELAY_MS = 400
 
 class CompilerGUI:
     def __init__(self, root):
@@ -17,6 +26,17 @@ class CompilerGUI:
         
         self.current_file = None
         self.ast_image = None
+        self.last_diagnostics = None  # Registros exportados por el compilador
+        
+        # Revisión mientras se edita: el analizador semántico se conserva entre
+        # revisiones para que reanalyze reutilice las funciones sin cambios.
+        # Solo corre un hilo de revisión a la vez; si se edita mientras tanto,
+        # se vuelve a revisar al terminar
+        self.grammar_data = None
+        self.analyzer = SemanticAnalyzer()
+        self.check_job = None
+        self.check_running = False
+        self.check_pending = False
         
         self.setup_styles()
         self.create_widgets()
@@ -102,6 +122,7 @@ class CompilerGUI:
         self.code_editor.bind('<KeyRelease>', self.update_line_numbers)
         self.code_editor.bind('<MouseWheel>', self.update_line_numbers)
         self.code_editor.bind('<Button-1>', self.update_line_numbers)
+        self.code_editor.bind('<KeyRelease>', self.schedule_check, add='+')
         
         right_panel = ttk.LabelFrame(top_frame, text="Resultados", padding=10)
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(5, 0))
@@ -203,6 +224,53 @@ class CompilerGUI:
         self.line_numbers.insert('1.0', line_numbers_string)
         self.line_numbers.config(state='disabled')
     
+    def schedule_check(self, event=None):
+        # Revisar el código cuando se deja de escribir
+        if self.check_job is not None:
+            self.root.after_cancel(self.check_job)
+        self.check_job = self.root.after(CHECK_DELAY_MS, self.start_check)
+    
+    def start_check(self):
+        self.check_job = None
+        if self.check_running:
+            self.check_pending = True
+            return
+        self.check_running = True
+        code = self.code_editor.get('1.0', tk.END)
+        
+        thread = threading.Thread(target=self._check_thread, args=(code,))
+        thread.daemon = True
+        
+        thread.start()
+    
+    def _check_thread(self, code):
+        # Análisis sin generar código: el léxico y la sintaxis se procesan
+        # completos, pero la semántica solo revisa las funciones editadas y
+        # las que dependen de ellas
+        collector = Diagnostics()
+        try:
+            if self.grammar_data is None:
+                self.grammar_data = cargar_gramatica_lr(
+                    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'compilador.lr'))
+            ast_root = Parser(self.grammar_data, collector).parse(analyze_tokens(code))
+            if ast_root is not None and not collector.has_errors():
+                self.analyzer.reanalyze(ast_root, collector)
+        except LexicalError as le:
+            collector.error(LEXICAL_ERROR, str(le), line=le.line, column=le.column)
+        except Exception as e:
+            collector.error(INTERNAL_ERROR, f"Error interno al revisar el código: {e}")
+        
+        # Actualizar UI en el hilo principal
+        self.root.after(0, self._finish_check, collector.records)
+    
+    def _finish_check(self, records):
+        self.check_running = False
+        errors, warnings = self._format_diagnostics(records, [])
+        self._show_diagnostics(errors, warnings)
+        if self.check_pending:
+            self.check_pending = False
+            self.start_check()
+    
     def load_sample_code(self):
         sample_code = """int a;
 
@@ -220,6 +288,7 @@ int main() {
         self.code_editor.delete('1.0', tk.END)
         self.code_editor.insert('1.0', sample_code)
         self.update_line_numbers()
+        self.schedule_check()
         self.status_label.config(text="Código de ejemplo cargado")
     
     def clear_editor(self):
@@ -244,6 +313,7 @@ int main() {
                 self.code_editor.delete('1.0', tk.END)
                 self.code_editor.insert('1.0', content)
                 self.update_line_numbers()
+                self.schedule_check()
                 self.current_file = file_path
                 self.status_label.config(text=f"Archivo cargado: {os.path.basename(file_path)}")
             except Exception as e:
@@ -294,9 +364,12 @@ int main() {
                 temp_file.write(code)
                 temp_file_path = temp_file.name
             
+            # Archivo donde el compilador exporta los diagnósticos en JSON
+            diagnostics_path = temp_file_path + '.diag.json'
+            
             # Ejecutar compilador con manejo robusto de codificación
             result = subprocess.run(
-                [python_executable, 'main.py'],
+                [python_executable, 'main.py', '--diagnostics', diagnostics_path],
                 input=code,
                 text=True,
                 capture_output=True,
@@ -312,6 +385,13 @@ int main() {
             except:
                 pass
             
+            # Leer los diagnósticos estructurados (None si no se exportaron)
+            try:
+                self.last_diagnostics = Diagnostics.read_json(diagnostics_path)
+                os.unlink(diagnostics_path)
+            except (OSError, ValueError):
+                self.last_diagnostics = None
+            
             # Actualizar UI en el hilo principal
             self.root.after(0, self._update_results, result)
             
@@ -412,60 +492,16 @@ int main() {
             lines = output.split('\n')
             
             # Extraer información clave
-            errors = []
-            warnings = []
             summary_info = []
             
             summary_info.append("=== RESUMEN DE COMPILACION ===\n")
             
-            # Buscar errores y advertencias
-            in_errors = False
-            in_warnings = False
-            in_stats = False
-            
-            for line in lines:
-                line = line.strip()
-                
-                # Detectar errores sintácticos específicos
-                if "Errores sintácticos encontrados:" in line:
-                    in_errors = True
-                    in_warnings = False
-                    in_stats = False
-                    errors.append("ERRORES SINTÁCTICOS:")
-                    summary_info.append(f"{line}")
-                    continue
-                elif "ERRORES ENCONTRADOS" in line:
-                    in_errors = True
-                    in_warnings = False
-                    in_stats = False
-                    errors.append(line)
-                    summary_info.append(f"{line}")
-                    continue
-                elif "ADVERTENCIAS" in line:
-                    in_errors = False
-                    in_warnings = True
-                    in_stats = False
-                    warnings.append(line)
-                    summary_info.append(f"{line}")
-                    continue
-                elif "ESTADISTICAS" in line:
-                    in_errors = False
-                    in_warnings = False
-                    in_stats = True
-                    summary_info.append(f"\n{line}")
-                    continue
-                elif line.startswith("==") or line.startswith("--"):
-                    in_errors = False
-                    in_warnings = False
-                    in_stats = False
-                    continue
-                
-                if in_errors and line and not line.startswith("="):
-                    errors.append(f"  {line}")
-                elif in_warnings and line and not line.startswith("="):
-                    warnings.append(f"  {line}")
-                elif in_stats and line and not line.startswith("="):
-                    summary_info.append(f"  {line}")
+            # Errores y advertencias: leer los registros exportados por el
+            # compilador; solo se analiza el texto si no hay exportación
+            if self.last_diagnostics is not None:
+                errors, warnings = self._format_diagnostics(self.last_diagnostics, summary_info)
+            else:
+                errors, warnings = self._scrape_diagnostics(lines, summary_info)
             
             # Detectar estado de compilación y fases
             compilation_success = False
@@ -515,17 +551,7 @@ int main() {
             self.summary_text.insert('1.0', '\n'.join(summary_info))
             
             # Actualizar errores y advertencias
-            error_summary = []
-            if errors:
-                error_summary.extend(["🔴 ERRORES:", ""] + errors + [""])
-            if warnings:
-                error_summary.extend(["🟡 ADVERTENCIAS:", ""] + warnings)
-            
-            if not error_summary:
-                error_summary = ["✅ No se encontraron errores ni advertencias"]
-            
-            self.errors_text.delete('1.0', tk.END)
-            self.errors_text.insert('1.0', '\n'.join(error_summary))
+            self._show_diagnostics(errors, warnings)
             
             # Solo cargar AST y ASM si la compilación fue exitosa
             if self.compilation_successful:
@@ -542,6 +568,98 @@ int main() {
             # Manejo de errores en el procesamiento
             self._handle_processing_error(str(e))
     
+    def _format_diagnostics(self, records, summary_info):
+        # Dar formato a los registros de diagnóstico exportados por main.py
+        syntax_errors = [r for r in records if r.severity == ERROR and r.code == SYNTAX_ERROR]
+        other_errors = [r for r in records if r.severity == ERROR and r.code != SYNTAX_ERROR]
+        warning_records = [r for r in records if r.severity == WARNING]
+        
+        errors = []
+        warnings = []
+        if syntax_errors:
+            errors.append("ERRORES SINTÁCTICOS:")
+            errors.extend(f"  {r}" for r in syntax_errors)
+            summary_info.append(f"Errores sintácticos encontrados: {len(syntax_errors)}")
+        if other_errors:
+            header = f"ERRORES ENCONTRADOS ({len(other_errors)}):"
+            errors.append(header)
+            errors.extend(f"  [{r.code}] {r}" for r in other_errors)
+            summary_info.append(header)
+        if warning_records:
+            header = f"ADVERTENCIAS ({len(warning_records)}):"
+            warnings.append(header)
+            warnings.extend(f"  [{r.code}] {r}" for r in warning_records)
+            summary_info.append(header)
+        return errors, warnings
+    
+    def _show_diagnostics(self, errors, warnings):
+        # Mostrar errores y advertencias en su pestaña
+        error_summary = []
+        if errors:
+            error_summary.extend(["🔴 ERRORES:", ""] + errors + [""])
+        if warnings:
+            error_summary.extend(["🟡 ADVERTENCIAS:", ""] + warnings)
+        
+        if not error_summary:
+            error_summary = ["✅ No se encontraron errores ni advertencias"]
+        
+        self.errors_text.delete('1.0', tk.END)
+        self.errors_text.insert('1.0', '\n'.join(error_summary))
+    
+    def _scrape_diagnostics(self, lines, summary_info):
+        # Respaldo: recuperar errores y advertencias desde la salida de texto
+        errors = []
+        warnings = []
+        in_errors = False
+        in_warnings = False
+        in_stats = False
+        
+        for line in lines:
+            line = line.strip()
+            
+            # Detectar errores sintácticos específicos
+            if "Errores sintácticos encontrados:" in line:
+                in_errors = True
+                in_warnings = False
+                in_stats = False
+                errors.append("ERRORES SINTÁCTICOS:")
+                summary_info.append(f"{line}")
+                continue
+            elif "ERRORES ENCONTRADOS" in line:
+                in_errors = True
+                in_warnings = False
+                in_stats = False
+                errors.append(line)
+                summary_info.append(f"{line}")
+                continue
+            elif "ADVERTENCIAS" in line:
+                in_errors = False
+                in_warnings = True
+                in_stats = False
+                warnings.append(line)
+                summary_info.append(f"{line}")
+                continue
+            elif "ESTADISTICAS" in line:
+                in_errors = False
+                in_warnings = False
+                in_stats = True
+                summary_info.append(f"\n{line}")
+                continue
+            elif line.startswith("==") or line.startswith("--"):
+                in_errors = False
+                in_warnings = False
+                in_stats = False
+                continue
+            
+            if in_errors and line and not line.startswith("="):
+                errors.append(f"  {line}")
+            elif in_warnings and line and not line.startswith("="):
+                warnings.append(f"  {line}")
+            elif in_stats and line and not line.startswith("="):
+                summary_info.append(f"  {line}")
+        
+        return errors, warnings
+    
     def _handle_empty_output(self):
         # Manejar caso de salida vacía
         message = "❌ No se recibió salida del compilador\n\nPosibles causas:\n- Error en el código fuente\n- Problema con el compilador\n- Error de codificación de caracteres"
@@ -852,16 +970,17 @@ int main() {
             output.append("Variables globales encontradas:")
             lines = asm_content.split('\n')
             
-            # Buscar variables globales antes de section .data
+            # Buscar variables globales en section .data
             for i, line in enumerate(lines):
                 line = line.strip()
-                # Las variables globales aparecen antes de "section .data"
-                if line == 'section .data':
+                # Las variables globales terminan donde empieza "section .text"
+                if line == 'section .text':
                     break
                 # Buscar líneas con formato "nombre: dq valor"
                 if ':' in line and 'dq' in line:
                     var_name = line.split(':')[0].strip()
-                    if not var_name.startswith('msg') and not var_name.startswith('newline') and not var_name.startswith('buffer'):
+                    # Los literales reales (flt_N) no son variables del programa
+                    if not var_name.startswith('msg') and not var_name.startswith('newline') and not var_name.startswith('buffer') and not var_name.startswith('flt_'):
                         # Extraer valor inicial
                         if 'dq' in line:
                             value_part = line.split('dq')[1].strip()
@@ -887,7 +1006,7 @@ int main() {
                 line = line.strip()
                 if line.endswith(':') and not line.startswith('.') and not line.startswith('section'):
                     func_name = line[:-1]
-                    if func_name not in ['_start', 'print_number']:
+                    if func_name != '_start' and func_name not in BUILTINS and not func_name.startswith('rt_'):
                         functions.append(func_name)
                         output.append(f"  - {func_name}()")
             
@@ -903,9 +1022,9 @@ int main() {
                 return "\n".join(output)
             
             main_section = asm_content[main_start:]
-            # Buscar el final de main (siguiente función o print_number)
+            # Buscar el final de main (siguiente función o el runtime)
             main_end = -1
-            for func in functions + ['print_number', '_start']:
+            for func in functions + list(BUILTINS) + ['rt_print_int', '_start']:
                 if func != 'main':
                     pos = main_section.find(f'\n{func}:')
                     if pos != -1 and (main_end == -1 or pos < main_end):
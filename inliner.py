@@ -0,0 +1,135 @@
+# Expansión en línea (inlining) de funciones hoja pequeñas sobre la IR.
+# Una llamada a una función que no llama a nadie y cuyo cuerpo no pasa del
+# umbral se reemplaza por una copia de sus bloques: los parámetros y
+# locales de la copia son variables nuevas de la función que llama, los
+# argumentos se copian a los parámetros y cada 'ret' salta al bloque que
+# seguía a la llamada. Al expandir, una función puede quedar como hoja y
+# expandirse a su vez en la siguiente ronda.
+
+from dataflow import Liveness
+from ir import Instr, Temp, Const
+from type_system import T_FLOAT, T_INT
+
+# Costo máximo (instrucciones sin contar saltos ni retornos) de una
+# función que se expande, por nivel de optimización
+INLINE_THRESHOLDS = {0: 0, 1: 12, 2: 40}
+
+# Con un perfil (pgo.py), las llamadas calientes aceptan este múltiplo del umbral
+HOT_INLINE_FACTOR = 4
+
+
+def inline_cost(function):
+    return sum(1 for instr in function.instructions() if not instr.is_terminator())
+
+
+def is_leaf(function):
+    return not any(instr.op == 'call' for instr in function.instructions())
+
+
+def zero(type_id):
+    return Const(0.0, T_FLOAT) if type_id == T_FLOAT else Const(0, T_INT)
+
+
+class Inliner:
+    """Expande las llamadas a funciones hoja cuyo costo no pasa del umbral.
+
+    Con un perfil, las llamadas calientes aceptan funciones de hasta
+    HOT_INLINE_FACTOR veces el umbral."""
+
+    def __init__(self, threshold, profile=None):
+        self.threshold = threshold
+        self.profile = profile
+        self.hot_threshold = threshold * HOT_INLINE_FACTOR if profile is not None else threshold
+        self.inlined = []    # (función que llama, función expandida, línea de la llamada, caliente)
+
+    def candidates(self, program):
+        """Funciones hoja que se pueden expandir, con su costo"""
+        costs = {function.name: (function, inline_cost(function)) for function in program.functions
+                 if function.name != 'main' and is_leaf(function)}
+        return {name: entry for name, entry in costs.items() if entry[1] <= self.hot_threshold}
+
+    def accepts(self, function, instr, candidates):
+        if instr.op != 'call' or instr.func not in candidates:
+            return False
+        callee, cost = candidates[instr.func]
+        if len(instr.args) != len(callee.params):
+            return False
+        return cost <= self.threshold or self.is_hot(function, instr)
+
+    def is_hot(self, function, instr):
+        return self.profile is not None and self.profile.is_hot_call(function, instr)
+
+    def inline_round(self, program):
+        """Expande las llamadas a las candidatas actuales; retorna las funciones modificadas"""
+        candidates = self.candidates(program)
+        changed = []
+        for function in program.functions:
+            while True:
+                site = next(((block, i) for block in function.blocks
+                             for i, instr in enumerate(block.instrs)
+                             if self.accepts(function, instr, candidates)), None)
+                if site is None:
+                    break
+                block, index = site
+                call = block.instrs[index]
+                callee = candidates[call.func][0]
+                hot = candidates[call.func][1] > self.threshold
+                self.inlined.append((function.name, callee.name, call.line, hot))
+                self.inline_call(function, block, index, callee)
+                if function not in changed:
+                    changed.append(function)
+        return changed
+
+    def inline_call(self, function, block, index, callee):
+        call = block.instrs[index]
+        after = function.new_block(placed=False)
+        after.instrs = block.instrs[index + 1:]
+
+        # Valores de la copia: variables y temporales nuevos de la función que llama
+        rename = {value: function.new_variable(value.type_id) for value in callee.params + callee.locals}
+        for instr in callee.instructions():
+            for value in instr.uses() + [instr.defined()]:
+                if isinstance(value, Temp) and value not in rename:
+                    rename[value] = function.new_temp(value.type_id)
+
+        # Un temporal tiene una sola definición: con varios 'ret' el resultado
+        # pasa por una variable
+        result = call.dest
+        returns = sum(1 for instr in callee.instructions() if instr.op == 'ret')
+        if isinstance(result, Temp) and returns > 1:
+            result = function.new_variable(call.dest.type_id)
+            after.instrs.insert(0, Instr('copy', call.dest, [result], type_id=result.type_id))
+
+        blocks = {old: function.new_block(placed=False) for old in callee.blocks}
+        for old, new in blocks.items():
+            for instr in old.instrs:
+                if instr.op == 'ret':
+                    if result is not None:
+                        value = rename.get(instr.args[0], instr.args[0])
+                        new.instrs.append(Instr('copy', result, [value], type_id=result.type_id,
+                                                line=call.line))
+                    new.instrs.append(Instr('jmp', targets=[after], line=call.line))
+                    continue
+                # La copia toma la línea de la llamada (el perfil se consulta por línea)
+                copy = instr.copy(rename)
+                copy.targets = [blocks[target] for target in copy.targets]
+                copy.line = call.line
+                new.instrs.append(copy)
+
+        # Argumentos a los parámetros; las locales que se leen antes de
+        # asignarse empiezan en 0, como en una llamada
+        setup = [Instr('copy', rename[param], [arg], type_id=param.type_id, line=call.line)
+                 for param, arg in zip(callee.params, call.args)]
+        setup += [Instr('copy', rename[var], [zero(var.type_id)], type_id=var.type_id, line=call.line)
+                  for var in Liveness(callee).uninitialized_locals()]
+        setup.append(Instr('jmp', targets=[blocks[callee.entry]], line=call.line))
+        block.instrs[index:] = setup
+
+        position = function.blocks.index(block) + 1
+        function.blocks[position:position] = list(blocks.values()) + [after]
+
+    def report(self):
+        """Líneas con las llamadas expandidas"""
+        lines = [f"  {caller}: {callee} (línea {line}){' (caliente)' if hot else ''}"
+                 for caller, callee, line, hot in self.inlined]
+        return lines or ["  (ninguna)"]
@@ -0,0 +1,642 @@
+# Representación intermedia de tres direcciones.
+# Cada función es una lista de bloques básicos; cada bloque es una lista
+# lineal de instrucciones que termina en un salto ('jmp'), una bifurcación
+# ('br') o un retorno ('ret'). Las aristas del CFG salen de esos
+# terminadores. El AST anotado se baja una sola vez (IRBuilder) y las
+# optimizaciones de passes.py y el backend de code_generator.py trabajan
+# solo sobre esta representación.
+#
+# Operandos:
+#   Const   literal entero o real
+#   Temp    temporal de una sola definición (resultado intermedio)
+#   Var     parámetro o variable local (puede redefinirse)
+#   Global  variable global; solo se accede con 'load' y 'store'
+
+from parser import Node
+from optimizer import wrap_int, float_to_int
+from type_system import T_INT, T_FLOAT, T_VOID
+
+# Operadores binarios (se usa el lexema del operador fuente)
+ARITHMETIC_OPS = ('+', '-', '*', '/')
+COMPARISON_OPS = ('<', '<=', '>', '>=', '==', '!=')
+LOGICAL_OPS = ('&&', '||')
+BINARY_OPS = ARITHMETIC_OPS + COMPARISON_OPS + LOGICAL_OPS
+COMMUTATIVE_OPS = ('+', '*', '==', '!=', '&&', '||')
+SWAPPED_COMPARISONS = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+
+UNARY_OPS = ('neg', '!', 'i2f', 'f2i')
+TERMINATORS = ('jmp', 'br', 'ret')
+# Instrucciones que no pueden eliminarse aunque su resultado no se use
+SIDE_EFFECT_OPS = ('store', 'call') + TERMINATORS
+
+
+class Const:
+    __slots__ = ('value', 'type_id')
+
+    def __init__(self, value, type_id=T_INT):
+        self.value = value
+        self.type_id = type_id
+
+    def __eq__(self, other):
+        return (isinstance(other, Const) and self.type_id == other.type_id
+                and self.value == other.value)
+
+    def __hash__(self):
+        return hash((self.value, self.type_id))
+
+    def __str__(self):
+        return repr(self.value) if self.type_id == T_FLOAT else str(self.value)
+
+
+class Temp:
+    __slots__ = ('index', 'type_id')
+
+    def __init__(self, index, type_id=T_INT):
+        self.index = index
+        self.type_id = type_id
+
+    def __str__(self):
+        return f"t{self.index}"
+
+    __repr__ = __str__
+
+
+class Var:
+    __slots__ = ('symbol', 'name', 'type_id')
+
+    def __init__(self, symbol, name=None, type_id=None):
+        # Las variables que crea el compilador no tienen símbolo
+        self.symbol = symbol
+        self.name = name or symbol.name
+        self.type_id = type_id or symbol.type_id or T_INT
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+
+class Global:
+    __slots__ = ('symbol', 'name', 'type_id')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.name = symbol.name
+        self.type_id = symbol.type_id or T_INT
+
+    def __eq__(self, other):
+        return isinstance(other, Global) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __str__(self):
+        return f"@{self.name}"
+
+
+def may_fault_or_call(node):
+    """Indica si evaluar el subárbol puede llamar a una función o dividir entre cero"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.name == 'LlamadaFunc':
+            return True
+        if current.token is not None and current.token.lexema == '/':
+            return True
+        stack.extend(current.children)
+    return False
+
+
+def is_virtual(value):
+    """Temporales y variables: los valores que siguen el análisis de vivacidad"""
+    return isinstance(value, (Temp, Var))
+
+
+class Instr:
+    """Instrucción de tres direcciones: dest = op args
+
+    type_id es el tipo de los operandos (en una comparación de reales el
+    destino es entero y type_id es T_FLOAT). En 'call', func es el nombre
+    de la función y arg_types los tipos de los parámetros; en 'jmp' y 'br',
+    targets son los bloques destino."""
+    __slots__ = ('op', 'dest', 'args', 'type_id', 'func', 'arg_types', 'targets', 'line')
+
+    def __init__(self, op, dest=None, args=(), type_id=T_INT, func=None, arg_types=None,
+                 targets=None, line=None):
+        self.op = op
+        self.dest = dest
+        self.args = list(args)
+        self.type_id = type_id
+        self.func = func
+        self.arg_types = arg_types
+        self.targets = targets or []
+        self.line = line
+
+    def copy(self, rename=None):
+        """Copia de la instrucción; rename reemplaza valores (destino y operandos)"""
+        rename = rename or {}
+        return Instr(self.op, rename.get(self.dest, self.dest), [rename.get(arg, arg) for arg in self.args],
+                     self.type_id, self.func, self.arg_types, list(self.targets), self.line)
+
+    def uses(self):
+        return [arg for arg in self.args if is_virtual(arg)]
+
+    def defined(self):
+        return self.dest if is_virtual(self.dest) else None
+
+    def has_side_effects(self):
+        return self.op in SIDE_EFFECT_OPS
+
+    def is_terminator(self):
+        return self.op in TERMINATORS
+
+    def __str__(self):
+        args = ", ".join(str(arg) for arg in self.args)
+        if self.op == 'copy':
+            return f"{self.dest} = {self.args[0]}"
+        if self.op in BINARY_OPS:
+            return f"{self.dest} = {self.args[0]} {self.op} {self.args[1]}"
+        if self.op in UNARY_OPS or self.op == 'load':
+            return f"{self.dest} = {self.op} {args}"
+        if self.op == 'store':
+            return f"store {self.dest}, {args}"
+        if self.op == 'call':
+            call = f"call {self.func}({args})"
+            return f"{self.dest} = {call}" if self.dest is not None else call
+        if self.op == 'jmp':
+            return f"jmp {self.targets[0].label}"
+        if self.op == 'br':
+            return f"br {args}, {self.targets[0].label}, {self.targets[1].label}"
+        return f"{self.op} {args}".rstrip()
+
+
+class BasicBlock:
+    __slots__ = ('label', 'instrs')
+
+    def __init__(self, label):
+        self.label = label
+        self.instrs = []
+
+    @property
+    def terminator(self):
+        if self.instrs and self.instrs[-1].is_terminator():
+            return self.instrs[-1]
+        return None
+
+    def successors(self):
+        terminator = self.terminator
+        return list(terminator.targets) if terminator is not None else []
+
+    # Al copiarse a otro proceso solo viaja la etiqueta; las instrucciones
+    # las lleva la función (ver Function.__getstate__)
+    def __getstate__(self):
+        return self.label
+
+    def __setstate__(self, label):
+        self.label = label
+        self.instrs = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.label})"
+
+
+class Function:
+    """Función en IR: parámetros, locales y bloques en orden de emisión"""
+
+    def __init__(self, name, symbol=None, return_type=T_INT):
+        self.name = name
+        self.symbol = symbol
+        self.return_type = return_type
+        self.line = None       # Línea de la definición en el código fuente
+        self.params = []
+        self.locals = []
+        self.blocks = []
+        self.temp_count = 0
+        self.block_count = 0
+
+    @property
+    def entry(self):
+        return self.blocks[0]
+
+    def new_temp(self, type_id=T_INT):
+        temp = Temp(self.temp_count, type_id if type_id in (T_INT, T_FLOAT) else T_INT)
+        self.temp_count += 1
+        return temp
+
+    def new_variable(self, type_id=T_INT):
+        """Variable local del compilador (a diferencia de un temporal, puede
+        asignarse en varios bloques)"""
+        var = Var(None, f"_v{len(self.locals)}", type_id)
+        self.locals.append(var)
+        return var
+
+    def new_block(self, placed=True):
+        """Crea un bloque; si placed es falso se ubica después con place()"""
+        block = BasicBlock(f"B{self.block_count}")
+        self.block_count += 1
+        if placed:
+            self.blocks.append(block)
+        return block
+
+    def place(self, block):
+        self.blocks.append(block)
+
+    def predecessors(self):
+        pred = {block: [] for block in self.blocks}
+        for block in self.blocks:
+            for succ in block.successors():
+                pred[succ].append(block)
+        return pred
+
+    def instructions(self):
+        for block in self.blocks:
+            yield from block.instrs
+
+    def remove_unreachable(self):
+        """Elimina los bloques a los que no se llega desde la entrada"""
+        reachable = {self.entry}
+        stack = [self.entry]
+        while stack:
+            for succ in stack.pop().successors():
+                if succ not in reachable:
+                    reachable.add(succ)
+                    stack.append(succ)
+        removed = len(self.blocks) - len(reachable)
+        self.blocks = [block for block in self.blocks if block in reachable]
+        return removed
+
+    def tail_call(self, block):
+        """Llamada con la que termina el bloque si su resultado se retorna tal cual, o None"""
+        instrs = block.instrs
+        if len(instrs) < 2 or instrs[-2].op != 'call' or instrs[-1].op != 'ret':
+            return None
+        call, ret = instrs[-2], instrs[-1]
+        if call.dest is None:
+            # Llamada a una función void desde otra función void
+            return call if self.return_type == T_VOID else None
+        return call if ret.args and ret.args[0] is call.dest else None
+
+    def __getstate__(self):
+        # Los bloques se guardan sin sus instrucciones: así pickle no sigue
+        # cadenas de saltos bloque por bloque (una función larga agotaría la
+        # recursión) y los destinos quedan como referencias a bloques ya vistos
+        state = dict(self.__dict__)
+        state['instrs'] = [block.instrs for block in self.blocks]
+        return state
+
+    def __setstate__(self, state):
+        instrs = state.pop('instrs')
+        self.__dict__.update(state)
+        for block, block_instrs in zip(self.blocks, instrs):
+            block.instrs = block_instrs
+
+    def dump(self):
+        params = ", ".join(str(p) for p in self.params)
+        lines = [f"function {self.name}({params})"]
+        for block in self.blocks:
+            lines.append(f"{block.label}:")
+            lines.extend(f"    {instr}" for instr in block.instrs)
+        return "\n".join(lines)
+
+
+class Program:
+    def __init__(self):
+        self.functions = []
+        self.globals = []   # Símbolos de las variables globales
+
+    def dump(self):
+        lines = [f"global {symbol.name}" for symbol in self.globals]
+        for function in self.functions:
+            lines.append("")
+            lines.append(function.dump())
+        return "\n".join(lines)
+
+
+class IRBuilder:
+    """Baja el AST anotado por el analizador semántico a IR"""
+
+    def __init__(self, symbol_table):
+        self.symbol_table = symbol_table
+        self.function = None
+        self.current = None      # Bloque donde se agregan instrucciones
+        self.variables = {}      # Símbolo local -> Var de la función actual
+        self.line = None         # Línea de la sentencia actual (se anota en cada instrucción)
+
+    def build(self, ast_root):
+        program = Program()
+        for symbol in self.symbol_table.scopes[0].values():
+            if symbol.symbol_type == 'variable':
+                program.globals.append(symbol)
+        stack = [ast_root]
+        while stack:
+            node = stack.pop()
+            if node.name == 'DefFunc':
+                program.functions.append(self.build_function(node))
+            elif node.name in ('programa', 'Definiciones', 'Definicion'):
+                stack.extend(reversed(node.children))
+        return program
+
+    def build_function(self, func_node):
+        identifier = next((child.token for child in func_node.children
+                           if child.token is not None and child.token.tipo == 'identificador'), None)
+        name = identifier.lexema if identifier is not None else "unknown_function"
+        symbol = func_node.symbol
+        return_type = symbol.return_type_id if symbol is not None else T_INT
+        function = Function(name, symbol, return_type)
+        function.line = identifier.linea if identifier is not None else None
+        self.function = function
+        self.line = function.line
+        self.variables = {}
+        if symbol is not None:
+            for param in symbol.param_symbols:
+                function.params.append(self.variable(param))
+            for local in symbol.local_symbols:
+                function.locals.append(self.variable(local))
+
+        self.current = function.new_block()
+        for child in func_node.children:
+            if child.name == 'BloqFunc':
+                self.block(child)
+        if self.current is not None:
+            # Caída al final de la función: retorna 0
+            self.emit('ret', None, [self.zero(return_type)])
+        function.remove_unreachable()
+        self.function = None
+        return function
+
+    def variable(self, symbol):
+        if symbol not in self.variables:
+            self.variables[symbol] = Var(symbol)
+        return self.variables[symbol]
+
+    def zero(self, type_id):
+        return Const(0.0, T_FLOAT) if type_id == T_FLOAT else Const(0, T_INT)
+
+    def emit(self, op, dest=None, args=(), **fields):
+        if self.current is None:
+            # Código después de un return: bloque inalcanzable
+            self.current = self.function.new_block()
+        fields.setdefault('line', self.line)
+        instr = Instr(op, dest, args, **fields)
+        self.current.instrs.append(instr)
+        if instr.is_terminator():
+            self.current = None
+        return instr
+
+    def start_block(self, block):
+        # Ubica block a continuación; si el bloque actual quedó abierto, cae en él
+        if self.current is not None:
+            self.emit('jmp', targets=[block])
+        self.function.place(block)
+        self.current = block
+
+    # === Sentencias ===
+
+    def block(self, node):
+        # Bloque, Sentencias, SentenciaBloque, BloqFunc, DefLocales y DefLocal
+        for child in node.children:
+            if child.state != Node.NO_TERMINAL or child.name == 'DefVar':
+                continue
+            if child.name == 'Sentencia':
+                self.statement(child)
+            else:
+                self.block(child)
+
+    def statement(self, node):
+        children = node.children
+        if not children:
+            return
+        keyword = children[0].name
+        line = children[0].token.linea if children[0].token is not None else None
+        if line is not None:
+            self.line = line
+
+        if keyword == 'if':
+            then_block = self.function.new_block(placed=False)
+            end_block = self.function.new_block(placed=False)
+            otro = children[5] if len(children) > 5 else None
+            has_else = otro is not None and len(otro.children) > 1
+            else_block = self.function.new_block(placed=False) if has_else else end_block
+            self.branch(children[2], then_block, else_block)
+            self.start_block(then_block)
+            self.block(children[4])
+            if has_else:
+                if self.current is not None:
+                    self.emit('jmp', targets=[end_block])
+                self.start_block(else_block)
+                self.block(otro.children[1])
+            self.start_block(end_block)
+            return
+
+        if keyword == 'while':
+            header = self.function.new_block(placed=False)
+            body = self.function.new_block(placed=False)
+            exit_block = self.function.new_block(placed=False)
+            self.start_block(header)
+            self.branch(children[2], body, exit_block)
+            self.start_block(body)
+            self.block(children[4])
+            if self.current is not None:
+                self.emit('jmp', targets=[header])
+            self.start_block(exit_block)
+            return
+
+        if keyword == 'return':
+            value = children[1] if len(children) > 1 else None
+            return_type = self.function.return_type
+            if value is not None and value.children:
+                result = self.expression_as(value.children[0], return_type)
+            else:
+                result = self.zero(return_type)
+            self.emit('ret', None, [result], type_id=result.type_id, line=line)
+            return
+
+        if keyword == 'identificador' and len(children) > 2 and children[1].name == '=':
+            self.assignment(children[0], children[2], line)
+            return
+
+        if keyword == 'LlamadaFunc':
+            self.call(children[0], None)
+
+    def assignment(self, target, expr_node, line):
+        symbol = target.symbol
+        if symbol is None:
+            return  # Variable no declarada (solo con --force-asm)
+        if symbol in self.variables:
+            self.expression_as(expr_node, symbol.type_id, self.variables[symbol])
+        else:
+            value = self.expression_as(expr_node, symbol.type_id)
+            self.emit('store', Global(symbol), [value], type_id=value.type_id, line=line)
+
+    def branch(self, cond_node, true_block, false_block):
+        # Condición de control: '&&' y '||' se bajan a saltos (cortocircuito)
+        # y '!' intercambia los destinos; lo demás termina en un 'br'
+        node = self.unwrap(cond_node)
+        children = node.children
+        if node.state != Node.TERMINAL and node.name != 'LlamadaFunc':
+            if len(children) == 2 and children[0].token is not None and children[0].token.lexema == '!':
+                self.branch(children[1], false_block, true_block)
+                return
+            if len(children) == 3 and children[1].token is not None and children[1].token.lexema in LOGICAL_OPS:
+                middle = self.function.new_block(placed=False)
+                if children[1].token.lexema == '&&':
+                    self.branch(children[0], middle, false_block)
+                else:
+                    self.branch(children[0], true_block, middle)
+                self.start_block(middle)
+                self.branch(children[2], true_block, false_block)
+                return
+        cond = self.expression(node)
+        if cond.type_id == T_FLOAT:
+            cond = self.binary('!=', cond, Const(0.0, T_FLOAT), T_FLOAT)
+        self.emit('br', None, [cond], targets=[true_block, false_block])
+
+    # === Expresiones ===
+
+    def expression_as(self, node, type_id, dest=None):
+        """Evalúa una expresión convertida a type_id, opcionalmente en dest"""
+        value_type = node.type_id if node.type_id in (T_INT, T_FLOAT) else T_INT
+        type_id = type_id if type_id in (T_INT, T_FLOAT) else value_type
+        if value_type == type_id:
+            value = self.expression(node, dest)
+            if dest is not None and value is not dest:
+                self.emit('copy', dest, [value], type_id=type_id)
+                return dest
+            return value
+        value = self.expression(node)
+        op = 'i2f' if type_id == T_FLOAT else 'f2i'
+        result = dest if dest is not None else self.function.new_temp(type_id)
+        self.emit(op, result, [value], type_id=value.type_id)
+        return result
+
+    def result(self, dest, type_id):
+        if dest is not None and dest.type_id == type_id:
+            return dest
+        return self.function.new_temp(type_id)
+
+    def binary(self, op, left, right, operand_type, dest=None):
+        result_type = operand_type if op in ARITHMETIC_OPS else T_INT
+        result = self.result(dest, result_type)
+        self.emit(op, result, [left, right], type_id=operand_type)
+        return result
+
+    def unwrap(self, node):
+        # Quita los nodos de un solo hijo y los paréntesis
+        while True:
+            if node.name == 'Expresion' and len(node.children) == 1:
+                node = node.children[0]
+            elif node.name == 'Expresion' and len(node.children) == 3 and node.children[0].name == '(':
+                node = node.children[1]
+            elif node.name == 'Termino' and len(node.children) == 1:
+                node = node.children[0]
+            else:
+                return node
+
+    def expression(self, node, dest=None):
+        """Baja una expresión; retorna el operando con su valor"""
+        node = self.unwrap(node)
+        if node.name == 'LlamadaFunc':
+            return self.call(node, dest)
+        if node.state == Node.TERMINAL:
+            return self.terminal(node, dest)
+
+        children = node.children
+        if len(children) == 2:
+            operator = children[0].token.lexema
+            operand = self.expression(children[1])
+            if operator == '+':
+                return operand
+            op = 'neg' if operator == '-' else '!'
+            result = self.result(dest, operand.type_id if op == 'neg' else T_INT)
+            self.emit(op, result, [operand], type_id=operand.type_id)
+            return result
+
+        left_node, operator, right_node = children
+        op = operator.token.lexema
+        if op in LOGICAL_OPS and may_fault_or_call(right_node):
+            # El operando derecho solo se evalúa si hace falta (semántica de C)
+            result = self.function.new_variable(T_INT)
+            true_block = self.function.new_block(placed=False)
+            false_block = self.function.new_block(placed=False)
+            end_block = self.function.new_block(placed=False)
+            self.branch(node, true_block, false_block)
+            self.start_block(true_block)
+            self.emit('copy', result, [Const(1)], type_id=T_INT)
+            self.emit('jmp', targets=[end_block])
+            self.start_block(false_block)
+            self.emit('copy', result, [Const(0)], type_id=T_INT)
+            self.start_block(end_block)
+            return result
+        left = self.expression(left_node)
+        right = self.expression(right_node)
+        if op in LOGICAL_OPS:
+            # Cada operando cuenta como verdadero si es distinto de cero
+            left = self.truth(left)
+            right = self.truth(right)
+            return self.binary(op, left, right, T_INT, dest)
+        operand_type = T_FLOAT if T_FLOAT in (left.type_id, right.type_id) else T_INT
+        left = self.convert(left, operand_type)
+        right = self.convert(right, operand_type)
+        return self.binary(op, left, right, operand_type, dest)
+
+    def truth(self, value):
+        if value.type_id == T_FLOAT:
+            return self.binary('!=', value, Const(0.0, T_FLOAT), T_FLOAT)
+        return value
+
+    def convert(self, value, type_id):
+        if value.type_id == type_id:
+            return value
+        if isinstance(value, Const):
+            return Const(float(value.value), T_FLOAT) if type_id == T_FLOAT else Const(float_to_int(value.value))
+        result = self.function.new_temp(type_id)
+        self.emit('i2f' if type_id == T_FLOAT else 'f2i', result, [value], type_id=value.type_id)
+        return result
+
+    def terminal(self, node, dest):
+        token = node.token
+        if token.tipo == 'entero':
+            return Const(wrap_int(int(token.lexema)), T_INT)
+        if token.tipo == 'real':
+            return Const(float(token.lexema), T_FLOAT)
+        symbol = node.symbol
+        if token.tipo != 'identificador' or symbol is None:
+            return Const(0, T_INT)  # Variable no declarada (solo con --force-asm)
+        if symbol in self.variables:
+            return self.variables[symbol]
+        result = self.result(dest, symbol.type_id or T_INT)
+        self.emit('load', result, [Global(symbol)], type_id=result.type_id, line=token.linea)
+        return result
+
+    def call(self, node, dest):
+        func_name = node.children[0].token.lexema
+        arguments = []
+        stack = [child for child in node.children if child.name == 'Argumentos']
+        while stack:
+            current = stack.pop()
+            for child in current.children:
+                if child.name == 'Expresion':
+                    arguments.append(child)
+                elif child.name == 'ListaArgumentos':
+                    stack.append(child)
+
+        symbol = node.symbol
+        if symbol is not None and len(symbol.param_type_ids) == len(arguments):
+            arg_types = [t if t in (T_INT, T_FLOAT) else T_INT for t in symbol.param_type_ids]
+        else:
+            arg_types = [arg.type_id if arg.type_id in (T_INT, T_FLOAT) else T_INT for arg in arguments]
+        args = [self.expression_as(arg, arg_type) for arg, arg_type in zip(arguments, arg_types)]
+
+        return_type = symbol.return_type_id if symbol is not None else T_INT
+        result = None
+        if dest is not None or return_type != T_VOID:
+            result = self.result(dest, return_type if return_type in (T_INT, T_FLOAT) else T_INT)
+        self.emit('call', result, args, func=func_name, arg_types=arg_types,
+                  type_id=result.type_id if result is not None else T_INT,
+                  line=node.children[0].token.linea)
+        return result if result is not None else Const(0)
+
+
+def build_program(ast_root, symbol_table):
+    """Baja el programa completo a IR"""
+    return IRBuilder(symbol_table).build(ast_root)
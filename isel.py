@@ -0,0 +1,334 @@
+# Selección de instrucciones por cobertura de árboles (estilo BURS) para
+# las operaciones enteras de la IR.
+#
+# Dentro de un bloque, un temporal que se lee una sola vez y cuya
+# definición va justo antes de quien lo lee puede formar parte del árbol de
+# esa instrucción: una carga de global se vuelve un operando de memoria,
+# 'y * 4' el índice de un lea y 'x + 8' su desplazamiento. Cada nodo se
+# etiqueta de abajo hacia arriba con el costo mínimo (en instrucciones) de
+# obtenerlo como cada no terminal y la raíz se cubre con la regla 'stmt'
+# más barata. Las definiciones que quedan dentro del árbol no se emiten.
+#
+# No terminales:
+#   reg   valor en un registro          mem   valor en memoria (slot o global)
+#   imm   literal de 32 bits con signo  scale literal 2, 4 u 8
+#   base  registro de 64 bits que contiene reg (para las direcciones de lea)
+#   same  hoja que es el mismo destino  dreg / dmem  destino en registro / memoria
+#   global / same-global  global de una carga plegada (distinta o igual al destino)
+#   rm, ri, rmi  combinaciones de los anteriores (reglas de cadena)
+#   index 'reg*scale'                   addr  dirección de un lea (sin corchetes)
+#
+# Patrones: un no terminal o (op, patrón, ...); en las operaciones
+# conmutativas se prueban ambos órdenes. La plantilla de una regla 'stmt' es
+# la lista de instrucciones como tuplas (código, operandos...); la de las
+# demás, el texto del operando. {i} es la i-ésima hoja del patrón (los
+# literales son enteros: {i:+} pone el signo).
+
+from assembly import Instruction, is_register, registers_in, full_register
+from ir import Temp, Const, COMMUTATIVE_OPS
+from type_system import T_INT
+
+SCALES = (2, 4, 8)
+
+# Costo de una hoja cuya definición podría plegarse pero se emite aparte
+SEPARATE_COST = 1
+
+# Operaciones que pueden quedar dentro del árbol de otra instrucción
+FOLDABLE_OPS = ('load', '+', '-', '*')
+
+
+def instructions(template, texts):
+    """Registros de la plantilla de una regla 'stmt' con los textos de las hojas"""
+    return [Instruction(opcode, [operand.format(*texts) for operand in operands])
+            for opcode, *operands in template]
+
+
+class Rule:
+    __slots__ = ('name', 'result', 'pattern', 'cost', 'template')
+
+    def __init__(self, name, result, pattern, cost, template):
+        self.name = name
+        self.result = result
+        self.pattern = pattern
+        self.cost = cost
+        self.template = template
+
+
+def chain(result, source):
+    return Rule(None, result, source, 0, '{0}')
+
+
+RULES = [
+    chain('rm', 'reg'),
+    chain('rm', 'mem'),
+    chain('ri', 'reg'),
+    chain('ri', 'imm'),
+    chain('rmi', 'rm'),
+    chain('rmi', 'imm'),
+    # Carga plegada: la global como operando de memoria
+    Rule('load', 'mem', ('load', 'global'), 0, '{0}'),
+    Rule('load', 'same', ('load', 'same-global'), 0, '{0}'),
+    # Direcciones de lea: se calculan con los registros de 64 bits y el
+    # resultado se trunca al ancho del destino
+    Rule('index', 'index', ('*', 'base', 'scale'), 0, '{0}*{1}'),
+    Rule('base-index', 'addr', ('+', 'base', 'index'), 0, '{0}+{1}'),
+    Rule('base-base', 'addr', ('+', 'base', 'base'), 0, '{0}+{1}'),
+    Rule('base-disp', 'addr', ('+', 'base', 'imm'), 0, '{0}{1:+}'),
+    Rule('index-disp', 'addr', ('+', 'index', 'imm'), 0, '{0}{1:+}'),
+    Rule('base-index-disp', 'addr', ('+', ('+', 'base', 'index'), 'imm'), 0, '{0}+{1}{2:+}'),
+    Rule('base-index-disp', 'addr', ('+', ('+', 'base', 'imm'), 'index'), 0, '{0}+{2}{1:+}'),
+    Rule('base-base-disp', 'addr', ('+', ('+', 'base', 'base'), 'imm'), 0, '{0}+{1}{2:+}'),
+    Rule('base-base-disp', 'addr', ('+', ('+', 'base', 'imm'), 'base'), 0, '{0}+{2}{1:+}'),
+    # Destino en registro
+    Rule('add', 'stmt', ('set', 'dreg', ('+', 'same', 'rmi')), 1, [('add', '{0}', '{2}')]),
+    Rule('lea', 'stmt', ('set', 'dreg', 'addr'), 1, [('lea', '{0}', '[{1}]')]),
+    Rule('mov-add', 'stmt', ('set', 'dreg', ('+', 'rm', 'rmi')), 2,
+         [('mov', '{0}', '{1}'), ('add', '{0}', '{2}')]),
+    Rule('sub', 'stmt', ('set', 'dreg', ('-', 'same', 'rmi')), 1, [('sub', '{0}', '{2}')]),
+    Rule('mov-sub', 'stmt', ('set', 'dreg', ('-', 'rmi', 'rmi')), 2,
+         [('mov', '{0}', '{1}'), ('sub', '{0}', '{2}')]),
+    Rule('imul', 'stmt', ('set', 'dreg', ('*', 'same', 'rm')), 1, [('imul', '{0}', '{2}')]),
+    Rule('imul-imm', 'stmt', ('set', 'dreg', ('*', 'rm', 'imm')), 1, [('imul', '{0}', '{1}', '{2}')]),
+    Rule('mov-imul', 'stmt', ('set', 'dreg', ('*', 'rm', 'rm')), 2,
+         [('mov', '{0}', '{1}'), ('imul', '{0}', '{2}')]),
+    # Destino en memoria (slot del stack o global; el operando ya trae 'dword')
+    Rule('add-mem', 'stmt', ('set', 'dmem', ('+', 'same', 'ri')), 1, [('add', '{0}', '{2}')]),
+    Rule('sub-mem', 'stmt', ('set', 'dmem', ('-', 'same', 'ri')), 1, [('sub', '{0}', '{2}')]),
+    Rule('add-rax', 'stmt', ('set', 'dmem', ('+', 'rm', 'rmi')), 3,
+         [('mov', 'eax', '{1}'), ('add', 'eax', '{2}'), ('mov', '{0}', 'eax')]),
+    Rule('sub-rax', 'stmt', ('set', 'dmem', ('-', 'rmi', 'rmi')), 3,
+         [('mov', 'eax', '{1}'), ('sub', 'eax', '{2}'), ('mov', '{0}', 'eax')]),
+    Rule('imul-rax', 'stmt', ('set', 'dmem', ('*', 'rm', 'imm')), 2,
+         [('imul', 'eax', '{1}', '{2}'), ('mov', '{0}', 'eax')]),
+    Rule('imul-rax', 'stmt', ('set', 'dmem', ('*', 'rm', 'rm')), 3,
+         [('mov', 'eax', '{1}'), ('imul', 'eax', '{2}'), ('mov', '{0}', 'eax')]),
+    Rule('store', 'stmt', ('set', 'dmem', 'ri'), 1, [('mov', '{0}', '{1}')]),
+    Rule('store-mem', 'stmt', ('set', 'dmem', 'mem'), 2, [('mov', 'eax', '{1}'), ('mov', '{0}', 'eax')]),
+]
+
+
+class Node:
+    """Nodo del árbol: un valor de la IR (hoja) y, si su definición puede
+    plegarse, la operación que lo calcula"""
+    __slots__ = ('value', 'op', 'kids', 'instr', 'labels')
+
+    def __init__(self, value=None, op=None, kids=(), instr=None):
+        self.value = value
+        self.op = op
+        self.kids = list(kids)
+        self.instr = instr     # Definición que deja de emitirse si se usa op
+        self.labels = {}       # no terminal -> (costo, regla, hojas, nodos internos)
+
+
+class InstructionSelector:
+    """Cubre las instrucciones enteras de cada bloque con la tabla de reglas
+    y lleva la cuenta de aciertos por regla"""
+
+    def __init__(self, rules=None):
+        self.rules = RULES if rules is None else rules
+        self.chains = [rule for rule in self.rules if isinstance(rule.pattern, str)]
+        self.trees = {}
+        for rule in self.rules:
+            if not isinstance(rule.pattern, str):
+                self.trees.setdefault(rule.pattern[0], []).append(rule)
+        self.hits = {}
+        for rule in self.rules:
+            if rule.name is not None:
+                self.hits.setdefault(rule.name, 0)
+
+    def select_block(self, block, operand, use_counts, selectable):
+        """Retorna (instrucción -> registros de ensamblador, definiciones plegadas).
+
+        operand da el texto de un valor; selectable indica qué instrucciones
+        se cubren con la tabla. Se recorre de abajo hacia arriba para que
+        cada instrucción reclame primero las definiciones que la preceden."""
+        plans = {}
+        folded = set()
+        instrs = block.instrs
+        for index in range(len(instrs) - 1, -1, -1):
+            instr = instrs[index]
+            if instr in folded or not selectable(instr):
+                continue
+            window = self.window(instrs, index, use_counts, folded)
+            while True:
+                plan = self.cover(instr, window, operand)
+                if plan is None:
+                    break
+                lines, used, names = plan
+                # Las plegadas deben ser las inmediatamente anteriores: si no,
+                # una que sí se emite podría pisar un registro del árbol
+                contiguous = window[:len(used)]
+                if all(candidate in used for candidate in contiguous):
+                    break
+                window = window[:next(i for i, candidate in enumerate(window) if candidate not in used)]
+            if plan is None:
+                continue
+            plans[instr] = lines
+            folded.update(used)
+            for name in names:
+                self.hits[name] += 1
+        return plans, folded
+
+    def window(self, instrs, index, use_counts, folded):
+        """Definiciones consecutivas antes de index que podrían plegarse en
+        el árbol de instrs[index] (la más cercana primero)"""
+        needed = set(instrs[index].uses())
+        window = []
+        for position in range(index - 1, -1, -1):
+            candidate = instrs[position]
+            dest = candidate.dest
+            if (candidate in folded or candidate.op not in FOLDABLE_OPS
+                    or not isinstance(dest, Temp) or dest.type_id != T_INT
+                    or candidate.type_id != T_INT or dest not in needed or use_counts.get(dest) != 1):
+                break
+            window.append(candidate)
+            needed.update(candidate.uses())
+        return window
+
+    def cover(self, instr, window, operand):
+        """(registros, definiciones plegadas, reglas usadas) de la cobertura más
+        barata de la instrucción, o None si ninguna regla la cubre"""
+        definitions = {candidate.dest: candidate for candidate in window}
+        if instr.op == 'store':
+            expr = self.build(instr.args[0], definitions)
+        else:
+            expr = Node(op=instr.op, kids=[self.build(arg, definitions) for arg in instr.args])
+        target = operand(instr.dest)
+        dest = Node(instr.dest)
+        dest.labels['dreg' if is_register(target) else 'dmem'] = (0, None, target, [])
+        root = Node(op='set', kids=[dest, expr])
+        self.label(expr, target, operand)
+        self.label_rules(root)
+        if 'stmt' not in root.labels:
+            return None
+        used = set()
+        names = []
+        rule, texts = self.reduce(root, 'stmt', used, names)
+        if is_register(target) and len(rule.template) > 1 and any(
+                full_register(target) in registers_in(str(text)) for text in texts[2:]):
+            # El destino se escribe antes de leer otra hoja que vive en él:
+            # se calcula en eax
+            records = instructions(rule.template, ['eax'] + texts[1:])
+            return records + [Instruction('mov', [target, 'eax'])], used, names
+        return instructions(rule.template, texts), used, names
+
+    def build(self, value, definitions):
+        instr = definitions.get(value)
+        if instr is None:
+            return Node(value)
+        if instr.op == 'load':
+            return Node(value, 'load', [Node(instr.args[0])], instr)
+        return Node(value, instr.op, [self.build(arg, definitions) for arg in instr.args], instr)
+
+    # === Etiquetado y reducción ===
+
+    def label(self, node, target, operand):
+        """Costo mínimo de node como cada no terminal (target es el texto del destino)"""
+        if node.op == 'load':
+            # La global de una carga: su texto es el operando de memoria
+            variable = node.kids[0]
+            text = operand(variable.value)
+            variable.labels['global' if text != target else 'same-global'] = (0, None, text, [])
+        else:
+            for kid in node.kids:
+                self.label(kid, target, operand)
+        if node.value is not None:
+            self.label_leaf(node, target, operand)
+        self.label_rules(node)
+
+    def label_rules(self, node):
+        labels = node.labels
+        for rule in self.trees.get(node.op, []):
+            bindings, inner = [], []
+            cost = self.match(rule.pattern, node, bindings, inner)
+            if cost is not None and (rule.result not in labels or cost + rule.cost < labels[rule.result][0]):
+                labels[rule.result] = (cost + rule.cost, rule, bindings, inner)
+        changed = True
+        while changed:
+            changed = False
+            for rule in self.chains:
+                if rule.pattern in labels:
+                    cost = labels[rule.pattern][0] + rule.cost
+                    if rule.result not in labels or cost < labels[rule.result][0]:
+                        labels[rule.result] = (cost, rule, [(node, rule.pattern)], [])
+                        changed = True
+
+    def label_leaf(self, node, target, operand):
+        value = node.value
+        # Una hoja cuya definición se emite aparte cuesta esa instrucción
+        cost = SEPARATE_COST if node.instr is not None else 0
+        labels = node.labels
+        if isinstance(value, Const):
+            if value.type_id == T_INT and -2**31 <= value.value < 2**31:
+                labels['imm'] = (cost, None, value.value, [])
+                if value.value in SCALES:
+                    labels['scale'] = (cost, None, value.value, [])
+            return
+        if value.type_id != T_INT:
+            return
+        text = operand(value)
+        kind = 'reg' if is_register(text) else 'mem'
+        labels[kind] = (cost, None, text, [])
+        if kind == 'reg':
+            labels['base'] = (cost, None, full_register(text), [])
+        if text == target:
+            labels['same'] = labels[kind]
+
+    def match(self, pattern, node, bindings, inner):
+        """Costo de cubrir node con el patrón (ligando hojas y nodos internos), o None"""
+        if isinstance(pattern, str):
+            label = node.labels.get(pattern)
+            if label is None:
+                return None
+            bindings.append((node, pattern))
+            return label[0]
+        op = pattern[0]
+        if node.op != op or len(node.kids) != len(pattern) - 1:
+            return None
+        orders = [node.kids]
+        if op in COMMUTATIVE_OPS:
+            orders.append(node.kids[::-1])
+        best = None
+        for kids in orders:
+            trial_bindings, trial_inner = [], []
+            total = 0
+            for subpattern, kid in zip(pattern[1:], kids):
+                if not isinstance(subpattern, str) and kid.instr is not None:
+                    trial_inner.append(kid)
+                cost = self.match(subpattern, kid, trial_bindings, trial_inner)
+                if cost is None:
+                    total = None
+                    break
+                total += cost
+            if total is not None and (best is None or total < best[0]):
+                best = (total, trial_bindings, trial_inner)
+        if best is None:
+            return None
+        bindings.extend(best[1])
+        inner.extend(best[2])
+        return best[0]
+
+    def reduce(self, node, result, used, names):
+        """Texto del nodo como el no terminal result; en 'stmt', (regla, textos de las hojas)"""
+        cost, rule, bindings, inner = node.labels[result]
+        if rule is None:
+            return bindings
+        if not isinstance(rule.pattern, str):
+            if node.instr is not None:
+                used.add(node.instr)
+            used.update(kid.instr for kid in inner)
+        if rule.name is not None:
+            names.append(rule.name)
+        texts = [self.reduce(kid, kid_result, used, names) for kid, kid_result in bindings]
+        if result == 'stmt':
+            return rule, texts
+        return rule.template.format(*texts)
+
+    def total(self):
+        return sum(self.hits.values())
+
+    def report(self):
+        """Líneas con las reglas que se usaron y sus aciertos"""
+        lines = [f"  {name}: {count}" for name, count in self.hits.items() if count]
+        lines.append(f"  total: {self.total()}")
+        return lines
@@ -0,0 +1,66 @@
+# Disposición de los datos según su tipo: tamaño de cada valor, prefijo de
+# tamaño de sus accesos a memoria, directiva de .data y registros con los
+# que se opera. Un int ocupa 4 bytes: se lee y escribe como dword y se
+# calcula con los registros de 32 bits (eax, ecx, r8d...), cuya escritura
+# limpia la mitad alta; un float ocupa los 8 bytes de un double.
+#
+# Los slots del marco y las globales se ubican por alineación, primero los
+# de 8 bytes y después los de 4: todos quedan alineados a su tamaño sin
+# huecos de relleno entre ellos.
+
+from assembly import sized_register, is_register
+from type_system import T_INT, T_FLOAT
+
+INT_BITS = 32
+INT_MIN = -(1 << (INT_BITS - 1))
+INT_MAX = (1 << (INT_BITS - 1)) - 1
+
+# tipo -> (bytes, prefijo de tamaño, directiva de .data, bits de los registros)
+LAYOUTS = {
+    T_INT: (4, 'dword', 'dd', INT_BITS),
+    T_FLOAT: (8, 'qword', 'dq', 64),
+}
+
+# Alineación de la base de un bloque empaquetado (los slots bajo rbp)
+BASE_ALIGNMENT = 8
+
+
+def size_of(type_id):
+    return LAYOUTS[type_id][0]
+
+
+def data_directive(type_id):
+    return LAYOUTS[type_id][2]
+
+
+def value_register(register, type_id):
+    """Nombre del registro con el ancho del tipo ('rcx' -> 'ecx' para int)"""
+    if type_id == T_FLOAT or not is_register(register) or register.startswith('xmm'):
+        return register
+    return sized_register(register, LAYOUTS[type_id][3])
+
+
+def value_memory(address, type_id):
+    """Operando de memoria de un valor: '[dirección]' con el prefijo de un
+    int; los float se leen con movsd y no lo necesitan"""
+    if type_id == T_FLOAT:
+        return address
+    return f"{LAYOUTS[type_id][1]} {address}"
+
+
+def packing_order(sizes):
+    """Índices de los valores en el orden en que se ubican (los más grandes primero)"""
+    return sorted(range(len(sizes)), key=lambda i: -sizes[i])
+
+
+def pack(sizes):
+    """Ubica los valores uno debajo del otro desde una base alineada.
+
+    Retorna (distancia bajo la base a la que empieza cada valor, bytes
+    ocupados redondeados a BASE_ALIGNMENT)."""
+    depths = [0] * len(sizes)
+    depth = 0
+    for i in packing_order(sizes):
+        depth += sizes[i]
+        depths[i] = depth
+    return depths, -(-depth // BASE_ALIGNMENT) * BASE_ALIGNMENT
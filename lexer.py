@@ -13,7 +13,10 @@ class Token:
 
 
 class LexicalError(Exception):
-    pass
+    def __init__(self, message, line=None, column=None):
+        super().__init__(message)
+        self.line = line
+        self.column = column
 
 
 def analyze_tokens(input_text):
@@ -0,0 +1,450 @@
+# Ciclos de la IR: dominadores, ciclos naturales y los pases que los
+# transforman.
+#
+# - Rotación: un while se baja como "cabecera: condición; br cuerpo, salida"
+#   más un 'jmp' de regreso al final del cuerpo, es decir, dos saltos por
+#   iteración. Rotado, la condición se evalúa una vez antes del ciclo
+#   (guarda) y de nuevo al final del cuerpo, que salta directo al inicio.
+# - LICM: las instrucciones sin efectos cuyos operandos no se asignan
+#   dentro del ciclo se mueven a un bloque previo (preheader) y se
+#   calculan una sola vez.
+# - Desenrollado: en un ciclo rotado cuya variable de inducción empieza en
+#   un literal, avanza un paso literal y se compara con un literal, se
+#   conoce el número de iteraciones. Un ciclo pequeño se reemplaza por
+#   copias de su cuerpo; uno grande repite el cuerpo 'factor' veces por
+#   iteración y las iteraciones que sobran las hace el ciclo original.
+
+from ir import Instr, Temp, Var, Const, is_virtual, BINARY_OPS, UNARY_OPS
+from layout import INT_MIN, INT_MAX
+from type_system import T_INT
+
+# Instrucciones máximas (sin el terminador) de una cabecera que se duplica al rotar
+ROTATE_LIMIT = 8
+
+# Factor de desenrollado por nivel de optimización (0: no se desenrolla)
+UNROLL_FACTORS = {0: 0, 1: 0, 2: 4}
+
+# Instrucciones máximas (sin saltos) del código que deja un ciclo desenrollado
+UNROLL_BUDGET = 64
+
+NEGATED_COMPARISONS = {'<': '>=', '<=': '>', '>': '<=', '>=': '<', '==': '!=', '!=': '=='}
+SWAPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+
+
+
+class Loop:
+    """Ciclo natural: cabecera, bloques que lo forman y bloques que saltan a la cabecera"""
+
+    def __init__(self, header):
+        self.header = header
+        self.blocks = {header}
+        self.latches = []
+
+    def __repr__(self):
+        return f"Loop({self.header.label}, {len(self.blocks)} bloques)"
+
+
+def dominators(function):
+    """Conjunto de dominadores de cada bloque (iterativo, sobre el orden de la función)"""
+    preds = function.predecessors()
+    entry = function.entry
+    everything = set(function.blocks)
+    dom = {block: set(everything) for block in function.blocks}
+    dom[entry] = {entry}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            if block is entry:
+                continue
+            incoming = [dom[pred] for pred in preds[block]]
+            new = set.intersection(*incoming) | {block} if incoming else {block}
+            if new != dom[block]:
+                dom[block] = new
+                changed = True
+    return dom
+
+
+def find_loops(function):
+    """Ciclos naturales de la función, de menor a mayor (los internos primero)"""
+    dom = dominators(function)
+    preds = function.predecessors()
+    loops = {}
+    for block in function.blocks:
+        for succ in block.successors():
+            if succ not in dom[block]:
+                continue
+            # Arista de regreso block -> succ: el ciclo son los bloques que
+            # llegan a block sin pasar por la cabecera
+            loop = loops.setdefault(succ, Loop(succ))
+            if block not in loop.latches:
+                loop.latches.append(block)
+            stack = [block]
+            while stack:
+                current = stack.pop()
+                if current not in loop.blocks:
+                    loop.blocks.add(current)
+                    stack.extend(preds[current])
+    return sorted(loops.values(), key=lambda loop: len(loop.blocks))
+
+
+def can_rotate(function, loop):
+    header = loop.header
+    terminator = header.terminator
+    if header is function.entry or terminator is None or terminator.op != 'br':
+        return False
+    if [target in loop.blocks for target in terminator.targets].count(True) != 1:
+        return False
+    if header in loop.latches or len(header.instrs) - 1 > ROTATE_LIMIT:
+        return False
+    if any(latch.terminator is None or latch.terminator.op != 'jmp' for latch in loop.latches):
+        return False
+    # Los temporales de la condición se renombran en cada copia: no pueden usarse fuera
+    temps = {instr.dest for instr in header.instrs if isinstance(instr.dest, Temp)}
+    return not any(value in temps for block in function.blocks if block is not header
+                   for instr in block.instrs for value in instr.uses())
+
+
+def copy_header(function, header):
+    rename = {}
+    copies = []
+    for instr in header.instrs:
+        if isinstance(instr.dest, Temp):
+            rename[instr.dest] = function.new_temp(instr.dest.type_id)
+        copies.append(instr.copy(rename))
+    return copies
+
+
+def rotate_loops(function):
+    """Rota los ciclos cuya cabecera evalúa la condición y sale del ciclo"""
+    changes = 0
+    while True:
+        loop = next((loop for loop in find_loops(function) if can_rotate(function, loop)), None)
+        if loop is None:
+            return changes
+        header = loop.header
+        # La guarda toma el lugar de la cabecera para las entradas al ciclo
+        guard = function.new_block(placed=False)
+        guard.instrs = copy_header(function, header)
+        function.blocks.insert(function.blocks.index(header), guard)
+        for pred in function.predecessors()[header]:
+            if pred not in loop.blocks:
+                terminator = pred.terminator
+                terminator.targets = [guard if target is header else target for target in terminator.targets]
+        # Cada salto de regreso se reemplaza por la condición
+        for latch in loop.latches:
+            latch.instrs[-1:] = copy_header(function, header)
+        function.remove_unreachable()
+        changes += 1
+
+
+def preheader(function, loop):
+    """Bloque que precede al ciclo y solo salta a su cabecera (se crea si no existe)"""
+    header = loop.header
+    outside = [pred for pred in function.predecessors()[header] if pred not in loop.blocks]
+    if len(outside) == 1 and outside[0].successors() == [header] and outside[0].terminator.op == 'jmp':
+        return outside[0]
+    block = function.new_block(placed=False)
+    block.instrs.append(Instr('jmp', targets=[header]))
+    function.blocks.insert(function.blocks.index(header), block)
+    for pred in outside:
+        terminator = pred.terminator
+        terminator.targets = [block if target is header else target for target in terminator.targets]
+    return block
+
+
+def hoistable(instr, defined, stores, calls):
+    if not isinstance(instr.dest, Temp):
+        return False
+    if instr.op == 'load':
+        return instr.args[0].name not in stores and not calls
+    if instr.op not in BINARY_OPS + UNARY_OPS + ('copy',):
+        return False
+    if all(isinstance(arg, Const) for arg in instr.args):
+        return False  # Lo resuelve el plegado de constantes
+    if any(is_virtual(arg) and arg in defined for arg in instr.args):
+        return False
+    if instr.op == '/' and instr.type_id == T_INT:
+        # Se ejecutará aunque el ciclo no itere: no puede fallar
+        divisor = instr.args[1]
+        return isinstance(divisor, Const) and divisor.value not in (0, -1)
+    return True
+
+
+def hoist_loop(function, loop):
+    blocks = [block for block in function.blocks if block in loop.blocks]
+    defined = set()
+    stores = set()
+    calls = False
+    for block in blocks:
+        for instr in block.instrs:
+            if instr.defined() is not None:
+                defined.add(instr.defined())
+            if instr.op == 'store':
+                stores.add(instr.dest.name)
+            calls = calls or instr.op == 'call'
+
+    hoisted = []
+    changed = True
+    while changed:
+        changed = False
+        for block in blocks:
+            kept = []
+            for instr in block.instrs:
+                if hoistable(instr, defined, stores, calls):
+                    # Un temporal tiene una sola definición: al moverla deja de
+                    # estar definido dentro del ciclo
+                    hoisted.append(instr)
+                    defined.discard(instr.dest)
+                    changed = True
+                else:
+                    kept.append(instr)
+            block.instrs = kept
+    if hoisted:
+        target = preheader(function, loop)
+        target.instrs[-1:-1] = hoisted
+    return len(hoisted)
+
+
+def hoist_invariants(function):
+    """Mueve el código invariante de cada ciclo a su preheader (internos primero)"""
+    changes = 0
+    done = set()
+    while True:
+        # Los ciclos se recalculan: un preheader nuevo forma parte del ciclo externo
+        loop = next((loop for loop in find_loops(function) if loop.header not in done), None)
+        if loop is None:
+            return changes
+        done.add(loop.header)
+        changes += hoist_loop(function, loop)
+
+
+def compare(op, a, b):
+    return {'<': a < b, '<=': a <= b, '>': a > b, '>=': a >= b, '==': a == b, '!=': a != b}[op]
+
+
+def trip_count(start, step, op, bound):
+    """Veces que se ejecuta el cuerpo de un ciclo rotado que sigue mientras
+    'i op bound', con i = start + k * step después del paso k; None si no
+    termina sin desbordarse"""
+    if not compare(op, start + step, bound):
+        count = 1
+    elif op in ('>', '>='):
+        # Ciclo descendente: el mismo cálculo con los valores negados
+        count = trip_count(-start, -step, SWAPPED[op], -bound)
+    elif op == '<' and step > 0:
+        count = -(-(bound - start) // step)
+    elif op == '<=' and step > 0:
+        count = (bound - start) // step + 1
+    elif op == '!=' and step != 0 and (bound - start) % step == 0 and (bound - start) // step > 0:
+        count = (bound - start) // step
+    elif op == '==' and step != 0:
+        count = 2
+    else:
+        return None
+    if count is None:
+        return None
+    last = start + count * step
+    return count if INT_MIN <= min(start, last) and max(start, last) <= INT_MAX else None
+
+
+def entry_value(function, loop, var):
+    """Literal entero que tiene var al entrar al ciclo, o None.
+
+    Se busca la última asignación siguiendo los bloques que llevan a la
+    cabecera mientras cada uno tenga un solo predecesor."""
+    preds = function.predecessors()
+    outside = [pred for pred in preds[loop.header] if pred not in loop.blocks]
+    if len(outside) != 1:
+        return None
+    block = outside[0]
+    seen = set()
+    while block not in seen:
+        seen.add(block)
+        for instr in reversed(block.instrs):
+            if instr.dest is var:
+                value = instr.args[0] if instr.op == 'copy' else None
+                return value.value if isinstance(value, Const) and value.type_id == T_INT else None
+        if len(preds[block]) != 1:
+            return None
+        block = preds[block][0]
+    return None
+
+
+class Induction:
+    """Variable de inducción de un ciclo con número de iteraciones conocido"""
+
+    def __init__(self, var, start, step, count, line):
+        self.var = var
+        self.start = start
+        self.step = step
+        self.count = count
+        self.line = line     # Línea de la condición del ciclo
+
+
+def find_induction(function, loop, dom):
+    """Inducción del ciclo si es interno, rotado y con una sola salida al
+    final de la iteración ('i op literal' después de 'i = i ± literal')"""
+    if len(loop.latches) != 1:
+        return None
+    latch = loop.latches[0]
+    terminator = latch.terminator
+    if terminator.op != 'br' or [target in loop.blocks for target in terminator.targets].count(True) != 1:
+        return None
+    if any(succ not in loop.blocks for block in loop.blocks if block is not latch
+           for succ in block.successors()):
+        return None
+    # Condición: comparación entera en el mismo bloque
+    condition = next((instr for instr in latch.instrs if instr.dest is terminator.args[0]), None)
+    if condition is None or condition.op not in SWAPPED or condition.type_id != T_INT:
+        return None
+    left, right = condition.args
+    op = condition.op
+    if isinstance(left, Const):
+        left, right, op = right, left, SWAPPED[op]
+    if not isinstance(left, Var) or not isinstance(right, Const):
+        return None
+    if terminator.targets[1] in loop.blocks:
+        op = NEGATED_COMPARISONS[op]
+    var = left
+    # Paso: la única asignación de var en el ciclo, en cada iteración y antes de la condición
+    definitions = [(block, instr) for block in loop.blocks for instr in block.instrs if instr.dest is var]
+    if len(definitions) != 1:
+        return None
+    block, step = definitions[0]
+    if step.op not in ('+', '-') or step.type_id != T_INT or block not in dom[latch]:
+        return None
+    if block is latch and latch.instrs.index(step) > latch.instrs.index(condition):
+        return None
+    if step.args[0] is var and isinstance(step.args[1], Const):
+        amount = step.args[1].value if step.op == '+' else -step.args[1].value
+    elif step.op == '+' and step.args[1] is var and isinstance(step.args[0], Const):
+        amount = step.args[0].value
+    else:
+        return None
+    start = entry_value(function, loop, var)
+    if start is None:
+        return None
+    count = trip_count(start, amount, op, right.value)
+    return Induction(var, start, amount, count, terminator.line) if count is not None else None
+
+
+def copy_loop(function, blocks):
+    """Copia los bloques del ciclo (con temporales nuevos); retorna original -> copia"""
+    rename = {}
+    for block in blocks:
+        for instr in block.instrs:
+            if isinstance(instr.dest, Temp):
+                rename[instr.dest] = function.new_temp(instr.dest.type_id)
+    copies = {block: function.new_block(placed=False) for block in blocks}
+    for block, copy in copies.items():
+        copy.instrs = [instr.copy(rename) for instr in block.instrs]
+        for instr in copy.instrs:
+            instr.targets = [copies.get(target, target) for target in instr.targets]
+    return copies
+
+
+class LoopUnroller:
+    """Desenrolla los ciclos internos con número de iteraciones conocido.
+
+    Si el código resultante no pasa de UNROLL_BUDGET instrucciones el ciclo
+    se reemplaza por una copia del cuerpo por iteración; si no, el cuerpo se
+    repite 'factor' veces (o las que quepan) y el ciclo original hace las
+    iteraciones que sobran. Con factor 1 solo se desenrolla por completo."""
+
+    def __init__(self, factor, budget=UNROLL_BUDGET):
+        self.factor = factor
+        self.budget = budget
+        self.done = set()       # Cabeceras de ciclos ya desenrollados
+        self.unrolled = []      # (función, línea, iteraciones, factor o None, iteraciones que sobran)
+
+    def run(self, function):
+        changes = 0
+        while True:
+            dom = dominators(function)
+            loops = find_loops(function)
+            headers = {loop.header for loop in loops}
+            candidate = None
+            for loop in loops:
+                if loop.header in self.done or any(block in headers for block in loop.blocks
+                                                   if block is not loop.header):
+                    continue
+                induction = find_induction(function, loop, dom)
+                if induction is not None and self.unroll(function, loop, induction):
+                    candidate = loop
+                    break
+            if candidate is None:
+                return changes
+            changes += 1
+
+    def unroll(self, function, loop, induction):
+        blocks = [block for block in function.blocks if block in loop.blocks]
+        cost = sum(1 for block in blocks for instr in block.instrs if not instr.is_terminator())
+        count = induction.count
+        if count * cost <= self.budget:
+            self.unroll_fully(function, loop, blocks, count)
+            self.unrolled.append((function.name, induction.line, count, None, 0))
+            return True
+        factor = min(self.factor, self.budget // max(cost, 1))
+        if factor < 2 or count < 2 * factor:
+            return False
+        self.unroll_by(function, loop, blocks, induction, factor)
+        self.unrolled.append((function.name, induction.line, count, factor, count % factor))
+        return True
+
+    def enter(self, function, loop, blocks, copies):
+        """Pone las copias antes del ciclo y les redirige las entradas"""
+        header = loop.header
+        for pred in function.predecessors()[header]:
+            if pred not in loop.blocks:
+                terminator = pred.terminator
+                terminator.targets = [copies[0][header] if target is header else target
+                                      for target in terminator.targets]
+        position = function.blocks.index(blocks[0])
+        function.blocks[position:position] = [copy[block] for copy in copies for block in blocks]
+
+    def chain(self, copies, loop):
+        """Cada copia salvo la última sigue directo a la siguiente"""
+        latch = loop.latches[0]
+        for copy, following in zip(copies, copies[1:]):
+            terminator = copy[latch].terminator
+            copy[latch].instrs[-1] = Instr('jmp', targets=[following[loop.header]], line=terminator.line)
+
+    def unroll_fully(self, function, loop, blocks, count):
+        copies = [copy_loop(function, blocks) for _ in range(count)]
+        self.chain(copies, loop)
+        latch = copies[-1][loop.latches[0]]
+        exit_block = next(target for target in latch.terminator.targets if target not in copies[-1].values())
+        latch.instrs[-1] = Instr('jmp', targets=[exit_block], line=latch.terminator.line)
+        self.enter(function, loop, blocks, copies)
+        function.remove_unreachable()
+
+    def unroll_by(self, function, loop, blocks, induction, factor):
+        copies = [copy_loop(function, blocks) for _ in range(factor)]
+        self.chain(copies, loop)
+        # El ciclo desenrollado hace las iteraciones múltiplo del factor y
+        # sigue con el original si sobran
+        latch = copies[-1][loop.latches[0]]
+        terminator = latch.terminator
+        remainder = induction.count % factor
+        exit_block = next(target for target in terminator.targets if target not in copies[-1].values())
+        end = induction.start + (induction.count - remainder) * induction.step
+        test = function.new_temp(T_INT)
+        latch.instrs[-1:] = [
+            Instr('!=', test, [induction.var, Const(end, T_INT)], type_id=T_INT, line=terminator.line),
+            Instr('br', args=[test], targets=[copies[0][loop.header], loop.header if remainder else exit_block],
+                  line=terminator.line),
+        ]
+        self.enter(function, loop, blocks, copies)
+        self.done.add(copies[0][loop.header])
+        function.remove_unreachable()
+
+    def report(self):
+        """Líneas con los ciclos desenrollados, por función"""
+        lines = []
+        for name, line, count, factor, remainder in self.unrolled:
+            how = "completo" if factor is None else f"factor {factor}"
+            if remainder:
+                how += f", {remainder} en el ciclo original"
+            lines.append(f"  {name}: ciclo de la línea {line}, {count} iteraciones, {how}")
+        return lines or ["  (ninguno)"]
@@ -4,6 +4,13 @@ from lexer import analyze_tokens, LexicalError
 from parser import Parser
 from semantic_analyzer import SemanticAnalyzer
 from code_generator import CodeGenerator
+from optimizer import ConstantFolder
+from ir import build_program
+from simulator import Simulator, SimulationError
+from pgo import Profile, collect_profile
+from elf import write_executable
+from encoder import AssemblerError
+from diagnostics import Diagnostics, LEXICAL_ERROR
 from utils import cargar_gramatica_lr, save_ast_dot, generate_png_from_dot
 
 
@@ -12,6 +19,29 @@ def main():
     parser.add_argument('archivo', nargs='?', help='Archivo de código fuente .c')
     parser.add_argument('--force-asm', action='store_true', 
                         help='Generar ASM aún con errores semánticos')
+    parser.add_argument('-O', dest='opt_level', type=int, nargs='?', const=1, default=0,
+                        metavar='NIVEL', help='Nivel de optimización (-O equivale a -O1)')
+    parser.add_argument('--inline-limit', dest='inline_threshold', type=int, metavar='N',
+                        help='Costo máximo (instrucciones de IR) de una función que se expande en línea')
+    parser.add_argument('--unroll', dest='unroll_factor', type=int, metavar='N',
+                        help='Factor de desenrollado de ciclos (0 lo desactiva; 1 solo desenrolla '
+                             'por completo los ciclos pequeños)')
+    parser.add_argument('--jobs', type=int, default=0, metavar='N',
+                        help='Procesos para generar el código de las funciones (0 usa todos los núcleos)')
+    parser.add_argument('--profile-generate', metavar='ARCHIVO',
+                        help='Ejecutar el programa en el simulador y guardar el perfil de ejecución')
+    parser.add_argument('--profile-use', metavar='ARCHIVO',
+                        help='Optimizar con un perfil guardado (requiere -O1 o más)')
+    parser.add_argument('--ir', metavar='ARCHIVO',
+                        help='Guardar la representación intermedia (después de los pases)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Ejecutar la IR antes y después de optimizar en el simulador y comparar')
+    parser.add_argument('-o', dest='executable', metavar='ARCHIVO',
+                        help='Ensamblar y generar un ejecutable ELF64 sin ensamblador externo')
+    parser.add_argument('--diagnostics', metavar='ARCHIVO',
+                        help='Exportar los diagnósticos (errores y advertencias) en JSON')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Mostrar los tokens, la traza del parser LR y la tabla de símbolos')
     args = parser.parse_args()
     
     if args.archivo:
@@ -40,18 +70,22 @@ int main(){
     c = suma(8,9);
 }"""
     
+    # Colector compartido por todas las fases
+    diagnostics = Diagnostics()
+    
     try:
         # === ANÁLISIS LÉXICO ===
         print("=== ANÁLISIS LÉXICO ===")
         tokens = analyze_tokens(code_input)
-        print("Tokens encontrados:")
-        for token in tokens:
-            print(f"  {token.tipo}('{token.lexema}') línea {token.linea}")
+        print(f"Tokens encontrados: {len(tokens)}")
+        if args.verbose:
+            for token in tokens:
+                print(f"  {token.tipo}('{token.lexema}') línea {token.linea}")
         
         print("\n=== ANÁLISIS SINTÁCTICO ===")
-        grammar_data = cargar_gramatica_lr('compilador.lr')
+        grammar_data = cargar_gramatica_lr('compilador.lr', args.verbose)
         
-        parser = Parser(grammar_data)
+        parser = Parser(grammar_data, diagnostics, args.verbose)
         ast_root = parser.parse(tokens)
         
         # Verificar errores sintácticos
@@ -81,8 +115,11 @@ int main(){
         print(f"AST construido exitosamente con raíz: {ast_root.name}")
         
         print("\n=== ANÁLISIS SEMÁNTICO ===")
-        semantic_analyzer = SemanticAnalyzer()
+        semantic_analyzer = SemanticAnalyzer(diagnostics, args.verbose)
         semantic_analyzer.analyze(ast_root)
+        if args.verbose:
+            semantic_analyzer.print_symbol_table()
+        semantic_analyzer.print_results()
         
         print("\n=== GENERACIÓN DE ARCHIVOS ===")
         try:
@@ -98,11 +135,71 @@ int main(){
         
         # Generar código ensamblador si no hay errores semánticos O si se fuerza
         if not has_semantic_errors or args.force_asm:
+            # IR sin optimizar, como referencia para --verify
+            needs_reference = args.verify or args.profile_generate
+            reference = build_program(ast_root, semantic_analyzer.symbol_table) if needs_reference else None
+            
+            profile = None
+            if args.profile_use:
+                try:
+                    profile = Profile.load(args.profile_use)
+                    print(f"\nPerfil cargado de {args.profile_use}: {profile.summary()}")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"\nNo se pudo leer el perfil {args.profile_use}: {e}")
+            
+            if args.opt_level > 0:
+                print(f"\n=== OPTIMIZACIÓN -O{args.opt_level} ===")
+                folder = ConstantFolder()
+                folder.optimize(ast_root)
+                print(f"Expresiones plegadas: {folder.folded}, simplificadas: {folder.simplified}")
+            
             print("\n=== GENERACIÓN DE CÓDIGO ASM ===")
             try:
-                code_generator = CodeGenerator()
+                code_generator = CodeGenerator(opt_level=args.opt_level,
+                                               inline_threshold=args.inline_threshold,
+                                               profile=profile,
+                                               unroll_factor=args.unroll_factor,
+                                               jobs=args.jobs)
                 asm_code = code_generator.generate_code(ast_root, semantic_analyzer.symbol_table)
                 
+                if args.ir:
+                    with open(args.ir, 'w', encoding='utf-8') as f:
+                        f.write(code_generator.program.dump())
+                    print(f"IR guardada en: {args.ir}")
+                
+                if args.opt_level > 0:
+                    print(f"Pases de optimización (-O{args.opt_level}):")
+                    for line in code_generator.pass_manager.report():
+                        print(line)
+                    pass_manager = code_generator.pass_manager
+                    if pass_manager.evaluator is not None:
+                        print("Llamadas evaluadas en compilación:")
+                        for line in pass_manager.evaluator.report():
+                            print(line)
+                    if pass_manager.inliner is not None:
+                        print("Llamadas expandidas en línea:")
+                        for line in pass_manager.inliner.report():
+                            print(line)
+                    if pass_manager.unroller is not None:
+                        print("Ciclos desenrollados:")
+                        for line in pass_manager.unroller.report():
+                            print(line)
+                    if pass_manager.removed_functions or pass_manager.removed_globals:
+                        print("Definiciones sin uso eliminadas:")
+                        if pass_manager.removed_functions:
+                            print(f"  Funciones: {', '.join(pass_manager.removed_functions)}")
+                        if pass_manager.removed_globals:
+                            print(f"  Globales: {', '.join(pass_manager.removed_globals)}")
+                
+                print("Reglas de selección de instrucciones:")
+                for line in code_generator.selector.report():
+                    print(line)
+                
+                if code_generator.peephole is not None:
+                    print("Reglas peephole aplicadas:")
+                    for line in code_generator.peephole.report():
+                        print(line)
+                
                 # Guardar código ensamblador en archivo
                 with open('output.s', 'w', encoding='utf-8') as f:
                     f.write(asm_code)
@@ -115,6 +212,41 @@ int main(){
                 if len(lines) > 15:
                     print(f"  ... ({len(lines) - 15} líneas más)")
                 
+                if args.executable:
+                    try:
+                        size = write_executable(asm_code, args.executable)
+                    except AssemblerError as e:
+                        print(f"No se pudo ensamblar: {e}")
+                    else:
+                        print(f"Ejecutable generado en: {args.executable} ({size} bytes)")
+                
+                if args.profile_generate:
+                    print("\n=== PERFIL (simulador de la IR) ===")
+                    try:
+                        generated, result = collect_profile(reference)
+                    except SimulationError as e:
+                        print(f"No se pudo ejecutar el programa: {e}")
+                    else:
+                        generated.save(args.profile_generate)
+                        print(f"main() = {result}; perfil guardado en {args.profile_generate}: "
+                              f"{generated.summary()}")
+                
+                if args.verify:
+                    print("\n=== VERIFICACIÓN (simulador de la IR) ===")
+                    # Se comparan el valor de main y lo que el programa imprime
+                    unoptimized = Simulator(reference)
+                    optimized = Simulator(code_generator.program)
+                    try:
+                        before = unoptimized.run()
+                        after = optimized.run()
+                    except SimulationError as e:
+                        print(f"No se pudo simular: {e}")
+                    else:
+                        same = before == after and unoptimized.output == optimized.output
+                        status = "coinciden" if same else "NO coinciden"
+                        print(f"main() sin optimizar: {before}, con -O{args.opt_level}: {after}, "
+                              f"{len(optimized.output)} valores impresos ({status})")
+                
             except Exception as e:
                 print(f'Error al generar código ensamblador: {e}')
                 import traceback
@@ -135,6 +267,7 @@ int main(){
             sys.exit(1)
             
     except LexicalError as le:
+        diagnostics.error(LEXICAL_ERROR, str(le), line=le.line, column=le.column)
         print(f"\nX Error léxico en línea {le.line}, columna {le.column}: {le}")
         try:
             lines = code_input.splitlines()
@@ -149,6 +282,10 @@ int main(){
             
     except Exception as e:
         print(f"\nX Error inesperado: {e}")
+    
+    finally:
+        if args.diagnostics:
+            diagnostics.write_json(args.diagnostics)
 
 
 if __name__ == "__main__":
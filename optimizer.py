@@ -0,0 +1,218 @@
+# Optimizaciones sobre el AST ya anotado por el analizador semántico.
+# Se ejecutan entre el análisis semántico y la generación de código, y
+# conservan las anotaciones (type_id, symbol) que usa el generador.
+
+import math
+
+from lexer import Token
+from parser import Node
+from layout import INT_BITS, INT_MIN, INT_MAX
+from type_system import T_INT, T_FLOAT
+
+
+def wrap_int(value):
+    """Reduce un entero al rango de int con signo (32 bits, aritmética del destino)"""
+    value &= (1 << INT_BITS) - 1
+    return value - (1 << INT_BITS) if value > INT_MAX else value
+
+
+def float_to_int(value):
+    """Conversión de cvttsd2si: trunca; fuera de rango (o NaN) da el entero indefinido"""
+    if math.isnan(value) or not INT_MIN - 1 < value < INT_MAX + 1:
+        return INT_MIN
+    return int(value)
+
+
+def c_div(left, right):
+    """División entera truncada hacia cero, como idiv"""
+    quotient = abs(left) // abs(right)
+    return wrap_int(quotient if (left < 0) == (right < 0) else -quotient)
+
+
+def evaluate_unary(op, operand_type, value):
+    """Valor de '-' o '!' sobre un literal: (tipo, valor)"""
+    if op == '-':
+        return operand_type, wrap_int(-value) if operand_type == T_INT else -value
+    return T_INT, int(value == 0)
+
+
+def evaluate_binary(op, left_type, a, right_type, b):
+    """Valor de una operación binaria entre literales: (tipo, valor) o None.
+
+    Los enteros siguen la aritmética del destino (32 bits, idiv trunca
+    hacia cero); la división entre cero no se pliega."""
+    if op in ('+', '-', '*', '/'):
+        if T_FLOAT in (left_type, right_type):
+            a, b = float(a), float(b)
+            if op == '/':
+                if b == 0.0:
+                    return None  # Se conserva el comportamiento en ejecución
+                return T_FLOAT, a / b
+            return T_FLOAT, {'+': a + b, '-': a - b, '*': a * b}[op]
+        if op == '/':
+            if b == 0:
+                return None  # idiv por cero debe fallar en ejecución
+            return T_INT, c_div(a, b)
+        return T_INT, wrap_int({'+': a + b, '-': a - b, '*': a * b}[op])
+    if op == '<':
+        return T_INT, int(a < b)
+    if op == '<=':
+        return T_INT, int(a <= b)
+    if op == '>':
+        return T_INT, int(a > b)
+    if op == '>=':
+        return T_INT, int(a >= b)
+    if op == '==':
+        return T_INT, int(a == b)
+    if op == '!=':
+        return T_INT, int(a != b)
+    if op == '&&':
+        return T_INT, int(a != 0 and b != 0)
+    if op == '||':
+        return T_INT, int(a != 0 or b != 0)
+    return None
+
+
+def first_token(node):
+    """Primer token de un subárbol (para conservar la posición al reemplazarlo)"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.token is not None:
+            return current.token
+        stack.extend(reversed(current.children))
+    return None
+
+
+def has_call(node):
+    """Indica si un subárbol contiene una llamada a función"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.name == 'LlamadaFunc':
+            return True
+        stack.extend(current.children)
+    return False
+
+
+def constant_value(node):
+    """Retorna (tipo, valor) si la expresión es un literal, o None"""
+    while True:
+        if node.name == 'Expresion' and len(node.children) == 1:
+            node = node.children[0]
+        elif node.name == 'Expresion' and len(node.children) == 3 and node.children[0].name == '(':
+            node = node.children[1]
+        elif node.name == 'Termino' and len(node.children) == 1:
+            node = node.children[0]
+        else:
+            break
+    if node.token is None:
+        return None
+    if node.token.tipo == 'entero':
+        return T_INT, wrap_int(int(node.token.lexema))
+    if node.token.tipo == 'real':
+        return T_FLOAT, float(node.token.lexema)
+    return None
+
+
+class ConstantFolder:
+    """Plegado de constantes y simplificación algebraica de expresiones"""
+
+    def __init__(self):
+        self.folded = 0        # Expresiones reemplazadas por un literal
+        self.simplified = 0    # Identidades aplicadas (x+0, x*1, x*0, ...)
+
+    def optimize(self, ast_root):
+        self.visit(ast_root)
+        return ast_root
+
+    def visit(self, node):
+        # Postorden: los operandos se pliegan antes que su operador
+        for child in node.children:
+            self.visit(child)
+        if node.name == 'Expresion' and node.type_id in (T_INT, T_FLOAT):
+            self.fold_expression(node)
+
+    def fold_expression(self, node):
+        result = self.evaluate(node)
+        if result is not None:
+            result_type, value = result
+            if result_type == node.type_id and self.replace_with_constant(node, result_type, value):
+                self.folded += 1
+            return
+        if node.type_id == T_INT and len(node.children) == 3 and node.children[0].name != '(':
+            self.simplify(node)
+
+    def evaluate(self, node):
+        # Valor constante de la expresión si todos sus operandos son literales
+        children = node.children
+        if len(children) == 1 or (len(children) == 3 and children[0].name == '('):
+            return None  # Ya es un literal o un paréntesis; nada que plegar
+        if len(children) == 2:
+            operand = constant_value(children[1])
+            if operand is None:
+                return None
+            operand_type, value = operand
+            return evaluate_unary(children[0].token.lexema, operand_type, value)
+        if len(children) != 3:
+            return None
+
+        left = constant_value(children[0])
+        right = constant_value(children[2])
+        if left is None or right is None:
+            return None
+        return evaluate_binary(children[1].token.lexema, left[0], left[1], right[0], right[1])
+
+    def simplify(self, node):
+        # Identidades enteras; x*0 solo si x no tiene llamadas (efectos)
+        left, operator, right = node.children
+        op = operator.token.lexema
+        left_value = constant_value(left)
+        right_value = constant_value(right)
+        a = left_value[1] if left_value and left_value[0] == T_INT else None
+        b = right_value[1] if right_value and right_value[0] == T_INT else None
+
+        keep = None
+        if op == '+' and b == 0:
+            keep = left
+        elif op == '+' and a == 0:
+            keep = right
+        elif op == '-' and b == 0:
+            keep = left
+        elif op == '*' and b == 1:
+            keep = left
+        elif op == '*' and a == 1:
+            keep = right
+        elif op == '/' and b == 1:
+            keep = left
+        elif op == '*' and (b == 0 and not has_call(left) or a == 0 and not has_call(right)):
+            if self.replace_with_constant(node, T_INT, 0):
+                self.simplified += 1
+            return
+
+        if keep is not None and keep.type_id == T_INT:
+            node.children = keep.children
+            self.simplified += 1
+
+    def replace_with_constant(self, node, type_id, value):
+        # Convierte la expresión en Expresion -> Termino -> literal
+        if type_id == T_FLOAT:
+            if not math.isfinite(value):
+                return False
+            lexema = repr(value)
+            if 'e' in lexema or '.' not in lexema:
+                return False  # Forma que NASM no acepta como literal real
+            tipo = 'real'
+        else:
+            lexema = str(value)
+            tipo = 'entero'
+        position = first_token(node)
+        token = Token(tipo, lexema, position.linea if position else 0,
+                      position.columna if position else 0)
+        literal = Node(tipo, Node.TERMINAL, token)
+        literal.type_id = type_id
+        term = Node('Termino', Node.NO_TERMINAL)
+        term.type_id = type_id
+        term.add_child(literal)
+        node.children = [term]
+        return True
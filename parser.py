@@ -1,4 +1,7 @@
 from lexer import Token, LexicalError
+from type_system import T_UNKNOWN
+import diagnostics
+from diagnostics import Diagnostics
 
 
 class Node:
@@ -10,6 +13,9 @@ class Node:
         self.state = state
         self.token = token
         self.children = []
+        # Anotaciones del analizador semántico para el generador de código
+        self.type_id = T_UNKNOWN
+        self.symbol = None
     
     def add_child(self, child):
         if child is not None:
@@ -23,7 +29,7 @@ class Node:
 
 
 class Parser:
-    def __init__(self, grammar_data):
+    def __init__(self, grammar_data, collector=None, verbose=False):
         self.grammar = grammar_data
         self.tabla_lr = grammar_data['tabla_lr']
         self.token_a_columna = grammar_data['token_a_columna']
@@ -38,8 +44,10 @@ class Parser:
         self.pila_nodos = []
         
         # Variables de estado
-        self.errores = []
+        self.diagnostics = collector or Diagnostics()
+        self.errores = []  # Registros de diagnóstico de este parser
         self.raiz_ast = None
+        self.verbose = verbose  # Traza de cada paso del parsing
         
     def parse(self, tokens):
         """
@@ -51,7 +59,7 @@ class Parser:
         Returns:
             Node: Nodo raíz del AST si el parsing es exitoso, None en caso contrario
         """
-        print("\n=== INICIO DEL PARSING LR ===")
+        self._trace("\n=== INICIO DEL PARSING LR ===")
         
         # Reiniciar estado
         self.errores = []
@@ -95,22 +103,22 @@ class Parser:
             token_actual = tokens_con_eof[i]
             estado_actual = self.pila_estados[-1]
             
-            print(f"\nPaso {i + 1}:")
-            print(f"  Token actual: {token_actual.tipo} ('{token_actual.lexema}')")
-            print(f"  Estado actual: {estado_actual}")
-            print(f"  Pila estados: {self.pila_estados}")
+            self._trace(f"\nPaso {i + 1}:")
+            self._trace(f"  Token actual: {token_actual.tipo} ('{token_actual.lexema}')")
+            self._trace(f"  Estado actual: {estado_actual}")
+            self._trace(f"  Pila estados: {self.pila_estados}")
             
             # Obtener columna del token en la tabla LR usando equivalencias
             nombre_token = equivalencias.get(token_actual.tipo, token_actual.tipo)
             columna = self.token_a_columna.get(nombre_token)
             if columna is None:
-                self._registrar_error(f"Token '{token_actual.tipo}' no tiene columna asignada en la tabla LR (buscado como '{nombre_token}')")
+                self._registrar_error(f"Token '{token_actual.tipo}' no tiene columna asignada en la tabla LR (buscado como '{nombre_token}')", token_actual)
                 return None
             
             # Obtener acción de la tabla LR
             try:
                 accion = self.tabla_lr[estado_actual][columna]
-                print(f"  Acción LR[{estado_actual}][{columna}]: {accion}")
+                self._trace(f"  Acción LR[{estado_actual}][{columna}]: {accion}")
             except IndexError:
                 self._registrar_error(f"Estado o columna fuera de rango: estado={estado_actual}, columna={columna}")
                 return None
@@ -120,59 +128,18 @@ class Parser:
                 i += 1  # Avanzar al siguiente token solo en SHIFT
                 
             elif accion < 0:  # REDUCE
-                # Lógica de candidatos múltiples como en el original
-                candidatos = []
-                for offset in (1, 2):
-                    idx_cand = -accion - offset
-                    if 0 <= idx_cand < len(self.lonRegla):
-                        lon_cand = self.lonRegla[idx_cand]
-                        nt_cand = self.nombreRegla[idx_cand]
-                        
-                        # Simular pop para verificar si el candidato es válido
-                        temp_states = self.pila_estados.copy()
-                        for _ in range(lon_cand):
-                            if temp_states:
-                                temp_states.pop()
-                        if not temp_states:
-                            continue
-                            
-                        estado_goto_cand = temp_states[-1]
-                        col_goto_cand = self.nonterminal_a_columna.get(nt_cand)
-                        if col_goto_cand is None:
-                            continue
-                        
-                        try:
-                            goto_cand = self.tabla_lr[estado_goto_cand][col_goto_cand]
-                            if goto_cand >= 0:  # Solo considerar GOTOs válidos
-                                accion_despues = self.tabla_lr[goto_cand][columna] if goto_cand < len(self.tabla_lr) else None
-                                candidatos.append((idx_cand, lon_cand, estado_goto_cand, goto_cand, accion_despues, offset))
-                        except Exception:
-                            continue
-
-                print(f"[LR][REDUCE] Candidatos válidos: {candidatos}")
-
-                # Seleccionar el mejor candidato basándose en la gramática
-                elegido = None
-                
-                if candidatos:
-                    # Filtrar candidatos con GOTO válido (no 0)
-                    candidatos_validos = [c for c in candidatos if c[3] != 0]
-                    
-                    if candidatos_validos:
-                        # Preferir reglas más largas entre los válidos
-                        elegido = max(candidatos_validos, key=lambda x: (x[1], -x[0]))
-                    else:
-                        # Si no hay válidos, tomar el primero
-                        elegido = candidatos[0]
-
-                if elegido is None:
-                    # Fallback: usar el cálculo directo
-                    num_regla = max(0, min(-accion - 1, len(self.lonRegla) - 1))
-                    lon = self.lonRegla[num_regla]
+                # La tabla codifica REDUCE con la regla r como -(r + 2) y la
+                # aceptación (regla 0) como -1
+                if accion == -1:
+                    num_regla = 0
                 else:
-                    num_regla, lon, estado_goto_sim, goto_sim, accion_despues, used_offset = elegido
+                    num_regla = -accion - 2
+                if num_regla >= len(self.lonRegla):
+                    self._registrar_error(f"Índice de regla fuera de rango: {num_regla}", token_actual)
+                    return None
+                lon = self.lonRegla[num_regla]
 
-                print(f"[LR][REDUCE] Regla elegida: R{num_regla+1} - {self.nombreRegla[num_regla]} con longitud {lon}")
+                self._trace(f"[LR][REDUCE] Regla elegida: R{num_regla+1} - {self.nombreRegla[num_regla]} con longitud {lon}")
 
                 if not self._reduce_original(num_regla, lon):
                     return None
@@ -183,17 +150,17 @@ class Parser:
                 # No incrementar i - el mismo token se procesa con el nuevo estado
                     
             elif accion == 0:  # ERROR
-                self._registrar_error(f"Error sintáctico en token '{token_actual.lexema}' (línea {token_actual.linea})")
+                self._registrar_error(f"Error sintáctico en token '{token_actual.lexema}' (línea {token_actual.linea})", token_actual)
                 return None
                 
             else:  # ACCEPT (debería ser una condición especial)
-                print("  ACEPTADO!")
+                self._trace("  ACEPTADO!")
                 break
         
         # Verificar si el parsing fue exitoso
         if len(self.pila_nodos) == 1:
             self.raiz_ast = self.pila_nodos[0]
-            print(f"\nParsing exitoso. AST creado con raíz: {self.raiz_ast.name}")
+            self._trace(f"\nParsing exitoso. AST creado con raíz: {self.raiz_ast.name}")
             return self.raiz_ast
         else:
             self._registrar_error("Error: La pila no contiene exactamente un nodo al final del parsing")
@@ -213,7 +180,7 @@ class Parser:
     
     def _shift(self, nuevo_estado, token):
         """Realiza una operación SHIFT"""
-        print(f"    SHIFT: Estado {nuevo_estado}")
+        self._trace(f"    SHIFT: Estado {nuevo_estado}")
         
         # Crear nodo terminal
         nodo_terminal = Node(token.tipo, Node.TERMINAL, token)
@@ -224,7 +191,7 @@ class Parser:
     
     def _reduce_original(self, num_regla, lon):
         """Realiza una operación REDUCE usando la lógica original"""
-        print(f"    REDUCE: Regla {num_regla} ({self.nombreRegla[num_regla]}) - Longitud {lon}")
+        self._trace(f"    REDUCE: Regla {num_regla} ({self.nombreRegla[num_regla]}) - Longitud {lon}")
         
         hijos = []
         for _ in range(lon):
@@ -235,12 +202,12 @@ class Parser:
 
         # Si la regla elegida es la regla 0 se interpreta como aceptación
         if num_regla == 0:
-            print("[LR] R1: programa -> Definiciones (Regla de aceptación)")
+            self._trace("[LR] R1: programa -> Definiciones (Regla de aceptación)")
             nt = self.nombreRegla[num_regla]
             nodo_final = Node(nt, Node.NO_TERMINAL)
             for hijo in hijos:
                 nodo_final.add_child(hijo)
-            print(f"[LR] AST raíz creado: {nodo_final.name} con {len(hijos)} hijos")
+            self._trace(f"[LR] AST raíz creado: {nodo_final.name} con {len(hijos)} hijos")
             self.raiz_ast = nodo_final
             return True  # Indicar que la parsing ha terminado exitosamente
 
@@ -249,10 +216,10 @@ class Parser:
         for hijo in hijos:
             nodo.add_child(hijo)
         
-        print(f"[LR] Nodo creado: {nt} con {len(hijos)} hijos")
+        self._trace(f"[LR] Nodo creado: {nt} con {len(hijos)} hijos")
         if hijos:
             for i, hijo in enumerate(hijos):
-                print(f"  hijo[{i}]: {hijo.name}")
+                self._trace(f"  hijo[{i}]: {hijo.name}")
         
         # R8: ListaVar ::= , identificador ListaVar - el orden correcto es Coma, Identificador, ListaVar
         if num_regla == 7 and len(hijos) == 3:  # R8 
@@ -261,7 +228,7 @@ class Parser:
             nodo.add_child(hijos[1])  # Coma
             nodo.add_child(hijos[0])  # Identificador
             nodo.add_child(hijos[2])  # ListaVar
-            print(f"[LR] Nodo R8 reordenado: {nt} - Coma, Identificador, ListaVar")
+            self._trace(f"[LR] Nodo R8 reordenado: {nt} - Coma, Identificador, ListaVar")
         
         # Para producciones recursivas como "Definiciones -> Definicion Definiciones"
         elif (len(hijos) >= 2 and hijos[1].name == nt and 
@@ -271,7 +238,7 @@ class Parser:
             nodo.add_child(hijos[0])
             for hijo in hijos[1].children:
                 nodo.add_child(hijo)
-            print(f"[LR] Nodo recursivo combinado: {nt} ahora tiene {len(nodo.children)} hijos")
+            self._trace(f"[LR] Nodo recursivo combinado: {nt} ahora tiene {len(nodo.children)} hijos")
         
         if not self.pila_estados:
             self._registrar_error("Error: Pila de estados vacía durante GOTO")
@@ -284,11 +251,11 @@ class Parser:
             return False
         
         goto = self.tabla_lr[estado_goto][col_goto]
-        print(f"[LR] GOTO: Estado: {estado_goto}, NoTerminal: {nt}, Columna: {col_goto}, Goto: {goto}")
+        self._trace(f"[LR] GOTO: Estado: {estado_goto}, NoTerminal: {nt}, Columna: {col_goto}, Goto: {goto}")
         
         if goto == 0:
-            print(f"[LR] ERROR: GOTO devuelve 0 - revisar tabla LR")
-            print(f"[LR] Estado actual: {estado_goto}, No terminal: {nt}")
+            self._trace(f"[LR] ERROR: GOTO devuelve 0 - revisar tabla LR")
+            self._trace(f"[LR] Estado actual: {estado_goto}, No terminal: {nt}")
             return False
             
         self.pila_estados.append(goto)
@@ -304,7 +271,7 @@ class Parser:
         longitud = self.lonRegla[regla_idx]
         nombre_produccion = self.nombreRegla[regla_idx]
         
-        print(f"    REDUCE: Regla {regla_idx} ({nombre_produccion}) - Longitud {longitud}")
+        self._trace(f"    REDUCE: Regla {regla_idx} ({nombre_produccion}) - Longitud {longitud}")
         
         # Verificar que tenemos suficientes elementos en las pilas para producciones no-epsilon
         if longitud > 0 and (longitud > len(self.pila_estados) or longitud > len(self.pila_nodos)):
@@ -329,7 +296,7 @@ class Parser:
         
         # Verificar si es la regla de aceptación (regla 0)
         if regla_idx == 0:
-            print(f"    ACEPTACIÓN: {nombre_produccion}")
+            self._trace(f"    ACEPTACIÓN: {nombre_produccion}")
             self.pila_nodos.append(nodo_nt)
             return True
         
@@ -344,7 +311,7 @@ class Parser:
         estado_actual = self.pila_estados[-1]
         columna_goto = self._obtener_columna_nonterminal(nombre_produccion)
         
-        print(f"    [DEBUG GOTO] Estado actual: {estado_actual}, Columna: {columna_goto}")
+        self._trace(f"    [DEBUG GOTO] Estado actual: {estado_actual}, Columna: {columna_goto}")
         
         if columna_goto == -1:
             self._registrar_error(f"No terminal no encontrado en tabla GOTO: {nombre_produccion}")
@@ -352,8 +319,8 @@ class Parser:
         
         try:
             nuevo_estado = self.tabla_lr[estado_actual][columna_goto]
-            print(f"    [DEBUG GOTO] tabla_lr[{estado_actual}][{columna_goto}] = {nuevo_estado}")
-            print(f"    GOTO: Estado {nuevo_estado}")
+            self._trace(f"    [DEBUG GOTO] tabla_lr[{estado_actual}][{columna_goto}] = {nuevo_estado}")
+            self._trace(f"    GOTO: Estado {nuevo_estado}")
             
             # En algunos casos, GOTO puede ser 0 sin ser error
             # Continuamos con el parsing
@@ -364,14 +331,21 @@ class Parser:
             self._registrar_error(f"Error en GOTO: índices fuera de rango")
             return False
     
-    def _registrar_error(self, mensaje):
-        """Registra un error de parsing"""
-        self.errores.append(mensaje)
-        print(f"[ERROR] {mensaje}")
+    def _trace(self, mensaje):
+        """Imprime un paso del parsing si se pidió la traza"""
+        if self.verbose:
+            print(mensaje)
+    
+    def _registrar_error(self, mensaje, token=None):
+        """Registra un error de parsing en el colector de diagnósticos"""
+        linea, columna = (token.linea, token.columna) if token is not None else (None, None)
+        registro = self.diagnostics.error(diagnostics.SYNTAX_ERROR, mensaje,
+                                          line=linea, column=columna)
+        self.errores.append(registro)
     
     def obtener_errores(self):
         """Retorna la lista de errores encontrados durante el parsing"""
-        return self.errores
+        return [registro.message for registro in self.errores]
     
     def tiene_errores(self):
         """Verifica si hubo errores durante el parsing"""
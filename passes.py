@@ -0,0 +1,535 @@
+# Pases de optimización sobre la IR (ir.py) y el administrador que los
+# ejecuta según el nivel -O. Cada pase recibe una función y retorna el
+# número de cambios que hizo; el administrador acumula cambios y tiempo
+# por pase para el reporte.
+
+import math
+import time
+
+from ir import (Const, Temp, Var, Global, Instr, is_virtual, BINARY_OPS,
+                COMMUTATIVE_OPS, SWAPPED_COMPARISONS)
+from dataflow import Liveness
+from loops import rotate_loops, hoist_invariants, LoopUnroller, UNROLL_FACTORS
+from inliner import Inliner, INLINE_THRESHOLDS
+from pgo import order_blocks
+from optimizer import evaluate_unary, evaluate_binary, float_to_int
+from simulator import Simulator, SimulationError
+from type_system import T_INT, T_FLOAT
+
+
+def fold_constants(function):
+    """Evalúa las operaciones con operandos literales y las bifurcaciones fijas.
+
+    Un temporal que resulta constante se reemplaza en las instrucciones
+    que siguen, así una cadena de operaciones se pliega en una pasada. Una
+    variable con valor literal se reemplaza hasta el final del bloque o
+    hasta que se vuelve a asignar (como en un ciclo desenrollado)."""
+    changes = 0
+    constants = {}
+    for block in function.blocks:
+        known = {}
+        for instr in block.instrs:
+            args = instr.args
+            for i, arg in enumerate(args):
+                if isinstance(arg, Temp) and arg in constants:
+                    args[i] = constants[arg]
+                    changes += 1
+                elif isinstance(arg, Var) and arg in known:
+                    args[i] = known[arg]
+                    changes += 1
+            if isinstance(instr.dest, Var):
+                known.pop(instr.dest, None)
+            if instr.op == 'copy' and isinstance(args[0], Const):
+                if isinstance(instr.dest, Temp):
+                    constants[instr.dest] = args[0]
+                elif isinstance(instr.dest, Var):
+                    known[instr.dest] = args[0]
+            if instr.op == 'br' and isinstance(args[0], Const):
+                target = instr.targets[0] if args[0].value != 0 else instr.targets[1]
+                instr.op, instr.args, instr.targets = 'jmp', [], [target]
+                changes += 1
+                continue
+            if not args or not all(isinstance(arg, Const) for arg in args):
+                continue
+            result = None
+            if instr.op in BINARY_OPS:
+                result = evaluate_binary(instr.op, args[0].type_id, args[0].value,
+                                         args[1].type_id, args[1].value)
+            elif instr.op in ('neg', '!'):
+                result = evaluate_unary('-' if instr.op == 'neg' else '!', args[0].type_id, args[0].value)
+            elif instr.op == 'i2f':
+                result = T_FLOAT, float(args[0].value)
+            elif instr.op == 'f2i':
+                result = T_INT, float_to_int(args[0].value)
+            if result is None or result[0] != instr.dest.type_id:
+                continue
+            instr.op, instr.args, instr.type_id = 'copy', [Const(result[1], result[0])], result[0]
+            if isinstance(instr.dest, Temp):
+                constants[instr.dest] = instr.args[0]
+            elif isinstance(instr.dest, Var):
+                known[instr.dest] = instr.args[0]
+            changes += 1
+    return changes
+
+
+def propagate_copies(function):
+    """Reemplaza los usos de una copia por su origen.
+
+    Dentro de cada bloque se siguen las copias 'a = b' hasta que a o b se
+    redefinen. Los temporales tienen una sola definición, así que una copia
+    de un literal a un temporal se propaga a toda la función."""
+    changes = 0
+    global_copies = {}
+    for instr in function.instructions():
+        if (instr.op == 'copy' and isinstance(instr.dest, Temp)
+                and isinstance(instr.args[0], (Const, Temp))):
+            global_copies[instr.dest] = instr.args[0]
+
+    def resolve(value, copies):
+        seen = 0
+        while (value in copies or value in global_copies) and seen < 32:
+            value = copies[value] if value in copies else global_copies[value]
+            seen += 1
+        return value
+
+    for block in function.blocks:
+        copies = {}
+        for instr in block.instrs:
+            for i, arg in enumerate(instr.args):
+                if is_virtual(arg):
+                    replacement = resolve(arg, copies)
+                    if replacement is not arg:
+                        instr.args[i] = replacement
+                        changes += 1
+            dest = instr.defined()
+            if dest is None:
+                continue
+            # La redefinición invalida las copias hacia y desde dest
+            copies.pop(dest, None)
+            for key in [key for key, source in copies.items() if source is dest]:
+                del copies[key]
+            if instr.op == 'copy' and instr.args[0] is not dest:
+                copies[dest] = instr.args[0]
+    return changes
+
+
+def _value_key(value):
+    if isinstance(value, Const):
+        return ('c', value.type_id, value.value)
+    if isinstance(value, Global):
+        return ('g', value.name)
+    return ('v', id(value))
+
+
+def eliminate_common_subexpressions(function):
+    """Numeración de valores local: una expresión ya calculada en el bloque se reusa.
+
+    Las lecturas de globales se reusan hasta el siguiente 'store' a esa
+    global o la siguiente llamada; un 'store' hace disponible su valor para
+    las lecturas que le siguen."""
+    changes = 0
+    for block in function.blocks:
+        available = {}    # Clave de la expresión -> valor que la contiene
+        for instr in block.instrs:
+            key = None
+            if instr.op in BINARY_OPS:
+                left, right = instr.args
+                op = instr.op
+                if _value_key(right) < _value_key(left):
+                    if op in COMMUTATIVE_OPS:
+                        left, right = right, left
+                    elif op in SWAPPED_COMPARISONS:
+                        left, right, op = right, left, SWAPPED_COMPARISONS[op]
+                key = (op, instr.type_id, _value_key(left), _value_key(right))
+            elif instr.op in ('neg', '!', 'i2f', 'f2i'):
+                key = (instr.op, instr.type_id, _value_key(instr.args[0]))
+            elif instr.op == 'load':
+                key = ('load', instr.args[0].name)
+
+            if key is not None and key in available:
+                instr.op, instr.args = 'copy', [available[key]]
+                instr.type_id = instr.dest.type_id
+                changes += 1
+                key = None
+
+            if instr.op == 'call':
+                for stale in [k for k in available if k[0] == 'load']:
+                    del available[stale]
+            elif instr.op == 'store':
+                available.pop(('load', instr.dest.name), None)
+                if isinstance(instr.args[0], Const) or is_virtual(instr.args[0]):
+                    available[('load', instr.dest.name)] = instr.args[0]
+
+            dest = instr.defined()
+            if dest is not None:
+                # Se invalidan las expresiones que leen dest o que viven en él
+                dest_key = _value_key(dest)
+                for stale in [k for k, holder in available.items()
+                              if holder is dest or dest_key in k[2:]]:
+                    del available[stale]
+                if key is not None and dest_key not in key[2:]:
+                    available[key] = dest
+    return changes
+
+
+def eliminate_dead_code(function):
+    """Elimina instrucciones sin efectos cuyo resultado no se usa y bloques inalcanzables"""
+    changes = function.remove_unreachable()
+    while True:
+        removed = 0
+        liveness = Liveness(function)
+        for block in function.blocks:
+            live_after = liveness.instruction_live_out(block)
+            kept = []
+            for instr, live in zip(block.instrs, live_after):
+                dest = instr.defined()
+                if not instr.has_side_effects() and (
+                        dest is None or not live & (1 << liveness.index[dest])
+                        or (instr.op == 'copy' and instr.args[0] is dest)):
+                    removed += 1
+                    continue
+                kept.append(instr)
+            block.instrs = kept
+        changes += removed
+        if not removed:
+            return changes
+
+
+def thread_jumps(function):
+    """Simplifica el grafo de flujo.
+
+    - Un salto a un bloque que solo salta se redirige al destino final.
+    - Un salto a un bloque que solo retorna se reemplaza por el retorno.
+    - 'br' con ambos destinos iguales se vuelve 'jmp'.
+    - Un bloque con un solo predecesor que salta a él se une a ese predecesor."""
+    changes = 0
+
+    def final_target(block):
+        seen = set()
+        while (len(block.instrs) == 1 and block.instrs[0].op == 'jmp'
+               and block not in seen):
+            seen.add(block)
+            block = block.instrs[0].targets[0]
+        return block
+
+    for block in function.blocks:
+        terminator = block.terminator
+        if terminator is None:
+            continue
+        for i, target in enumerate(terminator.targets):
+            final = final_target(target)
+            if final is not target:
+                terminator.targets[i] = final
+                changes += 1
+        if terminator.op == 'br' and terminator.targets[0] is terminator.targets[1]:
+            terminator.op, terminator.args = 'jmp', []
+            terminator.targets = terminator.targets[:1]
+            changes += 1
+        if terminator.op == 'jmp':
+            target = terminator.targets[0]
+            if len(target.instrs) == 1 and target.instrs[0].op == 'ret' and target is not block:
+                ret = target.instrs[0]
+                block.instrs[-1] = Instr('ret', None, list(ret.args), type_id=ret.type_id, line=ret.line)
+                changes += 1
+
+    changes += function.remove_unreachable()
+
+    merged = True
+    while merged:
+        merged = False
+        predecessors = function.predecessors()
+        for block in function.blocks:
+            terminator = block.terminator
+            if terminator is None or terminator.op != 'jmp':
+                continue
+            target = terminator.targets[0]
+            if target is block or target is function.entry or len(predecessors[target]) != 1:
+                continue
+            block.instrs = block.instrs[:-1] + target.instrs
+            function.blocks.remove(target)
+            changes += 1
+            merged = True
+            break
+    return changes
+
+
+def eliminate_tail_recursion(function):
+    """Convierte las llamadas recursivas en posición de cola en un salto al inicio.
+
+    Los argumentos pasan primero a temporales (la asignación a los
+    parámetros es simultánea: un argumento puede leer otro parámetro). Las
+    locales que se leen antes de asignarse vuelven a 0, como en una
+    llamada nueva."""
+    sites = []
+    for block in function.blocks:
+        call = function.tail_call(block)
+        if call is not None and call.func == function.name and len(call.args) == len(function.params):
+            sites.append(block)
+    if not sites:
+        return 0
+
+    # La cabecera del ciclo no puede ser la entrada (ahí se definen los
+    # parámetros): se agrega un bloque de entrada que salta a ella
+    entry = function.entry
+    if len(entry.instrs) == 1 and entry.instrs[0].op == 'jmp':
+        header = entry.instrs[0].targets[0]
+    else:
+        header = entry
+        entry = function.new_block(placed=False)
+        entry.instrs.append(Instr('jmp', targets=[header]))
+        function.blocks.insert(0, entry)
+
+    uninitialized = Liveness(function).uninitialized_locals()
+
+    for block in sites:
+        call = block.instrs[-2]
+        temps = [function.new_temp(param.type_id) for param in function.params]
+        instrs = [Instr('copy', temp, [arg], type_id=temp.type_id) for temp, arg in zip(temps, call.args)]
+        instrs += [Instr('copy', param, [temp], type_id=temp.type_id)
+                   for param, temp in zip(function.params, temps)]
+        instrs += [Instr('copy', var, [Const(0.0, T_FLOAT) if var.type_id == T_FLOAT else Const(0, T_INT)],
+                         type_id=var.type_id) for var in uninitialized]
+        instrs.append(Instr('jmp', targets=[header], line=call.line))
+        block.instrs[-2:] = instrs
+    return len(sites)
+
+
+def remove_dead_definitions(program):
+    """Elimina las funciones que no se alcanzan desde main y las globales sin uso.
+
+    El grafo de llamadas se recorre desde main; una global se conserva si
+    alguna función alcanzable la lee o la escribe. Retorna los nombres de
+    las funciones y de las globales eliminadas."""
+    functions = {function.name: function for function in program.functions}
+    if 'main' not in functions:
+        return [], []
+    reachable = {'main'}
+    stack = ['main']
+    while stack:
+        for instr in functions[stack.pop()].instructions():
+            if instr.op == 'call' and instr.func in functions and instr.func not in reachable:
+                reachable.add(instr.func)
+                stack.append(instr.func)
+    dead_functions = [function.name for function in program.functions if function.name not in reachable]
+    program.functions = [function for function in program.functions if function.name in reachable]
+
+    used = set()
+    for function in program.functions:
+        for instr in function.instructions():
+            for value in [instr.dest] + instr.args:
+                if isinstance(value, Global):
+                    used.add(value.name)
+    dead_globals = [symbol.name for symbol in program.globals if symbol.name not in used]
+    program.globals = [symbol for symbol in program.globals if symbol.name in used]
+    return dead_functions, dead_globals
+
+
+def pure_functions(program):
+    """Nombres de las funciones sin efectos: no leen ni escriben globales y
+    solo llaman funciones puras (punto fijo sobre el grafo de llamadas)"""
+    functions = {function.name: function for function in program.functions}
+    pure = set(functions)
+    changed = True
+    while changed:
+        changed = False
+        for name in sorted(pure):
+            if any(instr.op in ('load', 'store') or (instr.op == 'call' and instr.func not in pure)
+                   for instr in functions[name].instructions()):
+                pure.discard(name)
+                changed = True
+    return pure
+
+
+# Pasos máximos del simulador para evaluar una llamada en compilación
+EVALUATION_BUDGET = 20000
+
+
+class CallEvaluator:
+    """Evalúa en compilación las llamadas a funciones puras con argumentos literales.
+
+    La llamada se ejecuta en el simulador de la IR con un límite de pasos y
+    se reemplaza por su resultado. Los resultados se memorizan por
+    (función, argumentos) para todo el programa; una llamada que falla
+    (división entre cero, recursión sin fin) o agota los pasos se deja."""
+
+    def __init__(self, budget=EVALUATION_BUDGET):
+        self.budget = budget
+        self.results = {}     # (función, argumentos) -> resultado, o None si no se pudo
+        self.evaluated = []   # (función que llama, llamada, resultado, línea)
+
+    def run(self, program):
+        """Reemplaza las llamadas evaluables; retorna las funciones modificadas"""
+        pure = pure_functions(program)
+        functions = {function.name: function for function in program.functions}
+        changed = []
+        for function in program.functions:
+            for block in function.blocks:
+                kept = []
+                for instr in block.instrs:
+                    result = None
+                    if (instr.op == 'call' and instr.func in pure
+                            and len(instr.args) == len(functions[instr.func].params)
+                            and all(isinstance(arg, Const) for arg in instr.args)):
+                        result = self.evaluate(program, instr)
+                    if result is None:
+                        kept.append(instr)
+                        continue
+                    text = f"{instr.func}({', '.join(str(arg.value) for arg in instr.args)})"
+                    self.evaluated.append((function.name, text, result, instr.line))
+                    if function not in changed:
+                        changed.append(function)
+                    if instr.dest is None:
+                        continue    # Sin efectos y sin resultado: desaparece
+                    instr.op, instr.args = 'copy', [Const(result, instr.dest.type_id)]
+                    instr.type_id, instr.func, instr.arg_types = instr.dest.type_id, None, None
+                    kept.append(instr)
+                block.instrs = kept
+        return changed
+
+    def evaluate(self, program, call):
+        key = (call.func, tuple((arg.type_id, arg.value) for arg in call.args))
+        if key not in self.results:
+            try:
+                result = Simulator(program, self.budget).run(call.func, [arg.value for arg in call.args])
+            except SimulationError:
+                result = None
+            # Un real infinito o NaN no tiene literal en NASM
+            if isinstance(result, float) and not math.isfinite(result):
+                result = None
+            self.results[key] = result
+        return self.results[key]
+
+    def report(self):
+        """Líneas con las llamadas reemplazadas por su resultado"""
+        lines = [f"  {caller}: {call} = {result} (línea {line})"
+                 for caller, call, result, line in self.evaluated]
+        return lines or ["  (ninguna)"]
+
+
+# Pases disponibles por nombre (para armar las secuencias de cada nivel)
+PASSES = {
+    'fold': fold_constants,
+    'copy-prop': propagate_copies,
+    'cse': eliminate_common_subexpressions,
+    'dce': eliminate_dead_code,
+    'jump-threading': thread_jumps,
+    'tail-recursion': eliminate_tail_recursion,
+    'loop-rotate': rotate_loops,
+    'licm': hoist_invariants,
+}
+
+PIPELINES = {
+    0: [],
+    1: ['tail-recursion', 'fold', 'copy-prop', 'cse', 'dce', 'jump-threading', 'loop-rotate', 'unroll'],
+    2: ['tail-recursion', 'fold', 'copy-prop', 'cse', 'copy-prop', 'fold', 'dce', 'jump-threading',
+        'loop-rotate', 'licm', 'unroll'],
+}
+
+# En -O2 la secuencia se repite mientras haga cambios (hasta este límite)
+MAX_ROUNDS = 4
+
+
+class PassManager:
+    """Ejecuta los pases del nivel de optimización y mide su tiempo.
+
+    inline_threshold reemplaza el costo máximo de las funciones que se
+    expanden en línea (0 desactiva la expansión). unroll_factor reemplaza
+    el factor de desenrollado de ciclos (0 lo desactiva; el pase 'unroll'
+    solo está en la secuencia si el factor no es 0). profile (pgo.Profile)
+    guía la expansión de las llamadas calientes y el orden de los bloques."""
+
+    def __init__(self, level=0, inline_threshold=None, profile=None, unroll_factor=None):
+        self.level = level
+        if unroll_factor is None:
+            unroll_factor = UNROLL_FACTORS[min(level, max(UNROLL_FACTORS))]
+        self.unroller = LoopUnroller(unroll_factor) if level > 0 and unroll_factor > 0 else None
+        self.passes = dict(PASSES, unroll=self.unroller.run) if self.unroller is not None else PASSES
+        self.pipeline = [name for name in PIPELINES[min(level, max(PIPELINES))] if name in self.passes]
+        self.rounds = MAX_ROUNDS if level >= 2 else 1
+        self.changes = {name: 0 for name in self.pipeline}
+        self.timings = {name: 0.0 for name in self.pipeline}
+        if inline_threshold is None:
+            inline_threshold = INLINE_THRESHOLDS[min(level, max(INLINE_THRESHOLDS))]
+        self.profile = profile if level > 0 else None
+        self.inliner = Inliner(inline_threshold, self.profile) if level > 0 and inline_threshold > 0 else None
+        self.evaluator = CallEvaluator() if level > 0 else None
+        if self.evaluator is not None:
+            self.changes['pure-calls'] = 0
+            self.timings['pure-calls'] = 0.0
+        if self.inliner is not None:
+            self.changes['inline'] = 0
+            self.timings['inline'] = 0.0
+        if self.profile is not None:
+            self.changes['block-layout'] = 0
+            self.timings['block-layout'] = 0.0
+        self.removed_functions = []
+        self.removed_globals = []
+
+    def run(self, program):
+        for function in program.functions:
+            self.run_function(function)
+        if self.evaluator is not None:
+            self.run_evaluator(program)
+        if self.inliner is not None:
+            self.run_inliner(program)
+        if self.level > 0:
+            self.removed_functions, self.removed_globals = remove_dead_definitions(program)
+        if self.profile is not None:
+            # Al final: los pases anteriores pueden unir o crear bloques
+            start = time.perf_counter()
+            for function in program.functions:
+                self.changes['block-layout'] += order_blocks(function, self.profile)
+            self.timings['block-layout'] += time.perf_counter() - start
+        return program
+
+    def run_evaluator(self, program):
+        # Un resultado plegado puede dejar otra llamada con argumentos literales
+        while True:
+            start = time.perf_counter()
+            changed = self.evaluator.run(program)
+            self.timings['pure-calls'] += time.perf_counter() - start
+            if not changed:
+                break
+            for function in changed:
+                self.run_function(function)
+        self.changes['pure-calls'] = len(self.evaluator.evaluated)
+
+    def run_inliner(self, program):
+        # Las funciones se optimizan antes de medir su costo; las que
+        # cambian se vuelven a optimizar antes de la siguiente ronda
+        while True:
+            start = time.perf_counter()
+            changed = self.inliner.inline_round(program)
+            self.timings['inline'] += time.perf_counter() - start
+            if not changed:
+                break
+            for function in changed:
+                # Unir los bloques que separó la expansión y propagar los
+                # argumentos antes del plegado: basta una ronda (-O1)
+                self.run_pass('jump-threading', function)
+                self.run_pass('copy-prop', function)
+                self.run_function(function)
+        self.changes['inline'] = len(self.inliner.inlined)
+
+    def run_function(self, function):
+        for _ in range(self.rounds):
+            round_changes = 0
+            for name in self.pipeline:
+                round_changes += self.run_pass(name, function)
+            if not round_changes:
+                break
+
+    def run_pass(self, name, function):
+        start = time.perf_counter()
+        changes = self.passes[name](function)
+        self.timings[name] += time.perf_counter() - start
+        self.changes[name] += changes
+        return changes
+
+    def report(self):
+        """Líneas con los cambios y el tiempo de cada pase"""
+        lines = [f"  {name:<16}{self.changes[name]:>6} cambios {self.timings[name] * 1000:>9.3f} ms"
+                 for name in self.changes]
+        total = sum(self.timings.values()) * 1000
+        lines.append(f"  {'total':<16}{sum(self.changes.values()):>6} cambios {total:>9.3f} ms")
+        return lines
@@ -0,0 +1,256 @@
+# Optimizador peephole sobre los registros de assembly.py.
+# Cada regla de RULES describe una ventana de instrucciones consecutivas
+# (los comentarios no cuentan) y su reemplazo. El motor recorre el código,
+# aplica la primera regla que coincide y retrocede el tamaño de la ventana
+# para encontrar los patrones que se forman tras cada reemplazo.
+#
+# Patrones:
+#   ('mov', '%a', '$b')   instrucción con su código y operandos
+#   (LABEL, '$l')         etiqueta
+#   (JCC, '$l')           cualquier salto condicional (liga 'jcc')
+#   (ANY,)                cualquier instrucción
+# Variables en los operandos:
+#   %x registro de 64 o 32 bits o xmm       @x memoria de 64 o 32 bits (liga el
+#   #x inmediato entero                         operando con su tamaño explícito)
+#   $x cualquier operando
+# Reemplazo: lista donde un entero i conserva la i-ésima instrucción de la
+# ventana y una tupla es una plantilla con las mismas variables; también
+# puede ser una función (ligaduras, ventana) -> lista de registros.
+
+import re
+
+from assembly import (Instruction, Label, Comment, Directive, XMM,
+                      is_memory, memory_address, is_immediate, registers_in, register_info,
+                      full_register, reads_writes, is_conditional_jump)
+
+LABEL = ':label'
+JCC = ':jcc'
+ANY = '*'
+
+INVERSE_JUMPS = {
+    'je': 'jne', 'jne': 'je', 'jz': 'jnz', 'jnz': 'jz',
+    'jl': 'jge', 'jge': 'jl', 'jle': 'jg', 'jg': 'jle',
+    'jb': 'jae', 'jae': 'jb', 'jbe': 'ja', 'ja': 'jbe',
+    'jp': 'jnp', 'jnp': 'jp',
+}
+
+_VARIABLE = re.compile(r"[%@#$](\w+)")
+
+
+def register_dead_after(code, start, register):
+    """Indica si el registro se sobrescribe antes de leerse a partir de start.
+
+    Se sigue el camino de caída; ante un salto o una instrucción
+    desconocida se asume que el registro sigue vivo."""
+    for record in code[start:]:
+        if isinstance(record, (Comment, Label)):
+            continue
+        if isinstance(record, Directive):
+            return False
+        usage = reads_writes(record)
+        if usage is None:
+            return False
+        reads, writes = usage
+        if register in reads:
+            return False
+        if register in writes:
+            return True
+        if record.opcode == 'ret':
+            return True
+        if record.opcode == 'jmp' or is_conditional_jump(record.opcode):
+            return False
+    return False
+
+
+# === Condiciones de las reglas ===
+
+def dead(var):
+    """El registro ligado a var no se lee después de la ventana"""
+    return lambda bindings, code, end: register_dead_after(code, end, full_register(bindings[var]))
+
+
+def absent(var, operand_var):
+    """El registro ligado a var no aparece en otro operando ligado"""
+    return lambda bindings, code, end: full_register(bindings[var]) not in registers_in(bindings[operand_var])
+
+
+def imm32(var):
+    """El inmediato cabe en 32 bits con signo (forma de mov/push a memoria)"""
+    return lambda bindings, code, end: -2**31 <= int(bindings[var]) < 2**31
+
+
+def both(*guards):
+    return lambda bindings, code, end: all(guard(bindings, code, end) for guard in guards)
+
+
+def _invert_branch(bindings, window):
+    return [Instruction(INVERSE_JUMPS[bindings['jcc']], [bindings['b']]), window[2]]
+
+
+class Rule:
+    __slots__ = ('name', 'pattern', 'replacement', 'guard')
+
+    def __init__(self, name, pattern, replacement, guard=None):
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.guard = guard
+
+
+RULES = [
+    Rule('mov-self', [('mov', '%a', '%a')], []),
+    Rule('push-pop', [('push', '$a'), ('pop', '$a')], []),
+    Rule('push-pop-move', [('push', '$a'), ('pop', '%b')], [('mov', '%b', '$a')]),
+    Rule('store-reload', [('mov', '@m', '%r'), ('mov', '%r', '@m')], [0]),
+    Rule('store-reload', [('movsd', '@m', '%r'), ('movsd', '%r', '@m')], [0]),
+    Rule('store-forward', [('mov', '@m', '%r'), ('mov', '%s', '@m')], [0, ('mov', '%s', '%r')]),
+    Rule('store-forward', [('mov', '@m', '#i'), ('mov', '%s', '@m')], [0, ('mov', '%s', '#i')]),
+    Rule('dead-move', [('mov', '%a', '$x'), ('mov', '%a', '$y')], [1], absent('a', 'y')),
+    Rule('copy-propagate', [('mov', '%a', '$x'), ('mov', '%b', '%a')], [('mov', '%b', '$x')],
+         dead('a')),
+    Rule('push-propagate', [('mov', '%a', '%x'), ('push', '%a')], [('push', '%x')], dead('a')),
+    Rule('push-propagate', [('mov', '%a', '@x'), ('push', '%a')], [('push', '@x')],
+         dead('a')),
+    Rule('push-propagate', [('mov', '%a', '#x'), ('push', '%a')], [('push', '#x')],
+         both(dead('a'), imm32('x'))),
+    Rule('store-propagate', [('mov', '%a', '%x'), ('mov', '@m', '%a')], [('mov', '@m', '%x')],
+         dead('a')),
+    Rule('store-propagate', [('mov', '%a', '#x'), ('mov', '@m', '%a')],
+         [('mov', '@m', '#x')], both(dead('a'), imm32('x'))),
+    Rule('jump-next', [('jmp', '$l'), (LABEL, '$l')], [1]),
+    Rule('branch-over-jump', [(JCC, '$a'), ('jmp', '$b'), (LABEL, '$a')], _invert_branch,
+         lambda bindings, code, end: bindings['jcc'] in INVERSE_JUMPS),
+    Rule('unreachable', [('jmp', '$l'), (ANY,)], [0]),
+    Rule('unreachable', [('ret',), (ANY,)], [0]),
+]
+
+
+def match_operand(pattern, operand, bindings):
+    match = _VARIABLE.fullmatch(pattern)
+    if match is None:
+        return pattern == operand
+    kind, name = pattern[0], match.group(1)
+    if kind == '%':
+        info = register_info(operand)
+        if info is None or (info[1] not in (64, 32) and operand not in XMM):
+            return False
+        value = operand
+    elif kind == '@':
+        # Accesos de 64 bits ('[x]' o 'qword [x]') o de 32 ('dword [x]')
+        if not is_memory(operand):
+            return False
+        size = operand[:operand.index('[')].strip() or 'qword'
+        if size not in ('qword', 'dword'):
+            return False
+        value = f"{size} [{memory_address(operand)}]"
+    elif kind == '#':
+        if not is_immediate(operand) or operand.startswith("'"):
+            return False
+        value = operand
+    else:
+        value = operand
+    if name in bindings:
+        return bindings[name] == value
+    bindings[name] = value
+    return True
+
+
+def match_record(pattern, record, bindings):
+    head = pattern[0]
+    if head == LABEL:
+        return isinstance(record, Label) and match_operand(pattern[1], record.name, bindings)
+    if not isinstance(record, Instruction):
+        return False
+    if head == ANY:
+        return True
+    if head == JCC:
+        if not is_conditional_jump(record.opcode):
+            return False
+        bindings['jcc'] = record.opcode
+    elif head != record.opcode:
+        return False
+    if len(pattern) - 1 != len(record.operands):
+        return False
+    return all(match_operand(p, operand, bindings) for p, operand in zip(pattern[1:], record.operands))
+
+
+def substitute(template, bindings):
+    return _VARIABLE.sub(lambda match: bindings[match.group(1)], template)
+
+
+class PeepholeOptimizer:
+    """Aplica la tabla de reglas y lleva la cuenta de aciertos por regla"""
+
+    def __init__(self, rules=None):
+        self.rules = RULES if rules is None else rules
+        self.hits = {}
+        for rule in self.rules:
+            self.hits.setdefault(rule.name, 0)
+        self.window = max(len(rule.pattern) for rule in self.rules)
+
+    def optimize(self, code):
+        code = list(code)
+        position = 0
+        while position < len(code):
+            if isinstance(code[position], Comment):
+                position += 1
+                continue
+            for rule in self.rules:
+                if self.apply(rule, code, position):
+                    self.hits[rule.name] += 1
+                    position = self.back_up(code, position)
+                    break
+            else:
+                position += 1
+        return code
+
+    def apply(self, rule, code, start):
+        # Posiciones de la ventana, saltando comentarios
+        positions = []
+        index = start
+        while len(positions) < len(rule.pattern) and index < len(code):
+            if not isinstance(code[index], Comment):
+                positions.append(index)
+            index += 1
+        if len(positions) < len(rule.pattern):
+            return False
+
+        bindings = {}
+        window = [code[i] for i in positions]
+        for pattern, record in zip(rule.pattern, window):
+            if not match_record(pattern, record, bindings):
+                return False
+        end = positions[-1] + 1
+        if rule.guard is not None and not rule.guard(bindings, code, end):
+            return False
+
+        if callable(rule.replacement):
+            replacement = rule.replacement(bindings, window)
+        else:
+            replacement = []
+            for item in rule.replacement:
+                if isinstance(item, int):
+                    replacement.append(window[item])
+                else:
+                    replacement.append(Instruction(item[0], [substitute(t, bindings) for t in item[1:]]))
+        # Los comentarios dentro de la ventana se conservan tras el reemplazo
+        comments = [code[i] for i in range(start, end) if i not in positions]
+        code[start:end] = replacement + comments
+        return True
+
+    def back_up(self, code, position):
+        steps = self.window - 1
+        while position > 0 and steps > 0:
+            position -= 1
+            if not isinstance(code[position], Comment):
+                steps -= 1
+        return position
+
+    def total(self):
+        return sum(self.hits.values())
+
+    def report(self):
+        """Líneas con los aciertos de cada regla"""
+        lines = [f"  {name}: {count}" for name, count in self.hits.items()]
+        lines.append(f"  total: {self.total()}")
+        return lines
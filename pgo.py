@@ -0,0 +1,155 @@
+# Optimización guiada por perfil (PGO).
+#
+# --profile-generate ARCHIVO ejecuta la IR sin optimizar en el simulador
+# contando las entradas a cada bloque, los destinos de cada bifurcación y
+# las ejecuciones de cada llamada, y guarda los conteos en JSON.
+# --profile-use ARCHIVO los lee en otra compilación: las llamadas calientes
+# se expanden en línea con un umbral mayor y los bloques se reordenan para
+# que el camino frecuente caiga de un bloque al siguiente, con los bloques
+# que nunca se ejecutaron al final de la función.
+#
+# Los conteos se guardan por función y por línea relativa al inicio de la
+# función, así el perfil sigue sirviendo después de cambios pequeños en el
+# código (otras funciones que crecen o se mueven).
+
+import json
+
+from simulator import Simulator
+
+PROFILE_VERSION = 1
+
+# Una llamada es caliente si se ejecuta al menos esta fracción de las
+# veces de la llamada más frecuente del programa (y más de una vez)
+HOT_CALL_FRACTION = 0.1
+
+
+def block_line(block):
+    """Línea de la primera instrucción del bloque que tiene una"""
+    return next((instr.line for instr in block.instrs if instr.line is not None), None)
+
+
+class Profile:
+    """Conteos de ejecución por función: bloques, bifurcaciones y llamadas"""
+
+    def __init__(self, functions=None):
+        # nombre -> {'line', 'blocks': {offset: n}, 'branches': {offset: [n, n]},
+        #           'calls': {'offset:función': n}}
+        self.functions = functions or {}
+        counts = [n for data in self.functions.values() for n in data['calls'].values()]
+        self.hot_call_limit = max(2, max(counts, default=0) * HOT_CALL_FRACTION)
+
+    @classmethod
+    def from_simulation(cls, program, simulator):
+        functions = {}
+        for function in program.functions:
+            data = {'line': function.line, 'blocks': {}, 'branches': {}, 'calls': {}}
+            for block in function.blocks:
+                offset = cls.offset(function, block_line(block))
+                if offset is not None:
+                    count = simulator.block_counts.get(block, 0)
+                    data['blocks'][offset] = data['blocks'].get(offset, 0) + count
+            for instr in function.instructions():
+                offset = cls.offset(function, instr.line)
+                if offset is None:
+                    continue
+                if instr.op == 'br':
+                    taken = simulator.branch_counts.get(instr, [0, 0])
+                    total = data['branches'].setdefault(offset, [0, 0])
+                    total[0] += taken[0]
+                    total[1] += taken[1]
+                elif instr.op == 'call':
+                    key = f"{offset}:{instr.func}"
+                    data['calls'][key] = data['calls'].get(key, 0) + simulator.call_counts.get(instr, 0)
+            functions[function.name] = data
+        return cls(functions)
+
+    @staticmethod
+    def offset(function, line):
+        if function.line is None or line is None:
+            return None
+        return str(line - function.line)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PROFILE_VERSION, 'functions': self.functions}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != PROFILE_VERSION:
+            raise ValueError(f"versión de perfil no soportada: {data.get('version')}")
+        return cls(data['functions'])
+
+    def lookup(self, function, table, key):
+        data = self.functions.get(function.name)
+        return data[table].get(key) if data is not None else None
+
+    def block_count(self, function, block):
+        return self.lookup(function, 'blocks', self.offset(function, block_line(block)))
+
+    def branch(self, function, instr):
+        """[veces hacia el primer destino, hacia el segundo] de un 'br', o None"""
+        return self.lookup(function, 'branches', self.offset(function, instr.line))
+
+    def call_count(self, function, instr):
+        offset = self.offset(function, instr.line)
+        return self.lookup(function, 'calls', f"{offset}:{instr.func}") if offset is not None else None
+
+    def is_hot_call(self, function, instr):
+        count = self.call_count(function, instr)
+        return count is not None and count >= self.hot_call_limit
+
+    def summary(self):
+        blocks = sum(len(data['blocks']) for data in self.functions.values())
+        calls = sum(len(data['calls']) for data in self.functions.values())
+        return f"{len(self.functions)} funciones, {blocks} bloques, {calls} llamadas"
+
+
+def collect_profile(program, max_steps=10000000):
+    """Ejecuta main en el simulador y retorna (perfil, resultado)"""
+    simulator = Simulator(program, max_steps, profile=True)
+    result = simulator.run()
+    return Profile.from_simulation(program, simulator), result
+
+
+def order_blocks(function, profile):
+    """Reordena los bloques según el perfil; retorna cuántos cambiaron de lugar.
+
+    Desde la entrada se arma una cadena siguiendo el sucesor más frecuente
+    de cada bloque (el que va a caer sin salto); los bloques que el perfil
+    registra sin ejecuciones (como un else que nunca se tomó) van al final."""
+    if function.name not in profile.functions:
+        return 0
+    original = list(function.blocks)
+    position = {block: i for i, block in enumerate(original)}
+    cold = {block for block in original[1:] if profile.block_count(function, block) == 0}
+
+    def next_in_chain(block, allow_cold):
+        terminator = block.terminator
+        if terminator is None or terminator.op == 'ret':
+            return None
+        targets = list(terminator.targets)
+        if terminator.op == 'br':
+            counts = profile.branch(function, terminator)
+            if counts is not None and counts[0] != counts[1]:
+                targets.sort(key=lambda target: -counts[terminator.targets.index(target)])
+            else:
+                # Sin datos: se conserva el bloque que ya lo seguía
+                targets.sort(key=lambda target: position[target] != position[block] + 1)
+        return next((target for target in targets if target not in placed
+                     and (allow_cold or target not in cold)), None)
+
+    order = []
+    placed = set()
+    for allow_cold in (False, True):
+        for start in original:
+            if start in placed or (start in cold and not allow_cold):
+                continue
+            block = start
+            while block is not None:
+                order.append(block)
+                placed.add(block)
+                block = next_in_chain(block, allow_cold)
+    function.blocks = order
+    return sum(1 for i, block in enumerate(order) if original[i] is not block)
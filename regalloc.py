@@ -0,0 +1,177 @@
+# Asignación de registros por barrido lineal (linear scan, Poletto y Sarkar)
+# sobre las funciones de la IR. Cada valor (parámetro, local o temporal)
+# recibe un intervalo de vida [inicio, fin] sobre las instrucciones en el
+# orden de los bloques; los intervalos se recorren por inicio y toman un
+# registro libre. Si no hay, se envía al stack el intervalo con menor peso
+# (usos ponderados por la profundidad de ciclo).
+
+from dataflow import Liveness, bits, color
+from type_system import T_FLOAT
+
+# rax, rdx y r11 (y xmm0, xmm1) quedan fuera: el generador los usa para
+# resultados de llamadas, idiv, literales grandes y movimientos
+CALLER_SAVED_REGISTERS = ('rcx', 'rsi', 'rdi', 'r8', 'r9', 'r10')
+CALLEE_SAVED_REGISTERS = ('rbx', 'r12', 'r13', 'r14', 'r15')
+# System V no preserva ningún xmm: los reales que cruzan una llamada van al stack
+FLOAT_REGISTERS = tuple(f"xmm{i}" for i in range(8, 16))
+
+LOOP_WEIGHT = 10
+
+
+class Interval:
+    """Intervalo de vida de un valor y el lugar que se le asignó"""
+    __slots__ = ('value', 'start', 'end', 'weight', 'crosses_call', 'hint', 'register')
+
+    def __init__(self, value, position):
+        self.value = value
+        self.start = position
+        self.end = position
+        self.weight = 0
+        self.crosses_call = False
+        self.hint = None       # Valor cuyo registro conviene reusar (copias, dos direcciones)
+        self.register = None
+
+    def extend(self, position):
+        self.start = min(self.start, position)
+        self.end = max(self.end, position)
+
+    def __repr__(self):
+        return f"Interval({self.value}, {self.start}-{self.end}, {self.register})"
+
+
+def loop_depths(function):
+    """Profundidad de ciclo aproximada de cada bloque.
+
+    Un salto hacia un bloque anterior (o al mismo) cierra un ciclo que
+    abarca los bloques entre ambos en el orden de la función."""
+    order = {block: i for i, block in enumerate(function.blocks)}
+    depth = [0] * len(function.blocks)
+    for block in function.blocks:
+        for succ in block.successors():
+            if order[succ] <= order[block]:
+                for i in range(order[succ], order[block] + 1):
+                    depth[i] += 1
+    return {block: depth[order[block]] for block in function.blocks}
+
+
+def build_intervals(function, liveness):
+    """Intervalos de vida por valor.
+
+    La posición 0 es la entrada de la función (donde se definen los
+    parámetros); cada bloque tiene una posición de entrada y una por
+    instrucción. Retorna (intervalos por valor, posiciones de llamadas)."""
+    intervals = {}
+    calls = []
+    depths = loop_depths(function)
+
+    def touch(value, position, weight=0):
+        if value not in intervals:
+            intervals[value] = Interval(value, position)
+        interval = intervals[value]
+        interval.extend(position)
+        interval.weight += weight
+        return interval
+
+    for param in function.params:
+        touch(param, 0)
+
+    position = 1
+    for block in function.blocks:
+        weight = LOOP_WEIGHT ** depths[block]
+        for value in bits(liveness.block_in(block)):
+            touch(liveness.values[value], position)
+        position += 1
+        for instr in block.instrs:
+            for value in instr.uses():
+                touch(value, position, weight)
+            dest = instr.defined()
+            if dest is not None:
+                interval = touch(dest, position, weight)
+                if instr.args and instr.op != 'call' and interval.hint is None:
+                    interval.hint = instr.args[0]
+            if instr.op == 'call':
+                calls.append(position)
+            position += 1
+        for value in bits(liveness.block_out(block)):
+            touch(liveness.values[value], position - 1)
+
+    for interval in intervals.values():
+        interval.crosses_call = any(interval.start < call < interval.end for call in calls)
+    return intervals, calls
+
+
+class LinearScan:
+    """Resultado de asignar registros a una función.
+
+    preferred: valor -> registro que conviene darle (el registro en que
+    llega un parámetro). homes: valor -> registro; slot_of: valor en el
+    stack -> número de slot (la dirección la decide el marco);
+    callee_saved: registros callee-saved usados (el prólogo los guarda);
+    slots: cantidad de slots de 8 bytes para los valores en el stack."""
+
+    def __init__(self, function, preferred=None):
+        self.function = function
+        self.preferred = preferred or {}
+        self.liveness = Liveness(function)
+        self.intervals, self.calls = build_intervals(function, self.liveness)
+        self.spilled = []
+        self.allocate()
+        self.callee_saved = [reg for reg in CALLEE_SAVED_REGISTERS
+                             if any(i.register == reg for i in self.intervals.values())]
+        self.slots = self.assign_slots()
+
+    def allowed(self, interval):
+        if interval.value.type_id == T_FLOAT:
+            return () if interval.crosses_call else FLOAT_REGISTERS
+        if interval.crosses_call:
+            return CALLEE_SAVED_REGISTERS
+        return CALLER_SAVED_REGISTERS + CALLEE_SAVED_REGISTERS
+
+    def allocate(self):
+        active = []
+        free = set(CALLER_SAVED_REGISTERS + CALLEE_SAVED_REGISTERS + FLOAT_REGISTERS)
+        for current in sorted(self.intervals.values(), key=lambda i: (i.start, -i.end)):
+            # Liberar los intervalos que terminan antes (o justo donde) empieza este:
+            # el generador lee los operandos antes de escribir el destino
+            for old in [old for old in active if old.end <= current.start]:
+                active.remove(old)
+                free.add(old.register)
+
+            allowed = self.allowed(current)
+            hint = self.intervals.get(current.hint)
+            preferred = self.preferred.get(current.value)
+            if hint is not None and hint.register in free and hint.register in allowed:
+                register = hint.register
+            elif preferred in free and preferred in allowed:
+                register = preferred
+            else:
+                register = next((reg for reg in allowed if reg in free), None)
+            if register is not None:
+                current.register = register
+                free.discard(register)
+                active.append(current)
+                continue
+
+            # Sin registro libre: sale el intervalo de menor peso (a igual peso,
+            # el que termina más lejos)
+            candidates = [old for old in active if old.register in allowed]
+            victim = min(candidates, key=lambda i: (i.weight, -i.end), default=None)
+            if victim is not None and (victim.weight, -victim.end) < (current.weight, -current.end):
+                current.register = victim.register
+                victim.register = None
+                active.remove(victim)
+                active.append(current)
+                self.spilled.append(victim)
+            else:
+                self.spilled.append(current)
+
+    def assign_slots(self):
+        # Los valores en el stack comparten slots si sus vidas no se traslapan
+        liveness = self.liveness
+        conflicts = liveness.interference()
+        in_memory = [liveness.index[i.value] for i in self.spilled if i.value in liveness.index]
+        colors = color(conflicts, in_memory)
+        self.homes = {value: interval.register for value, interval in self.intervals.items()
+                      if interval.register is not None}
+        self.slot_of = {liveness.values[i]: colors[i] for i in in_memory}
+        return max((colors[i] + 1 for i in in_memory), default=0)
@@ -0,0 +1,164 @@
+# Runtime que se agrega a cada programa generado: un buffer de salida en
+# memoria que se escribe con una sola syscall al salir (o cuando se llena),
+# la conversión de enteros a decimal y el punto de entrada _start.
+#
+# La conversión saca dos dígitos por vuelta de una tabla "00".."99": el
+# cociente entre 100 se calcula multiplicando por el recíproco (sin div) y
+# el resto indexa la tabla. El texto se arma de derecha a izquierda en un
+# área auxiliar y se copia al buffer con dos movimientos de 8 bytes.
+#
+# Las funciones de BUILTINS se pueden llamar desde los programas como
+# cualquier otra: el analizador semántico las declara en el ámbito global
+# (salvo que el programa defina una con el mismo nombre) y aquí se emite su
+# etiqueta. Solo tocan registros que el llamador no espera conservar.
+
+from assembly import Instruction, Label, Directive
+
+# nombre -> (tipo de retorno, parámetros); print(x) escribe x y un salto de línea
+BUILTINS = {
+    'print': ('void', [('valor', 'int')]),
+}
+
+OUTPUT_BUFFER_SIZE = 4096
+# Cada escritura copia 16 bytes: si quedan menos, primero se vacía el buffer
+OUTPUT_LIMIT = OUTPUT_BUFFER_SIZE - 16
+
+# n / 100 = (n * RECIPROCAL_100) >> RECIPROCAL_SHIFT para todo n < 2**32
+RECIPROCAL_100 = 0x51EB851F
+RECIPROCAL_SHIFT = 37
+
+RESULT_MESSAGE = 'Resultado: '
+
+DATA = [
+    # Rellenado a 16 bytes: se copia entero como cualquier otro texto
+    f"msg db '{RESULT_MESSAGE}'" + ", 0" * (16 - len(RESULT_MESSAGE)),
+    "rt_digits db '" + ''.join(f"{i:02d}" for i in range(100)) + "'",
+]
+
+BSS = [
+    f"rt_out resb {OUTPUT_BUFFER_SIZE}",
+    "rt_out_pos resq 1",
+    # Signo, 10 dígitos y el salto de línea terminan en rt_scratch + 16;
+    # los 16 bytes siguientes permiten leer siempre 16 bytes desde el inicio
+    "rt_scratch resb 32",
+]
+
+# Entero con signo en edi -> decimal y salto de línea al buffer
+PRINT_INT = [
+    "rt_print_int:",
+    ("lea", "r8", "[rel rt_scratch + 15]"),
+    ("mov", "byte [r8]", "10"),
+    ("movsxd", "r9", "edi"),
+    ("mov", "rax", "r9"),
+    ("neg", "rax"),
+    Instruction("cmovs", ["rax", "r9"], "rax = |valor|"),
+    ("lea", "rcx", "[rel rt_digits]"),
+    "rt_print_int_pairs:",
+    ("cmp", "rax", "100"),
+    ("jb", "rt_print_int_last"),
+    ("mov", "rdx", "rax"),
+    ("imul", "rax", "rax", RECIPROCAL_100),
+    Instruction("shr", ["rax", str(RECIPROCAL_SHIFT)], "cociente entre 100"),
+    ("imul", "r10", "rax", "100"),
+    Instruction("sub", ["rdx", "r10"], "resto: índice en la tabla"),
+    ("movzx", "edx", "word [rcx + rdx*2]"),
+    ("sub", "r8", "2"),
+    ("mov", "[r8]", "dx"),
+    ("jmp", "rt_print_int_pairs"),
+    "rt_print_int_last:",
+    ("cmp", "rax", "10"),
+    ("jb", "rt_print_int_digit"),
+    ("movzx", "edx", "word [rcx + rax*2]"),
+    ("sub", "r8", "2"),
+    ("mov", "[r8]", "dx"),
+    ("jmp", "rt_print_int_sign"),
+    "rt_print_int_digit:",
+    ("add", "al", "'0'"),
+    ("dec", "r8"),
+    ("mov", "[r8]", "al"),
+    "rt_print_int_sign:",
+    ("test", "r9", "r9"),
+    ("jns", "rt_print_int_copy"),
+    ("dec", "r8"),
+    ("mov", "byte [r8]", "'-'"),
+    "rt_print_int_copy:",
+    ("mov", "rsi", "r8"),
+    ("lea", "rdx", "[rel rt_scratch + 16]"),
+    ("sub", "rdx", "r8"),
+    # Sigue en rt_write_text con el texto armado
+]
+
+# Texto de hasta 16 bytes (rsi, longitud en rdx) al buffer
+WRITE_TEXT = [
+    "rt_write_text:",
+    ("cmp", "qword [rel rt_out_pos]", OUTPUT_LIMIT),
+    ("jb", "rt_write_text_copy"),
+    ("push", "rsi"),
+    ("push", "rdx"),
+    ("call", "rt_flush"),
+    ("pop", "rdx"),
+    ("pop", "rsi"),
+    "rt_write_text_copy:",
+    ("lea", "rdi", "[rel rt_out]"),
+    ("add", "rdi", "[rel rt_out_pos]"),
+    ("mov", "rax", "[rsi]"),
+    ("mov", "rcx", "[rsi + 8]"),
+    ("mov", "[rdi]", "rax"),
+    ("mov", "[rdi + 8]", "rcx"),
+    ("add", "[rel rt_out_pos]", "rdx"),
+    ("ret",),
+]
+
+# Escribe el contenido del buffer en stdout y lo vacía
+FLUSH = [
+    "rt_flush:",
+    ("mov", "rdx", "[rel rt_out_pos]"),
+    ("test", "rdx", "rdx"),
+    ("jz", "rt_flush_done"),
+    Instruction("mov", ["eax", "1"], "sys_write"),
+    Instruction("mov", ["edi", "1"], "stdout"),
+    ("lea", "rsi", "[rel rt_out]"),
+    ("syscall",),
+    ("mov", "qword [rel rt_out_pos]", "0"),
+    "rt_flush_done:",
+    ("ret",),
+]
+
+# Punto de entrada: "Resultado: N" con el valor de retorno de main
+START = [
+    "_start:",
+    ("call", "main"),
+    Instruction("push", ["rax"], "guardar el resultado"),
+    ("lea", "rsi", "[rel msg]"),
+    ("mov", "edx", len(RESULT_MESSAGE)),
+    ("call", "rt_write_text"),
+    ("pop", "rdi"),
+    ("call", "rt_print_int"),
+    ("call", "rt_flush"),
+    Instruction("mov", ["rdi", "8"], "exit code fijo para prueba"),
+    Instruction("mov", ["rax", "60"], "sys_exit"),
+    ("syscall",),
+]
+
+
+def records(lines):
+    """Convierte las entradas en registros: 'nombre:' es una etiqueta y una
+    tupla (código, operandos...) una instrucción; los registros pasan tal cual"""
+    result = []
+    for line in lines:
+        if isinstance(line, str):
+            line = Label(line[:-1])
+        elif isinstance(line, tuple):
+            line = Instruction(line[0], [str(operand) for operand in line[1:]])
+        result.append(line)
+    return result
+
+
+def runtime_code(builtins):
+    """Registros del runtime; builtins son los nombres de BUILTINS que el
+    programa puede llamar (sus etiquetas se agregan a la rutina)"""
+    print_int = list(PRINT_INT)
+    if 'print' in builtins:
+        print_int.insert(0, "print:")
+    return ([Directive("")] + records(print_int) + records(WRITE_TEXT) + [Directive("")]
+            + records(FLUSH) + [Directive("")] + records(START))
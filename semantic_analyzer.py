@@ -1,10 +1,20 @@
 from parser import Node
+import diagnostics
+from diagnostics import Diagnostic, Diagnostics
+from runtime import BUILTINS
+from type_system import (
+    T_UNKNOWN, T_INT, T_FLOAT, T_VOID, T_ERROR,
+    BINARY_RESULT, UNARY_RESULT, ASSIGNABLE, ARGUMENT_COMPATIBLE,
+    BINARY_ERROR_MESSAGES, UNARY_ERROR_MESSAGE,
+    intern_type, type_name, op_class,
+)
 
 
 class SemanticError(Exception):
-    def __init__(self, message, node=None):
+    def __init__(self, message, node=None, code=diagnostics.INTERNAL_ERROR):
         self.message = message
         self.node = node
+        self.code = code
         super().__init__(self.message)
     
     def __str__(self):
@@ -18,9 +28,18 @@ class Symbol:
         self.data_type = data_type
         self.initialized = initialized
         self.used = False
+        self.builtin = False  # Función del runtime (runtime.BUILTINS)
         self.params = params or []
         self.return_type = return_type
         self.defined_at = None
+        # Ids internados para que la verificación de tipos no compare cadenas
+        self.type_id = intern_type(data_type)
+        self.return_type_id = intern_type(return_type)
+        self.param_type_ids = [intern_type(t) for _, t in self.params]
+        # Símbolos del marco de una función (parámetros y locales en orden de
+        # definición); el generador de código los usa para asignar el stack
+        self.param_symbols = []
+        self.local_symbols = []
     
     def __str__(self):
         if self.symbol_type == 'function':
@@ -31,26 +50,97 @@ class Symbol:
             return f"{self.symbol_type.capitalize()}({self.name}:{self.data_type}{init_str})"
 
 
+def declaration_key(symbol):
+    """Clave de la declaración de un símbolo global (tipo y firma)"""
+    if symbol.symbol_type == 'function':
+        return ('function', symbol.return_type, tuple(symbol.params))
+    return (symbol.symbol_type, symbol.data_type)
+
+
+def symbol_key(symbol):
+    """Todo lo que un símbolo global aporta al análisis de una función que lo usa"""
+    if symbol is None:
+        return None
+    if symbol.symbol_type == 'function':
+        return declaration_key(symbol)
+    return declaration_key(symbol) + (symbol.initialized,)
+
+
+def function_fingerprint(node):
+    """Huella de una función: sus tokens con la línea relativa al inicio de la función.
+    
+    Retorna (huella, línea inicial). Mover la función sin editarla no cambia la huella."""
+    tokens = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.token is not None:
+            tokens.append(current.token)
+        stack.extend(reversed(current.children))
+    start_line = tokens[0].linea if tokens else 0
+    fingerprint = tuple((t.tipo, t.lexema, t.linea - start_line, t.columna) for t in tokens)
+    return fingerprint, start_line
+
+
+def shift_lines(node, delta):
+    """Desplaza las líneas de los tokens de un subárbol"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.token is not None:
+            current.token.linea += delta
+            current.token.posicion = current.token.linea
+        stack.extend(current.children)
+
+
+class FunctionSummary:
+    """Resultado cacheado del análisis de una función para el re-análisis incremental"""
+    __slots__ = ('name', 'fingerprint', 'start_line', 'node',
+                 'environment', 'uses', 'writes', 'records')
+    
+    def __init__(self, name, fingerprint, start_line, node):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.start_line = start_line
+        self.node = node            # Subárbol DefFunc ya anotado
+        self.environment = {}       # Nombre global -> symbol_key al primer acceso
+        self.uses = set()           # Globales que la función marca como usados
+        self.writes = set()         # Globales que la función inicializa
+        self.records = []           # Diagnósticos emitidos al analizarla
+    
+    def depend(self, name, symbol):
+        if name not in self.environment:
+            self.environment[name] = symbol_key(symbol)
+
+
 class SymbolTable:
-    def __init__(self):
+    def __init__(self, verbose=False):
         self.scopes = [{}]
         self.scope_names = ['global']
         self.current_function = None
+        self.verbose = verbose  # Traza de ámbitos y símbolos
+        # Resumen de la función en análisis: registra sus dependencias globales
+        self.summary = None
     
     def enter_scope(self, scope_name):
         # Entra a un nuevo ámbito
         self.scopes.append({})
         self.scope_names.append(scope_name)
-        print(f"[SEMANTIC] Entrando a scope: {scope_name}")
+        self.trace(f"[SEMANTIC] Entrando a scope: {scope_name}")
     
     def exit_scope(self):
         # Sale del ámbito actual
         if len(self.scopes) > 1:
             exiting_scope = self.scope_names.pop()
             exited_symbols = self.scopes.pop()
-            print(f"[SEMANTIC] Saliendo de scope: {exiting_scope}")
+            self.trace(f"[SEMANTIC] Saliendo de scope: {exiting_scope}")
         else:
-            print("[SEMANTIC] Advertencia: Intentando salir del ámbito global")
+            self.trace("[SEMANTIC] Advertencia: Intentando salir del ámbito global")
+    
+    def trace(self, message):
+        """Imprime un evento de la tabla si se pidió la traza"""
+        if self.verbose:
+            print(message)
     
     def current_scope(self):
         """Retorna el nombre del ámbito actual"""
@@ -63,23 +153,45 @@ class SymbolTable:
         # Verificar si ya existe en el ámbito actual
         if symbol.name in current_scope_dict:
             existing = current_scope_dict[symbol.name]
-            raise SemanticError(f"El símbolo '{symbol.name}' ya está definido en el ámbito '{self.current_scope()}'")
+            raise SemanticError(f"El símbolo '{symbol.name}' ya está definido en el ámbito '{self.current_scope()}'",
+                                code=diagnostics.REDEFINITION)
         
         # Agregar el símbolo
         current_scope_dict[symbol.name] = symbol
-        print(f"[SEMANTIC] Definido: {symbol} en scope '{self.current_scope()}'")
+        self.trace(f"[SEMANTIC] Definido: {symbol} en scope '{self.current_scope()}'")
     
     def lookup(self, name, mark_used=True):
         """Busca un símbolo en todos los ámbitos"""
         for i in range(len(self.scopes) - 1, -1, -1):
             if name in self.scopes[i]:
                 symbol = self.scopes[i][name]
+                if i == 0 and self.summary is not None:
+                    self.summary.depend(name, symbol)
                 if mark_used:
-                    symbol.used = True
+                    self.mark_used(symbol)
                 return symbol
         
+        # Un nombre no resuelto también es dependencia: declararlo después
+        # cambia el resultado del análisis
+        if self.summary is not None:
+            self.summary.depend(name, None)
         return None
     
+    def is_global(self, symbol):
+        return self.scopes[0].get(symbol.name) is symbol
+    
+    def mark_used(self, symbol):
+        """Marca un símbolo como usado"""
+        symbol.used = True
+        if self.summary is not None and self.is_global(symbol):
+            self.summary.uses.add(symbol.name)
+    
+    def mark_initialized(self, symbol):
+        """Marca una variable como inicializada"""
+        symbol.initialized = True
+        if self.summary is not None and self.is_global(symbol):
+            self.summary.writes.add(symbol.name)
+    
     def get_all_symbols(self):
         """Retorna todos los símbolos con sus ámbitos"""
         all_symbols = []
@@ -93,31 +205,51 @@ class SymbolTable:
 class SemanticAnalyzer:
     """Analizador semántico que recorre el AST"""
     
-    def __init__(self):
-        self.symbol_table = SymbolTable()
-        self.errors = []
-        self.warnings = []
-        self.current_function_return_type = None
+    def __init__(self, collector=None, verbose=False):
+        self.verbose = verbose
+        self.symbol_table = SymbolTable(verbose)
+        # Los errores y advertencias se acumulan como registros estructurados;
+        # nada se imprime hasta print_results
+        self.diagnostics = collector or Diagnostics()
+        self.current_function_return_type = T_UNKNOWN
         self.has_return = False
-    
-    def error(self, message, node=None):
+        # Re-análisis incremental: resumen por función del último análisis y
+        # símbolos globales anteriores para conservar su identidad
+        self.function_cache = {}
+        self.previous_globals = {}
+        self.duplicate_functions = set()
+        self.checked_functions = []
+        self.reused_functions = []
+    
+    @property
+    def errors(self):
+        return [r.message for r in self.diagnostics.errors()]
+    
+    @property
+    def warnings(self):
+        return [r.message for r in self.diagnostics.warnings()]
+    
+    def error(self, message, node=None, code=diagnostics.INTERNAL_ERROR):
         """Registra un error semántico"""
-        self.errors.append(message)
-        print(f"[SEMANTIC ERROR] {message}")
+        self.diagnostics.error(code, message, node)
     
-    def warning(self, message, node=None):
+    def warning(self, message, node=None, code=diagnostics.INTERNAL_ERROR):
         """Registra una advertencia semántica"""
-        self.warnings.append((message, node))
-        print(f"[SEMANTIC WARNING] {message}")
+        self.diagnostics.warning(code, message, node)
     
     def analyze(self, ast_root):
         """Punto de entrada principal para el análisis semántico"""
-        print("\\n========== ANÁLISIS SEMÁNTICO ==========\\n")
-        print("[SEMANTIC] Analizando programa principal")
+        self.symbol_table.trace("\\n========== ANÁLISIS SEMÁNTICO ==========\\n")
+        self.symbol_table.trace("[SEMANTIC] Analizando programa principal")
+        
+        self.duplicate_functions = set()
+        self.checked_functions = []
+        self.reused_functions = []
         
         try:
             # Primer pasada: recolectar declaraciones de funciones y variables globales
             self.collect_declarations(ast_root)
+            self.define_builtins()
             
             # Segunda pasada: análisis semántico completo
             self.visit(ast_root)
@@ -125,16 +257,33 @@ class SemanticAnalyzer:
             # Verificaciones finales
             self.final_checks()
             
-            # Imprimir tabla de símbolos
-            self.print_symbol_table()
-            
-            # Imprimir resultados
-            self.print_results()
-            
-            return self.errors, [w[0] for w in self.warnings]
+            # Solo se recolectan los diagnósticos: quien llama decide si
+            # imprimirlos con print_symbol_table y print_results
+            return self.errors, self.warnings
         except Exception as e:
             self.error(f"Error interno del analizador semántico: {e}")
-            return self.errors, [w[0] for w in self.warnings]
+            return self.errors, self.warnings
+    
+    def reanalyze(self, ast_root, collector=None):
+        """Analiza una versión editada del programa reutilizando el análisis anterior.
+        
+        Solo se revisan las funciones cuyo cuerpo cambió o cuyas dependencias
+        globales (firmas de funciones llamadas, tipo o inicialización de
+        variables globales) ya no coinciden; el resto se toma de la caché."""
+        self.previous_globals = self.symbol_table.scopes[0]
+        self.symbol_table = SymbolTable(self.verbose)
+        self.diagnostics = collector or Diagnostics()
+        return self.analyze(ast_root)
+    
+    def reuse_global(self, symbol):
+        """Conserva el símbolo global anterior si su declaración no cambió"""
+        previous = self.previous_globals.get(symbol.name)
+        if previous is None or declaration_key(previous) != declaration_key(symbol):
+            return symbol
+        previous.initialized = False
+        previous.used = False
+        previous.defined_at = symbol.defined_at
+        return previous
     
     def collect_declarations(self, node):
         """Primer pasada: recolecta declaraciones de funciones y variables globales"""
@@ -154,6 +303,15 @@ class SemanticAnalyzer:
                 if isinstance(child, Node):
                     self.collect_declarations(child)
     
+    def define_builtins(self):
+        """Declara las funciones del runtime que el programa no redefine"""
+        global_scope = self.symbol_table.scopes[0]
+        for name, (return_type, params) in BUILTINS.items():
+            if name not in global_scope:
+                symbol = Symbol(name, 'function', return_type=return_type, params=params)
+                symbol.builtin = True
+                self.symbol_table.define(symbol)
+    
     def collect_global_var(self, node):
         """Recolecta variables globales"""
         if len(node.children) >= 2:
@@ -172,11 +330,12 @@ class SemanticAnalyzer:
                     initialized=False
                 )
                 var_symbol.defined_at = node
+                var_symbol = self.reuse_global(var_symbol)
                 
                 try:
                     self.symbol_table.define(var_symbol)
                 except SemanticError as e:
-                    self.error(str(e), node)
+                    self.error(e.message, node, e.code)
     
     def collect_function(self, node):
         """Recolecta declaraciones de funciones"""
@@ -200,11 +359,13 @@ class SemanticAnalyzer:
                     params=params
                 )
                 func_symbol.defined_at = node
+                func_symbol = self.reuse_global(func_symbol)
                 
                 try:
                     self.symbol_table.define(func_symbol)
                 except SemanticError as e:
-                    self.error(str(e), node)
+                    self.error(e.message, node, e.code)
+                    self.duplicate_functions.add(func_name)
     
     def visit(self, node):
         """Método de dispatch para visitar nodos según su tipo"""
@@ -221,6 +382,78 @@ class SemanticAnalyzer:
             if isinstance(child, Node):
                 self.visit(child)
     
+    def visit_Definicion(self, node):
+        """Visita una definición global; las funciones pasan por la caché incremental."""
+        for i, child in enumerate(node.children):
+            if isinstance(child, Node) and child.name == 'DefFunc':
+                node.children[i] = self.visit_function_incremental(child)
+            elif isinstance(child, Node):
+                self.visit(child)
+    
+    def visit_function_incremental(self, node):
+        """Analiza una función o reutiliza su resumen; retorna el subárbol anotado."""
+        name_node = node.children[1] if len(node.children) > 1 else None
+        func_name = name_node.token.lexema if name_node is not None and name_node.token else None
+        fingerprint, start_line = function_fingerprint(node)
+        
+        if func_name in self.duplicate_functions:
+            self.function_cache.pop(func_name, None)
+            self.visit(node)
+            return node
+        
+        cached = self.function_cache.get(func_name)
+        if (cached is not None and cached.fingerprint == fingerprint
+                and self.environment_unchanged(cached)):
+            self.replay_summary(cached, start_line)
+            return cached.node
+        
+        summary = FunctionSummary(func_name, fingerprint, start_line, node)
+        first_record = len(self.diagnostics.records)
+        self.symbol_table.summary = summary
+        try:
+            self.visit(node)
+        finally:
+            self.symbol_table.summary = None
+        summary.records = self.diagnostics.records[first_record:]
+        if func_name is not None:
+            self.function_cache[func_name] = summary
+        self.checked_functions.append(func_name)
+        return node
+    
+    def environment_unchanged(self, summary):
+        """Verifica que los globales de los que depende la función no hayan cambiado"""
+        global_scope = self.symbol_table.scopes[0]
+        for name, key in summary.environment.items():
+            if symbol_key(global_scope.get(name)) != key:
+                return False
+        return True
+    
+    def replay_summary(self, summary, start_line):
+        """Aplica los efectos y diagnósticos cacheados de una función sin cambios"""
+        global_scope = self.symbol_table.scopes[0]
+        for name in summary.uses:
+            if name in global_scope:
+                global_scope[name].used = True
+        for name in summary.writes:
+            if name in global_scope:
+                global_scope[name].initialized = True
+        if summary.name in global_scope:
+            global_scope[summary.name].defined_at = summary.node
+        
+        # La función pudo moverse de línea por ediciones anteriores a ella
+        delta = start_line - summary.start_line
+        if delta:
+            shift_lines(summary.node, delta)
+            summary.start_line = start_line
+            summary.records = [
+                Diagnostic(r.severity, r.code, r.message,
+                           r.line + delta if r.line is not None else None,
+                           r.column, r.node_id)
+                for r in summary.records
+            ]
+        self.diagnostics.extend(summary.records)
+        self.reused_functions.append(summary.name)
+    
     def visit_DefFunc(self, node):
         """Visita una definición de función."""
         if len(node.children) < 6:
@@ -244,9 +477,13 @@ class SemanticAnalyzer:
         # Entrar al scope de la función
         self.symbol_table.enter_scope(f"function_{func_name}")
         self.symbol_table.current_function = func_symbol
-        self.current_function_return_type = func_symbol.return_type
+        self.current_function_return_type = func_symbol.return_type_id
         self.has_return = False
         
+        node.symbol = func_symbol
+        func_symbol.param_symbols = []
+        func_symbol.local_symbols = []
+        
         # Agregar parámetros al scope de la función
         for param_name, param_type in func_symbol.params:
             param_symbol = Symbol(
@@ -257,20 +494,22 @@ class SemanticAnalyzer:
             )
             try:
                 self.symbol_table.define(param_symbol)
+                func_symbol.param_symbols.append(param_symbol)
             except SemanticError as e:
-                self.error(str(e), node)
+                self.error(e.message, node, e.code)
         
         # Analizar el cuerpo de la función
         self.visit(body_node)
         
         # Verificar que funciones no-void tengan return
         if func_symbol.return_type != 'void' and not self.has_return:
-            self.warning(f"Función '{func_name}' con tipo de retorno '{func_symbol.return_type}' no tiene declaración return", node)
+            self.warning(f"Función '{func_name}' con tipo de retorno '{func_symbol.return_type}' no tiene declaración return", node,
+                         diagnostics.MISSING_RETURN)
         
         # Salir del scope de la función
         self.symbol_table.exit_scope()
         self.symbol_table.current_function = None
-        self.current_function_return_type = None
+        self.current_function_return_type = T_UNKNOWN
         self.has_return = False
     
     def visit_BloqFunc(self, node):
@@ -314,8 +553,11 @@ class SemanticAnalyzer:
                     
                     try:
                         self.symbol_table.define(var_symbol)
+                        node.symbol = var_symbol
+                        if self.symbol_table.current_function:
+                            self.symbol_table.current_function.local_symbols.append(var_symbol)
                     except SemanticError as e:
-                        self.error(str(e), node)
+                        self.error(e.message, node, e.code)
     
     def visit_Sentencia(self, node):
         """Visita una sentencia."""
@@ -331,6 +573,7 @@ class SemanticAnalyzer:
         has_return = False
         has_assignment = False
         assignment_var = None
+        assignment_target = None
         assignment_op_pos = None
         
         # Analizar estructura completa - buscar patrón Identificador OpAsignacion
@@ -349,20 +592,21 @@ class SemanticAnalyzer:
                             (prev_child.name == 'identificador' or 
                              prev_child.name == 'Identificador')):
                             assignment_var = prev_child.token.lexema
+                            assignment_target = prev_child
                             break
         
         if has_return:
             self.visit_return_statement(node)
         elif has_assignment and assignment_var:
             # Sentencia de asignación directa
-            self.visit_assignment_in_sentencia(node, assignment_var, assignment_op_pos)
+            self.visit_assignment_in_sentencia(node, assignment_var, assignment_op_pos, assignment_target)
         else:
             # Visitar otros hijos que no sean DefLocal (ya visitados)
             for child in node.children:
                 if isinstance(child, Node) and child.name != 'DefLocal':
                     self.visit(child)
     
-    def visit_assignment_in_sentencia(self, node, var_name, op_pos):
+    def visit_assignment_in_sentencia(self, node, var_name, op_pos, target_node=None):
         """Procesa una asignación dentro de una sentencia compleja"""
         
         # Buscar la expresión después del operador de asignación
@@ -378,38 +622,42 @@ class SemanticAnalyzer:
         # Verificar que la variable esté declarada
         var_symbol = self.symbol_table.lookup(var_name, mark_used=False)
         if not var_symbol:
-            self.error(f"Variable '{var_name}' no declarada", node)
+            self.error(f"Variable '{var_name}' no declarada", node, diagnostics.UNDECLARED_VARIABLE)
             return
         
         if var_symbol.symbol_type not in ['variable', 'parameter']:
-            self.error(f"'{var_name}' no es una variable", node)
+            self.error(f"'{var_name}' no es una variable", node, diagnostics.NOT_A_VARIABLE)
             return
         
+        if target_node is not None:
+            target_node.symbol = var_symbol
+            target_node.type_id = var_symbol.type_id
+        
         # Analizar la expresión del lado derecho
         expr_type = self.visit(expr_node)
         
         # Marcar variable como inicializada
-        var_symbol.initialized = True
-        var_symbol.used = True
+        self.symbol_table.mark_initialized(var_symbol)
+        self.symbol_table.mark_used(var_symbol)
         
-        if expr_type and not self.are_types_compatible(var_symbol.data_type, expr_type):
-            self.error(f"Asignación de tipo incompatible: '{var_name}' es '{var_symbol.data_type}' pero se asigna '{expr_type}'", node)
+        if expr_type and not self.are_types_compatible(var_symbol.type_id, expr_type):
+            self.error(f"Asignación de tipo incompatible: '{var_name}' es '{var_symbol.data_type}' pero se asigna '{type_name(expr_type)}'", node, diagnostics.INCOMPATIBLE_ASSIGNMENT)
     
     def visit_return_statement(self, node):
         """Visita una sentencia return."""
         self.has_return = True
         
-        if self.current_function_return_type is None:
-            self.error("Sentencia 'return' fuera de una función", node)
+        if self.current_function_return_type == T_UNKNOWN:
+            self.error("Sentencia 'return' fuera de una función", node, diagnostics.RETURN_OUTSIDE_FUNCTION)
             return
         
         # Buscar expresión de retorno
         for child in node.children:
             if isinstance(child, Node) and child.name in ['Expresion', 'ValorRegresa']:
                 expr_type = self.visit(child)
-                if expr_type and self.current_function_return_type != 'void':
+                if expr_type and self.current_function_return_type != T_VOID:
                     if not self.are_types_compatible(self.current_function_return_type, expr_type):
-                        self.error(f"Tipo de retorno incompatible: esperado '{self.current_function_return_type}', encontrado '{expr_type}'", node)
+                        self.error(f"Tipo de retorno incompatible: esperado '{type_name(self.current_function_return_type)}', encontrado '{type_name(expr_type)}'", node, diagnostics.INCOMPATIBLE_RETURN)
                 break
     
     def visit_assignment_statement(self, node):
@@ -432,90 +680,115 @@ class SemanticAnalyzer:
         # Verificar que la variable esté declarada
         var_symbol = self.symbol_table.lookup(var_name, mark_used=False)
         if not var_symbol:
-            self.error(f"Variable '{var_name}' no declarada", node)
+            self.error(f"Variable '{var_name}' no declarada", node, diagnostics.UNDECLARED_VARIABLE)
             return
         
         if var_symbol.symbol_type not in ['variable', 'parameter']:
-            self.error(f"'{var_name}' no es una variable", node)
+            self.error(f"'{var_name}' no es una variable", node, diagnostics.NOT_A_VARIABLE)
             return
         
         # Analizar la expresión del lado derecho
         expr_type = self.visit(expr_node)
         
         # Marcar variable como inicializada
-        var_symbol.initialized = True
-        var_symbol.used = True
+        self.symbol_table.mark_initialized(var_symbol)
+        self.symbol_table.mark_used(var_symbol)
         
-        if expr_type and not self.are_types_compatible(var_symbol.data_type, expr_type):
-            self.error(f"Asignación de tipo incompatible: '{var_name}' es '{var_symbol.data_type}' pero se asigna '{expr_type}'", node)
+        if expr_type and not self.are_types_compatible(var_symbol.type_id, expr_type):
+            self.error(f"Asignación de tipo incompatible: '{var_name}' es '{var_symbol.data_type}' pero se asigna '{type_name(expr_type)}'", node, diagnostics.INCOMPATIBLE_ASSIGNMENT)
     
     def visit_ValorRegresa(self, node):
         """Visita el valor de retorno."""
         if len(node.children) > 0:
-            return self.visit(node.children[0])
-        return None
+            node.type_id = self.visit(node.children[0]) or T_UNKNOWN
+        return node.type_id
     
     def visit_Expresion(self, node):
-        """Visita una expresión y retorna su tipo."""
+        """Visita una expresión, anota su tipo en el nodo y lo retorna."""
+        node.type_id = self.check_expression(node)
+        return node.type_id
+    
+    def check_expression(self, node):
+        """Calcula el tipo de una expresión según su forma."""
         if len(node.children) == 1:
             return self.visit(node.children[0])
+        elif len(node.children) == 2:
+            # Operador unario: '-' Expresion o '!' Expresion
+            operand_type = self.visit(node.children[1]) or T_UNKNOWN
+            return self.check_unary_operation(node.children[0], operand_type, node)
         elif len(node.children) == 3:
-            left_type = self.visit(node.children[0])
+            if node.children[0].name == '(':
+                return self.visit(node.children[1])
+            left_type = self.visit(node.children[0]) or T_UNKNOWN
             operator = node.children[1]
-            right_type = self.visit(node.children[2])
+            right_type = self.visit(node.children[2]) or T_UNKNOWN
             return self.check_binary_operation(left_type, operator, right_type, node)
-        return None
+        return T_UNKNOWN
     
     def visit_Termino(self, node):
-        """Visita un término y retorna su tipo."""
+        """Visita un término, anota su tipo en el nodo y lo retorna."""
+        node.type_id = self.check_term(node)
+        return node.type_id
+    
+    def check_term(self, node):
+        """Calcula el tipo de un término y resuelve su símbolo si es variable."""
         if len(node.children) == 1:
             child = node.children[0]
             
             if child.state == Node.TERMINAL:
                 if child.name == 'entero' or child.name == 'Entero':
-                    return 'int'
+                    return T_INT
                 elif child.name == 'real' or child.name == 'Real':
-                    return 'float'
+                    return T_FLOAT
                 elif child.name == 'identificador' or child.name == 'Identificador':
                     var_name = child.token.lexema
                     var_symbol = self.symbol_table.lookup(var_name)
                     if not var_symbol:
-                        self.error(f"Variable '{var_name}' no declarada", node)
-                        return None
+                        self.error(f"Variable '{var_name}' no declarada", node, diagnostics.UNDECLARED_VARIABLE)
+                        return T_UNKNOWN
                     
                     if var_symbol.symbol_type not in ['variable', 'parameter']:
-                        self.error(f"'{var_name}' no es una variable", node)
-                        return None
+                        self.error(f"'{var_name}' no es una variable", node, diagnostics.NOT_A_VARIABLE)
+                        return T_UNKNOWN
                     
                     if not var_symbol.initialized:
-                        self.warning(f"Variable '{var_name}' usada antes de ser inicializada", node)
+                        self.warning(f"Variable '{var_name}' usada antes de ser inicializada", node, diagnostics.UNINITIALIZED_VARIABLE)
                     
-                    return var_symbol.data_type
+                    child.symbol = var_symbol
+                    child.type_id = var_symbol.type_id
+                    return var_symbol.type_id
             elif isinstance(child, Node):
                 return self.visit(child)
         
-        return None
+        return T_UNKNOWN
     
     def visit_LlamadaFunc(self, node):
-        """Visita una llamada a función y retorna su tipo."""
+        """Visita una llamada a función, anota su tipo en el nodo y lo retorna."""
+        node.type_id = self.check_function_call(node)
+        return node.type_id
+    
+    def check_function_call(self, node):
+        """Valida una llamada a función, resuelve su símbolo y retorna su tipo."""
         if len(node.children) < 3:
-            return None
+            return T_UNKNOWN
         
         func_name_node = node.children[0]
         
         if func_name_node.state != Node.TERMINAL:
-            return None
+            return T_UNKNOWN
         
         func_name = func_name_node.token.lexema
         func_symbol = self.symbol_table.lookup(func_name, mark_used=True)
         
         if not func_symbol:
-            self.error(f"Función '{func_name}' no declarada", node)
-            return None
+            self.error(f"Función '{func_name}' no declarada", node, diagnostics.UNDECLARED_FUNCTION)
+            return T_UNKNOWN
         
         if func_symbol.symbol_type != 'function':
-            self.error(f"'{func_name}' no es una función", node)
-            return None
+            self.error(f"'{func_name}' no es una función", node, diagnostics.NOT_A_FUNCTION)
+            return T_UNKNOWN
+        
+        node.symbol = func_symbol
         
         # Validar tipos de argumentos
         # Estructura esperada: LlamadaFunc -> identificador ( Argumentos )
@@ -523,21 +796,19 @@ class SemanticAnalyzer:
             argumentos_node = node.children[2]  # Nodo Argumentos
             if argumentos_node and argumentos_node.name == 'Argumentos':
                 arg_types = self.extract_argument_types(argumentos_node)
-                expected_param_types = [param_type for _, param_type in func_symbol.params]
+                expected_param_types = func_symbol.param_type_ids
                 
                 # Verificar número de argumentos
                 if len(arg_types) != len(expected_param_types):
-                    self.error(f"Función '{func_name}' espera {len(expected_param_types)} argumentos, pero se pasaron {len(arg_types)}", node)
-                    return func_symbol.return_type
+                    self.error(f"Función '{func_name}' espera {len(expected_param_types)} argumentos, pero se pasaron {len(arg_types)}", node, diagnostics.ARGUMENT_COUNT)
+                    return func_symbol.return_type_id
                 
                 # Verificar tipos de argumentos
                 for i, (arg_type, expected_type) in enumerate(zip(arg_types, expected_param_types)):
-                    if arg_type and expected_type and arg_type != expected_type:
-                        # Verificar conversiones implícitas válidas
-                        if not self.is_compatible_type(arg_type, expected_type):
-                            self.error(f"Función '{func_name}': argumento {i+1} es de tipo '{arg_type}' pero se esperaba '{expected_type}'", node)
+                    if arg_type and expected_type and not self.is_compatible_type(arg_type, expected_type):
+                        self.error(f"Función '{func_name}': argumento {i+1} es de tipo '{type_name(arg_type)}' pero se esperaba '{type_name(expected_type)}'", node, diagnostics.ARGUMENT_TYPE)
         
-        return func_symbol.return_type
+        return func_symbol.return_type_id
     
     def extract_argument_types(self, argumentos_node):
         """Extrae los tipos de los argumentos de una llamada a función."""
@@ -585,17 +856,9 @@ class SemanticAnalyzer:
     
     def is_compatible_type(self, from_type, to_type):
         """Verifica si los tipos son compatibles (conversiones implícitas válidas)."""
-        # En un lenguaje estricto, no permitimos conversiones implícitas de float a int
-        # Solo permitimos int a float si se desea
-        if from_type == to_type:
-            return True
-        
-        # Comentado: permitir int a float (si se desea flexibilidad)
-        # if from_type == 'int' and to_type == 'float':
-        #     return True
-        
-        # No permitir otras conversiones automáticas
-        return False
+        # En un lenguaje estricto, los argumentos no admiten conversiones
+        # implícitas; la tabla ARGUMENT_COMPATIBLE solo acepta tipos iguales
+        return ARGUMENT_COMPATIBLE[from_type][to_type]
     
     def extract_parameters(self, params_node):
         """Extrae los parámetros de un nodo Parametros."""
@@ -644,47 +907,51 @@ class SemanticAnalyzer:
     
     def check_binary_operation(self, left_type, operator_node, right_type, node):
         """Verifica una operación binaria y retorna el tipo resultado."""
-        if not left_type or not right_type:
-            return None
-        
         if operator_node.state != Node.TERMINAL:
-            return None
+            return T_UNKNOWN
+        
+        op_cls = op_class(operator_node.name)
+        if op_cls is None or op_cls >= len(BINARY_RESULT):
+            return T_UNKNOWN
+        
+        result = BINARY_RESULT[op_cls][left_type][right_type]
+        if result == T_ERROR:
+            self.error(BINARY_ERROR_MESSAGES[op_cls].format(
+                op=operator_node.token.lexema,
+                left=type_name(left_type),
+                right=type_name(right_type)), node, diagnostics.INVALID_OPERATION)
+            return T_UNKNOWN
+        return result
+    
+    def check_unary_operation(self, operator_node, operand_type, node):
+        """Verifica una operación unaria ('-' o '!') y retorna el tipo resultado."""
+        if operator_node.state != Node.TERMINAL:
+            return T_UNKNOWN
         
-        op = operator_node.token.lexema
-        
-        if op in ['+', '-', '*', '/']:
-            if left_type in ['int', 'float'] and right_type in ['int', 'float']:
-                if left_type == 'float' or right_type == 'float':
-                    return 'float'
-                return 'int'
-            else:
-                self.error(f"Operación aritmética '{op}' no válida entre '{left_type}' y '{right_type}'", node)
-                return None
-        elif op in ['<', '>', '<=', '>=', '==', '!=']:
-            if left_type in ['int', 'float'] and right_type in ['int', 'float']:
-                return 'int'
-            else:
-                self.error(f"Comparación '{op}' no válida entre '{left_type}' y '{right_type}'", node)
-                return None
-        elif op in ['&&', '||']:
-            return 'int'
+        table = UNARY_RESULT.get(op_class(operator_node.name))
+        if table is None:
+            return T_UNKNOWN
         
-        return None
+        result = table[operand_type]
+        if result == T_ERROR:
+            self.error(UNARY_ERROR_MESSAGE.format(
+                op=operator_node.token.lexema,
+                operand=type_name(operand_type)), node, diagnostics.INVALID_OPERATION)
+            return T_UNKNOWN
+        return result
     
     def are_types_compatible(self, expected, actual):
         """Verifica si dos tipos son compatibles para asignación."""
-        if expected == actual:
-            return True
-        if expected == 'float' and actual == 'int':
-            return True
-        return False
+        return ASSIGNABLE[expected][actual]
     
     def final_checks(self):
         """Verificaciones finales después del análisis."""
         all_symbols = self.symbol_table.get_all_symbols()
         for scope_name, symbol in all_symbols:
-            if symbol.symbol_type == 'function' and not symbol.used and symbol.name != 'main':
-                self.warning(f"Función '{symbol.name}' declarada pero no usada")
+            if (symbol.symbol_type == 'function' and not symbol.used and symbol.name != 'main'
+                    and not symbol.builtin):
+                self.warning(f"Función '{symbol.name}' declarada pero no usada",
+                             symbol.defined_at, diagnostics.UNUSED_FUNCTION)
     
     def print_symbol_table(self):
         """Imprime la tabla de símbolos para debugging."""
@@ -706,38 +973,29 @@ class SemanticAnalyzer:
         """Imprime los resultados del análisis semántico."""
         print("\\n========== RESULTADOS ANÁLISIS SEMÁNTICO ==========\\n")
         
-        if not self.errors and not self.warnings:
+        if not self.diagnostics.records:
             print("Análisis semántico completado sin errores ni advertencias")
         else:
-            if self.errors:
-                print(f"ERRORES ENCONTRADOS ({len(self.errors)}):")
-                for i, error in enumerate(self.errors, 1):
-                    print(f"  {i}. {error}")
-                print()
-            
-            if self.warnings:
-                print(f"ADVERTENCIAS ({len(self.warnings)}):")
-                for i, (warning, node) in enumerate(self.warnings, 1):
-                    print(f"  {i}. {warning}")
-                print()
+            # Una sola escritura para todos los diagnósticos
+            self.diagnostics.flush()
         
         print(f"ESTADÍSTICAS:")
         all_symbols = self.symbol_table.get_all_symbols()
-        functions = [s for _, s in all_symbols if s.symbol_type == 'function']
+        functions = [s for _, s in all_symbols if s.symbol_type == 'function' and not s.builtin]
         variables = [s for _, s in all_symbols if s.symbol_type in ['variable', 'parameter']]
         
         print(f"  - Funciones declaradas: {len(functions)}")
         print(f"  - Variables declaradas: {len(variables)}")
-        print(f"  - Errores semánticos: {len(self.errors)}")
-        print(f"  - Advertencias: {len(self.warnings)}")
+        print(f"  - Errores semánticos: {self.diagnostics.error_count}")
+        print(f"  - Advertencias: {self.diagnostics.warning_count}")
         
         print("\\n" + "="*50)
     
     def has_errors(self):
-        return len(self.errors) > 0
+        return self.diagnostics.has_errors()
     
     def get_errors(self):
         return self.errors
     
     def get_warnings(self):
-        return [w[0] for w in self.warnings]
\ No newline at end of file
+        return self.warnings
\ No newline at end of file
@@ -0,0 +1,118 @@
+# Simulador de la IR: ejecuta un programa (ir.Program) instrucción por
+# instrucción con la aritmética del código generado (enteros de 32 bits
+# con desborde, división truncada hacia cero, reales double). Sirve para
+# comprobar que los pases de optimización no cambian el resultado: se
+# ejecuta la IR antes y después de optimizar y se comparan (--verify).
+
+import math
+
+from ir import Const, Global
+from optimizer import evaluate_unary, evaluate_binary, float_to_int
+from type_system import T_FLOAT
+
+
+class SimulationError(Exception):
+    """Falla en ejecución (división entre cero) o límite de pasos agotado"""
+
+
+def divide_floats(a, b):
+    if b != 0.0:
+        return a / b
+    if a == 0.0 or math.isnan(a):
+        return math.nan
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+class Simulator:
+    """Ejecuta funciones de un programa en IR y cuenta los pasos.
+
+    Con profile=True cuenta además las entradas a cada bloque, los destinos
+    tomados por cada 'br' y las ejecuciones de cada 'call' (para pgo.py)."""
+
+    def __init__(self, program, max_steps=1000000, profile=False):
+        self.functions = {function.name: function for function in program.functions}
+        self.globals = {symbol.name: 0.0 if symbol.data_type == 'float' else 0
+                        for symbol in program.globals}
+        self.max_steps = max_steps
+        self.steps = 0
+        self.profile = profile
+        self.block_counts = {}    # Bloque -> veces que se entró
+        self.branch_counts = {}   # 'br' -> [veces hacia el primer destino, hacia el segundo]
+        self.call_counts = {}     # 'call' -> veces que se ejecutó
+        self.output = []          # Valores escritos con print, en orden
+
+    def run(self, name='main', args=()):
+        try:
+            return self.call(self.functions[name], list(args))
+        except RecursionError:
+            raise SimulationError("recursión demasiado profunda") from None
+
+    def call_builtin(self, name, args):
+        """Ejecuta una función del runtime (runtime.BUILTINS)"""
+        if name == 'print':
+            self.output.append(args[0])
+            return 0
+        raise SimulationError(f"función desconocida: {name}")
+
+    def call(self, function, args):
+        env = dict(zip(function.params, args))
+
+        def value(operand):
+            if isinstance(operand, Const):
+                return operand.value
+            if isinstance(operand, Global):
+                return self.globals[operand.name]
+            # Una variable que se lee antes de asignarse vale 0
+            return env.get(operand, 0.0 if operand.type_id == T_FLOAT else 0)
+
+        block = function.entry
+        while True:
+            if self.profile:
+                self.block_counts[block] = self.block_counts.get(block, 0) + 1
+            for instr in block.instrs:
+                self.steps += 1
+                if self.steps > self.max_steps:
+                    raise SimulationError(f"se superó el límite de {self.max_steps} pasos")
+                op = instr.op
+                args = [value(arg) for arg in instr.args]
+                if op == 'jmp':
+                    block = instr.targets[0]
+                    break
+                if op == 'br':
+                    taken = 0 if args[0] != 0 else 1
+                    if self.profile:
+                        self.branch_counts.setdefault(instr, [0, 0])[taken] += 1
+                    block = instr.targets[taken]
+                    break
+                if op == 'ret':
+                    return args[0] if args else 0
+                if op == 'store':
+                    self.globals[instr.dest.name] = args[0]
+                    continue
+                if op == 'call':
+                    if self.profile:
+                        self.call_counts[instr] = self.call_counts.get(instr, 0) + 1
+                    if instr.func in self.functions:
+                        result = self.call(self.functions[instr.func], args)
+                    else:
+                        result = self.call_builtin(instr.func, args)
+                elif op in ('copy', 'load'):
+                    result = args[0]
+                elif op == 'i2f':
+                    result = float(args[0])
+                elif op == 'f2i':
+                    result = float_to_int(args[0])
+                elif op in ('neg', '!'):
+                    result = evaluate_unary('-' if op == 'neg' else '!', instr.type_id, args[0])[1]
+                elif op == '/' and instr.type_id == T_FLOAT:
+                    result = divide_floats(args[0], args[1])
+                else:
+                    evaluated = evaluate_binary(op, instr.type_id, args[0], instr.type_id, args[1])
+                    if evaluated is None:
+                        raise SimulationError(f"división entre cero en {function.name}")
+                    result = evaluated[1]
+                if instr.dest is not None:
+                    env[instr.dest] = result
+            else:
+                # Bloque sin terminador (no debería ocurrir): retorna 0
+                return 0
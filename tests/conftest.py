@@ -0,0 +1,90 @@
+# Utilidades compartidas por las pruebas: compilan un programa con las
+# mismas fases que main.py, lo ejecutan en el simulador de la IR y, en
+# Linux x86-64, como ejecutable ELF generado por elf.py.
+
+import contextlib
+import io
+import os
+import platform
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import analyze_tokens
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from code_generator import CodeGenerator
+from optimizer import ConstantFolder
+from ir import build_program
+from simulator import Simulator
+from elf import write_executable
+from utils import cargar_gramatica_lr
+
+NATIVE = sys.platform.startswith('linux') and platform.machine() in ('x86_64', 'AMD64')
+
+_grammar_data = None
+
+
+def grammar():
+    global _grammar_data
+    if _grammar_data is None:
+        _grammar_data = cargar_gramatica_lr(os.path.join(ROOT, 'compilador.lr'))
+    return _grammar_data
+
+
+def parse_program(source):
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast_root = Parser(grammar()).parse(analyze_tokens(source))
+    assert ast_root is not None, "no se pudo construir el AST"
+    return ast_root
+
+
+def compile_program(source, opt_level=0, **options):
+    """Compila como main.py; retorna (ensamblador, generador, IR sin optimizar)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ast_root = parse_program(source)
+        analyzer = SemanticAnalyzer()
+        analyzer.analyze(ast_root)
+        assert not analyzer.errors, analyzer.errors
+        reference = build_program(ast_root, analyzer.symbol_table)
+        if opt_level > 0:
+            ConstantFolder().optimize(ast_root)
+        generator = CodeGenerator(opt_level=opt_level, **options)
+        asm = generator.generate_code(ast_root, analyzer.symbol_table)
+    return asm, generator, reference
+
+
+def simulate(program):
+    """Salida esperada del ejecutable según el simulador de la IR"""
+    simulator = Simulator(program)
+    result = simulator.run()
+    return "".join(f"{value}\n" for value in simulator.output) + f"Resultado: {result}\n"
+
+
+def run_native(asm, directory):
+    """Ensambla con el codificador propio, ejecuta y retorna la salida estándar"""
+    path = os.path.join(str(directory), 'a.out')
+    write_executable(asm, path)
+    completed = subprocess.run([path], capture_output=True, text=True, timeout=10)
+    return completed.stdout
+
+
+@pytest.fixture
+def check_program(tmp_path):
+    """Compila a cada nivel y compara el simulador (sin optimizar) con la
+    IR optimizada y, si se puede, con el ejecutable"""
+    def check(source, levels=(0, 1, 2), **options):
+        outputs = {}
+        for level in levels:
+            asm, generator, reference = compile_program(source, level, **options)
+            expected = simulate(reference)
+            assert simulate(generator.program) == expected
+            if NATIVE:
+                assert run_native(asm, tmp_path) == expected
+            outputs[level] = expected
+        return outputs[levels[-1]]
+    return check
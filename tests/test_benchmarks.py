@@ -0,0 +1,30 @@
+# Programas de benchmarks/ en cada nivel de optimización (user-034)
+
+import os
+
+import pytest
+
+from conftest import ROOT
+
+RESULTS = {
+    'biblioteca': 40,
+    'ciclos': 480,
+    'condiciones': 8,
+    'constantes': 70,
+    'desenrollado': 4249,
+    'identidades': 68,
+    'reales': 30,
+    'recursion': 533,
+}
+
+
+@pytest.mark.parametrize('name', sorted(RESULTS))
+def test_benchmark_matches_unoptimized_ir(name, check_program):
+    with open(os.path.join(ROOT, 'benchmarks', f'{name}.c'), encoding='utf-8') as f:
+        output = check_program(f.read())
+    assert output.splitlines()[-1] == f"Resultado: {RESULTS[name]}"
+
+
+def test_every_benchmark_is_listed():
+    names = {entry[:-2] for entry in os.listdir(os.path.join(ROOT, 'benchmarks')) if entry.endswith('.c')}
+    assert names == set(RESULTS)
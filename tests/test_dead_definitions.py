@@ -0,0 +1,48 @@
+# Eliminación de funciones y globales sin uso (user-041)
+
+import re
+
+from conftest import compile_program
+
+PROGRAM = """int usada;
+int escrita;
+int muerta;
+int auxiliar(int n){
+    return n + muerta;
+}
+int sin_llamar(int n){
+    return auxiliar(n) * 2;
+}
+int paso(int n){
+    return n + usada;
+}
+int main(){
+    usada = 3;
+    escrita = 5;
+    return paso(usada);
+}
+"""
+
+
+def labels(asm):
+    return set(re.findall(r"^\s*(\w+):", asm, re.M))
+
+
+def test_unreachable_functions_and_their_globals_are_removed():
+    asm, generator, _ = compile_program(PROGRAM, 1, inline_threshold=0)
+    pass_manager = generator.pass_manager
+    assert pass_manager.removed_functions == ['auxiliar', 'sin_llamar']
+    assert pass_manager.removed_globals == ['muerta']
+    assert {'auxiliar', 'sin_llamar', 'muerta'}.isdisjoint(labels(asm))
+    # Una global que solo se escribe sigue en .data
+    assert {'paso', 'main', 'usada', 'escrita'} <= labels(asm)
+
+
+def test_nothing_is_removed_without_optimization():
+    asm, generator, _ = compile_program(PROGRAM, 0)
+    assert generator.pass_manager.removed_functions == []
+    assert {'auxiliar', 'sin_llamar', 'muerta'} <= labels(asm)
+
+
+def test_result_is_unchanged(check_program):
+    assert check_program(PROGRAM).splitlines() == ['Resultado: 6']
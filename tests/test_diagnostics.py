@@ -0,0 +1,64 @@
+# Diagnósticos estructurados (user-028)
+
+import io
+
+from diagnostics import (Diagnostics, ERROR, WARNING, SYNTAX_ERROR, UNDECLARED_VARIABLE,
+                         UNINITIALIZED_VARIABLE, UNUSED_FUNCTION)
+from lexer import analyze_tokens
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+from conftest import grammar, parse_program
+
+SOURCE = """int g;
+int sobra(){
+    return 1;
+}
+int main(){
+    int x;
+    z = 2;
+    return x + g;
+}
+"""
+
+
+def collect(source):
+    diagnostics = Diagnostics()
+    SemanticAnalyzer(diagnostics).analyze(parse_program(source))
+    return diagnostics
+
+
+def test_semantic_records_have_code_severity_and_line():
+    diagnostics = collect(SOURCE)
+    found = [(record.severity, record.code, record.line) for record in diagnostics.records]
+    assert found == [
+        (ERROR, UNDECLARED_VARIABLE, 7),
+        (WARNING, UNINITIALIZED_VARIABLE, 8),
+        (WARNING, UNINITIALIZED_VARIABLE, 8),
+        (WARNING, UNUSED_FUNCTION, 2),
+    ]
+    assert diagnostics.has_errors()
+    assert (diagnostics.error_count, diagnostics.warning_count) == (1, 3)
+
+
+def test_parser_reports_into_the_same_collector():
+    diagnostics = Diagnostics()
+    parser = Parser(grammar(), diagnostics)
+    parser.parse(analyze_tokens("int main(){\n    int x\n    return 0;\n}\n"))
+    assert [(record.code, record.line) for record in diagnostics.records] == [(SYNTAX_ERROR, 3)]
+
+
+def test_flush_writes_errors_then_warnings_once():
+    diagnostics = collect(SOURCE)
+    stream = io.StringIO()
+    diagnostics.flush(stream)
+    text = stream.getvalue()
+    assert text.index("ERRORES ENCONTRADOS (1):") < text.index("ADVERTENCIAS (3):")
+    assert "  1. Variable 'z' no declarada (línea 7)" in text
+
+
+def test_json_round_trip(tmp_path):
+    diagnostics = collect(SOURCE)
+    path = tmp_path / 'diagnosticos.json'
+    diagnostics.write_json(str(path))
+    loaded = Diagnostics.read_json(str(path))
+    assert [record.to_dict() for record in loaded] == [record.to_dict() for record in diagnostics.records]
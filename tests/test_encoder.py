@@ -0,0 +1,142 @@
+# Codificador x86-64 y ejecutable ELF (user-050)
+
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+from assembly import split_operands
+from encoder import Assembler, encode, parse_operand
+from elf import build_executable, BASE_ADDRESS, HEADERS_SIZE, EM_X86_64, ET_EXEC
+
+# Formas que emite CodeGenerator con los bytes que produce GNU as. Se
+# evitan las que NASM codifica distinto (como 'mov r64, imm', que NASM
+# acorta a 32 bits); con nasm instalado test_encoding_matches_nasm lo comprueba.
+GOLDEN = [
+    ('mov eax, ebx', '89 d8'),
+    ('mov r12d, ecx', '41 89 cc'),
+    ('mov rax, rsp', '48 89 e0'),
+    ('mov eax, 1000', 'b8 e8 03 00 00'),
+    ('mov dword [rbp-4], 5', 'c7 45 fc 05 00 00 00'),
+    ('mov qword [rsp+8], rdi', '48 89 7c 24 08'),
+    ('mov ecx, dword [rbx+rsi*4+16]', '8b 4c b3 10'),
+    ('mov byte [r8], 10', '41 c6 00 0a'),
+    ('mov [r8], dx', '66 41 89 10'),
+    ('mov al, [r13]', '41 8a 45 00'),
+    ('add eax, 1', '83 c0 01'),
+    ('add eax, 1000', '05 e8 03 00 00'),
+    ('add ecx, 100000', '81 c1 a0 86 01 00'),
+    ('add rsp, 8', '48 83 c4 08'),
+    ('sub r11d, r9d', '45 29 cb'),
+    ('sub rsp, 136', '48 81 ec 88 00 00 00'),
+    ('cmp rax, 100', '48 83 f8 64'),
+    ('cmp dword [rbp-12], 0', '83 7d f4 00'),
+    ('xor eax, eax', '31 c0'),
+    ('and r10d, -16', '41 83 e2 f0'),
+    ('or cl, 1', '80 c9 01'),
+    ('test edi, edi', '85 ff'),
+    ('test al, 1', 'a8 01'),
+    ('test r9, r9', '4d 85 c9'),
+    ('lea r12d, [rbx+1]', '44 8d 63 01'),
+    ('lea eax, [rcx+rcx*2]', '8d 04 49'),
+    ('lea rdx, [rsp+r12*8-24]', '4a 8d 54 e4 e8'),
+    ('imul ebx', 'f7 eb'),
+    ('imul eax, ecx', '0f af c1'),
+    ('imul r10, rax, 100', '4c 6b d0 64'),
+    ('imul eax, ecx, 1374389535', '69 c1 1f 85 eb 51'),
+    ('idiv r11d', '41 f7 fb'),
+    ('neg rax', '48 f7 d8'),
+    ('inc dword [rbp-8]', 'ff 45 f8'),
+    ('dec r8', '49 ff c8'),
+    ('shl eax, 1', 'd1 e0'),
+    ('shl ecx, 3', 'c1 e1 03'),
+    ('sar edx, 31', 'c1 fa 1f'),
+    ('shr rax, 37', '48 c1 e8 25'),
+    ('push rbp', '55'),
+    ('push r12', '41 54'),
+    ('pop rbx', '5b'),
+    ('pop r15', '41 5f'),
+    ('movzx edx, word [rcx+rdx*2]', '0f b7 14 51'),
+    ('movzx eax, al', '0f b6 c0'),
+    ('movsxd r9, edi', '4c 63 cf'),
+    ('sete al', '0f 94 c0'),
+    ('setnp r11b', '41 0f 9b c3'),
+    ('setl dil', '40 0f 9c c7'),
+    ('cmovs rax, r9', '49 0f 48 c1'),
+    ('cmovge r13d, dword [rbp-20]', '44 0f 4d 6d ec'),
+    ('movsd xmm0, qword [rbp-16]', 'f2 0f 10 45 f0'),
+    ('movsd qword [rsp], xmm9', 'f2 44 0f 11 0c 24'),
+    ('movsd xmm8, xmm1', 'f2 44 0f 10 c1'),
+    ('movq rax, xmm0', '66 48 0f 7e c0'),
+    ('movq xmm15, rdi', '66 4c 0f 6e ff'),
+    ('cvtsi2sd xmm0, eax', 'f2 0f 2a c0'),
+    ('cvtsi2sd xmm10, r12', 'f2 4d 0f 2a d4'),
+    ('cvttsd2si eax, xmm1', 'f2 0f 2c c1'),
+    ('cvttsd2si rcx, xmm12', 'f2 49 0f 2c cc'),
+    ('addsd xmm0, xmm1', 'f2 0f 58 c1'),
+    ('subsd xmm8, qword [rbp-8]', 'f2 44 0f 5c 45 f8'),
+    ('mulsd xmm2, xmm15', 'f2 41 0f 59 d7'),
+    ('divsd xmm0, xmm9', 'f2 41 0f 5e c1'),
+    ('ucomisd xmm0, xmm1', '66 0f 2e c1'),
+    ('xorpd xmm3, xmm3', '66 0f 57 db'),
+    ('cdq', '99'),
+    ('cqo', '48 99'),
+    ('ret', 'c3'),
+    ('syscall', '0f 05'),
+]
+
+BRANCHES = """section .text
+global _start
+_start:
+    jmp .fin
+    nop
+    nop
+    nop
+.fin:
+    call f
+    ret
+f:
+""" + "    nop\n" * 130 + """    jne f
+    ret
+"""
+
+
+def assemble(line):
+    words = line.split(None, 1)
+    operands = [parse_operand(text, lambda name: name) for text in split_operands(words[1])] \
+        if len(words) > 1 else []
+    return bytes(encode(words[0], operands).code)
+
+
+@pytest.mark.parametrize('line, expected', GOLDEN)
+def test_encoding_matches_external_assembler(line, expected):
+    assert assemble(line).hex(' ') == expected
+
+
+@pytest.mark.skipif(shutil.which('nasm') is None, reason="nasm no está instalado")
+def test_encoding_matches_nasm(tmp_path):
+    source = tmp_path / 'muestra.asm'
+    source.write_text("bits 64\n" + "".join(f"{line}\n" for line, _ in GOLDEN))
+    output = tmp_path / 'muestra.bin'
+    subprocess.run(['nasm', '-f', 'bin', '-o', str(output), str(source)], check=True)
+    assert output.read_bytes() == b''.join(assemble(line) for line, _ in GOLDEN)
+
+
+def test_branches_start_short_and_grow_when_out_of_range():
+    assembler = Assembler().parse(BRANCHES)
+    text = assembler.link({'.text': 0x401000, '.data': 0x402000, '.bss': 0x402000})
+    assert bytes(text) == (b'\xeb\x03' + b'\x90' * 3
+                           + b'\xe8' + struct.pack('<i', 1) + b'\xc3'
+                           + b'\x90' * 130
+                           + b'\x0f\x85' + struct.pack('<i', -136) + b'\xc3')
+
+
+def test_executable_header_points_at_start():
+    image = build_executable(BRANCHES)
+    magic, elf_class, data, _, _, _, _, elf_type, machine, _, entry = \
+        struct.unpack_from('<4sBBBBB7sHHIQ', image)
+    assert (magic, elf_class, data) == (b'\x7fELF', 2, 1)
+    assert (elf_type, machine) == (ET_EXEC, EM_X86_64)
+    assert entry == BASE_ADDRESS + HEADERS_SIZE
+    assert image[HEADERS_SIZE:HEADERS_SIZE + 2] == b'\xeb\x03'
@@ -0,0 +1,63 @@
+# Evaluación en compilación de llamadas puras con argumentos literales (user-043)
+
+from conftest import compile_program
+
+PROGRAM = """int contador;
+int cuadrado(int n){
+    return n * n;
+}
+int lento(int n){
+    int i;
+    int s;
+    i = 0;
+    s = 0;
+    while (i < n) {
+        s = s + i / 7;
+        i = i + 1;
+    }
+    return s;
+}
+int lee(int n){
+    return n + contador;
+}
+int avisa(int n){
+    print(n);
+    return n;
+}
+int divide(int n){
+    return 100 / n;
+}
+int main(){
+    int x;
+    contador = 4;
+    x = cuadrado(9) + cuadrado(9) + lento(5) + lento(10000) + lee(2) + avisa(3);
+    if (x < 0) {
+        x = divide(0);
+    }
+    return x;
+}
+"""
+
+
+def evaluated_calls(level):
+    _, generator, _ = compile_program(PROGRAM, level)
+    evaluator = generator.pass_manager.evaluator
+    return evaluator, [call for _, call, _, _ in evaluator.evaluated]
+
+
+def test_pure_calls_with_literals_are_replaced():
+    evaluator, calls = evaluated_calls(2)
+    assert calls.count('cuadrado(9)') == 2
+    assert 'lento(5)' in calls
+    assert evaluator.results[('cuadrado', ((1, 9),))] == 81
+
+
+def test_impure_failing_and_long_calls_are_kept():
+    _, calls = evaluated_calls(2)
+    assert not any(call.startswith(('lee', 'avisa', 'divide', 'lento(10000)')) for call in calls)
+
+
+def test_program_result_is_unchanged(check_program):
+    # divide(0) está en una rama que no se ejecuta
+    output = check_program(PROGRAM)
+    assert output.splitlines() == ['3', 'Resultado: 7138029']
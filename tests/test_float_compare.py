@@ -0,0 +1,38 @@
+# Comparaciones de reales con NaN (user-031)
+
+# Toda comparación ordenada con NaN es falsa y '!=' es verdadera, tanto al
+# materializar el resultado con setcc como en los saltos condicionales
+PROGRAM = """int main() {
+    float z;
+    float n;
+    float one;
+    int r;
+    z = 0.0;
+    one = 1.0;
+    n = z / z;
+    r = 0;
+    print(n < one);
+    print(n <= one);
+    print(n > one);
+    print(n >= one);
+    print(n == n);
+    print(n != n);
+    print(one < n);
+    print(one == one);
+    print(one != one);
+    print(!n);
+    if (n < one) { r = r + 1; }
+    if (n <= one) { r = r + 2; }
+    if (n == n) { r = r + 4; }
+    if (n != n) { r = r + 8; }
+    if (one == one) { r = r + 16; }
+    if (one != one) { r = r + 32; } else { r = r + 64; }
+    if (n == one) { r = r + 128; } else { r = r + 256; }
+    return r;
+}
+"""
+
+
+def test_unordered_comparisons_are_false(check_program):
+    output = check_program(PROGRAM)
+    assert output.split() == ['0', '0', '0', '0', '0', '1', '0', '1', '0', '0', 'Resultado:', '344']
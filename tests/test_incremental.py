@@ -0,0 +1,62 @@
+# Reanálisis incremental por función (user-029)
+
+from semantic_analyzer import SemanticAnalyzer
+from conftest import parse_program
+
+ORIGINAL = """int total;
+int doble(int n){
+    return n * 2;
+}
+int triple(int n){
+    return n * 3;
+}
+int main(){
+    int x;
+    total = 1;
+    x = doble(4) + triple(y);
+    return x + total;
+}
+"""
+
+
+def records(diagnostics):
+    return [(record.severity, record.code, record.message, record.line) for record in diagnostics.records]
+
+
+def reanalyze(edited):
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(parse_program(ORIGINAL))
+    analyzer.reanalyze(parse_program(edited))
+    fresh = SemanticAnalyzer()
+    fresh.analyze(parse_program(edited))
+    # Lo reutilizado debe dar los mismos diagnósticos que un análisis completo
+    assert records(analyzer.diagnostics) == records(fresh.diagnostics)
+    return analyzer
+
+
+def test_unchanged_program_reuses_every_function():
+    analyzer = reanalyze(ORIGINAL)
+    assert analyzer.checked_functions == []
+    assert sorted(analyzer.reused_functions) == ['doble', 'main', 'triple']
+
+
+def test_only_the_edited_function_is_checked():
+    analyzer = reanalyze(ORIGINAL.replace("n * 3", "n * 3 + 1"))
+    assert analyzer.checked_functions == ['triple']
+
+
+def test_signature_change_rechecks_callers():
+    analyzer = reanalyze(ORIGINAL.replace("int doble(int n)", "int doble(float n)"))
+    assert sorted(analyzer.checked_functions) == ['doble', 'main']
+    assert analyzer.reused_functions == ['triple']
+
+
+def test_global_type_change_rechecks_its_users():
+    analyzer = reanalyze(ORIGINAL.replace("int total;", "float total;"))
+    assert analyzer.checked_functions == ['main']
+
+
+def test_reused_diagnostics_follow_moved_lines():
+    analyzer = reanalyze("int extra;\nint otra;\n" + ORIGINAL)
+    assert analyzer.checked_functions == []
+    assert [record.line for record in analyzer.diagnostics.errors()] == [13, 13]
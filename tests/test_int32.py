@@ -0,0 +1,48 @@
+# Enteros de 32 bits: aritmética con desborde y datos de 4 bytes (user-048)
+
+from conftest import compile_program
+
+PROGRAM = """int g;
+int h;
+int suma(int a, int b){
+    return a + b;
+}
+int main(){
+    int x;
+    int y;
+    x = 2147483647;
+    y = x + 1;
+    print(y);
+    print(x + 3);
+    g = x;
+    g = g + 1;
+    print(g);
+    print(suma(x, 2147483647));
+    print(x * 2);
+    print(x * x);
+    y = 0 - x - 1;
+    print(y);
+    print(y - 1);
+    print(0 - y);
+    print(65536 * 65536);
+    h = 65536;
+    print(h * h);
+    print(2147483647 + 2147483647 + 4);
+    return x + x + 4;
+}
+"""
+
+EXPECTED = [-2147483648, -2147483646, -2147483648, -2, -2, 1,
+            -2147483648, 2147483647, -2147483648, 0, 0, 2]
+
+
+def test_int_arithmetic_wraps_at_32_bits(check_program):
+    output = check_program(PROGRAM)
+    assert output.splitlines() == [str(value) for value in EXPECTED] + ["Resultado: 2"]
+
+
+def test_int_globals_use_four_bytes():
+    asm, _, _ = compile_program(PROGRAM, 0)
+    assert "g: dd 0" in asm
+    assert "dword [rel g]" in asm
+    assert "qword [rel g]" not in asm
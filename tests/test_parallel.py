@@ -0,0 +1,44 @@
+# Generación de funciones en paralelo con etiquetas locales (user-047)
+
+import re
+
+from code_generator import PARALLEL_MIN_FUNCTIONS
+from conftest import compile_program
+
+COUNT = PARALLEL_MIN_FUNCTIONS + 4
+
+
+def program():
+    functions = "".join(f"""int f{k}(int n){{
+    int s;
+    s = 0;
+    while (n > 0) {{
+        if (n > {k}) {{
+            s = s + n * {k + 2};
+        }}
+        n = n - 1;
+    }}
+    return s + base;
+}}
+""" for k in range(COUNT))
+    calls = " + ".join(f"f{k}(base + {k})" for k in range(COUNT))
+    return f"int base;\n{functions}int main(){{\n    base = 3;\n    return {calls};\n}}\n"
+
+
+def test_parallel_output_matches_sequential():
+    sequential, _, _ = compile_program(program(), 2, jobs=1, inline_threshold=0)
+    parallel, _, _ = compile_program(program(), 2, jobs=4, inline_threshold=0)
+    assert parallel == sequential
+
+
+def test_local_labels_are_namespaced_by_function():
+    asm, _, _ = compile_program(program(), 2, jobs=4, inline_threshold=0)
+    local = re.findall(r"^\.(\w+)\.\w+:", asm, re.M)
+    assert local
+    assert set(local) <= set(re.findall(r"^(\w+):", asm, re.M))
+    labels = re.findall(r"^(\.\w+\.\w+):", asm, re.M)
+    assert len(labels) == len(set(labels))
+
+
+def test_parallel_program_runs(check_program):
+    check_program(program(), levels=(0, 2), jobs=4, inline_threshold=0)
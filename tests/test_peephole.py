@@ -0,0 +1,57 @@
+# Optimizador peephole sobre los registros de instrucciones (user-033)
+
+import pytest
+
+from assembly import Label, parse_instruction, render
+from peephole import PeepholeOptimizer
+
+
+def records(lines):
+    return [Label(line[:-1]) if line.endswith(':') else parse_instruction(line) for line in lines]
+
+
+def optimize(lines):
+    optimizer = PeepholeOptimizer()
+    code = optimizer.optimize(records(lines))
+    return [line.strip() for line in render(code)], optimizer
+
+
+@pytest.mark.parametrize('before, after, rule', [
+    (["mov rax, rax", "ret"], ["ret"], 'mov-self'),
+    (["push rbx", "pop rbx", "ret"], ["ret"], 'push-pop'),
+    (["push rbx", "pop rcx", "ret"], ["mov rcx, rbx", "ret"], 'push-pop-move'),
+    (["mov dword [rbp-4], eax", "mov eax, dword [rbp-4]", "ret"],
+     ["mov dword [rbp-4], eax", "ret"], 'store-reload'),
+    (["mov dword [rbp-4], eax", "mov ecx, dword [rbp-4]", "ret"],
+     ["mov dword [rbp-4], eax", "mov ecx, eax", "ret"], 'store-forward'),
+    (["mov eax, 1", "mov eax, ebx", "ret"], ["mov eax, ebx", "ret"], 'dead-move'),
+    (["mov ecx, 5", "mov edi, ecx", "mov ecx, 0", "ret"], ["mov edi, 5", "mov ecx, 0", "ret"],
+     'copy-propagate'),
+    (["jmp .L1", ".L1:", "ret"], [".L1:", "ret"], 'jump-next'),
+    (["je .L1", "jmp .L2", ".L1:", "ret", ".L2:", "ret"],
+     ["jne .L2", ".L1:", "ret", ".L2:", "ret"], 'branch-over-jump'),
+    (["jmp .L1", "mov eax, 1", ".L1:", "ret"], [".L1:", "ret"], 'unreachable'),
+])
+def test_rule_rewrites_window(before, after, rule):
+    code, optimizer = optimize(before)
+    assert code == after
+    assert optimizer.hits[rule] >= 1
+
+
+@pytest.mark.parametrize('lines', [
+    # El registro se lee en la dirección del segundo mov
+    ["mov eax, 1", "mov eax, dword [rax]", "ret"],
+    # ecx se lee después de la ventana
+    ["mov ecx, 5", "mov edi, ecx", "add edi, ecx", "ret"],
+    # Un salto condicional sin inverso conocido
+    ["js .L1", "jmp .L2", ".L1:", "ret", ".L2:", "ret"],
+])
+def test_guards_keep_code_unchanged(lines):
+    code, optimizer = optimize(lines)
+    assert code == lines
+    assert optimizer.total() == 0
+
+
+def test_comments_inside_a_window_are_kept():
+    code, _ = optimize(["mov dword [rbp-4], eax", "; recarga", "mov eax, dword [rbp-4]", "ret"])
+    assert code == ["mov dword [rbp-4], eax", "; recarga", "ret"]
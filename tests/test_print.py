@@ -0,0 +1,37 @@
+# Salida con buffer y la función print del runtime (user-049)
+
+from conftest import compile_program
+
+PROGRAM = """int main(){
+    int i;
+    print(0);
+    print(7);
+    print(0 - 7);
+    print(42);
+    print(100);
+    print(2147483647);
+    print(0 - 2147483647 - 1);
+    i = 0 - 1500;
+    while (i < 1500) {
+        print(i * 1001);
+        i = i + 1;
+    }
+    return i;
+}
+"""
+
+
+def test_print_formats_every_width_and_flushes_a_full_buffer(check_program):
+    output = check_program(PROGRAM)
+    # Más de 4096 bytes: el buffer se vacía al menos una vez antes del final
+    assert len(output) > 4096 * 4
+    lines = output.splitlines()
+    assert lines[:7] == ['0', '7', '-7', '42', '100', '2147483647', '-2147483648']
+    assert lines[7:-1] == [str(i * 1001) for i in range(-1500, 1500)]
+    assert lines[-1] == 'Resultado: 1500'
+
+
+def test_runtime_is_emitted_once():
+    asm, _, _ = compile_program(PROGRAM, 2)
+    assert asm.count('rt_flush:') == 1
+    assert asm.count('rt_print_int:') == 1
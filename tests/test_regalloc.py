@@ -0,0 +1,98 @@
+# Asignación de registros por barrido lineal (user-036)
+
+import glob
+import os
+
+import pytest
+
+from dataflow import bits
+from regalloc import LinearScan, CALLEE_SAVED_REGISTERS, FLOAT_REGISTERS
+from type_system import T_FLOAT
+from conftest import ROOT, compile_program
+
+BENCHMARKS = sorted(glob.glob(os.path.join(ROOT, 'benchmarks', '*.c')))
+
+# Más enteros vivos a la vez que registros asignables, valores que cruzan
+# llamadas y reales que deben quedar en el stack
+PRESSURE = """int mezcla(int a, int b, int c){
+    return a * 3 - b + c / 2;
+}
+float escala(float x, int n){
+    return x * 0.5 + n;
+}
+int main(){
+    int a; int b; int c; int d; int e; int f; int g; int h;
+    int i; int j; int k; int l; int m; int n;
+    float x; float y;
+    a = 1; b = 2; c = 3; d = 4; e = 5; f = 6; g = 7; h = 8;
+    i = 9; j = 10; k = 11; l = 12; m = 13; n = 0;
+    x = 1.5; y = 0.25;
+    while (n < 25) {
+        a = a + b * c - d;
+        b = b + e - f + mezcla(g, h, i);
+        c = c + j * 2 - k;
+        d = d + l - m + a / 7;
+        e = e + mezcla(a, b, c) - f;
+        f = f + g + h - i / 3;
+        g = g + j - k + l;
+        h = h + m * 2 - a;
+        i = i + b - c;
+        j = j + d + e - f;
+        k = k + g / 5 - h;
+        l = l + i * 3 - j;
+        m = m + k - l + mezcla(m, n, a);
+        x = escala(x, n) + y;
+        y = y + x / 4.0;
+        print(a + b + c + d + e + f + g + h + i + j + k + l + m);
+        n = n + 1;
+    }
+    if (x > y) {
+        n = n + 1;
+    }
+    return a - b + c - d + e - f + g - h + i - j + k - l + m + n;
+}
+"""
+
+
+def check_allocation(function):
+    allocation = LinearScan(function)
+    liveness = allocation.liveness
+    conflicts = liveness.interference()
+    for var, others in enumerate(conflicts):
+        value = liveness.values[var]
+        for other in bits(others):
+            other_value = liveness.values[other]
+            register = allocation.homes.get(value)
+            if register is not None:
+                assert allocation.homes.get(other_value) != register, (function.name, value, other_value)
+            slot = allocation.slot_of.get(value)
+            if slot is not None:
+                assert allocation.slot_of.get(other_value) != slot, (function.name, value, other_value)
+    for interval in allocation.intervals.values():
+        if interval.register is None:
+            assert interval.value in allocation.slot_of or interval.value not in liveness.index
+            continue
+        if interval.value.type_id == T_FLOAT:
+            assert interval.register in FLOAT_REGISTERS and not interval.crosses_call
+        elif interval.crosses_call:
+            assert interval.register in CALLEE_SAVED_REGISTERS
+    return allocation
+
+
+@pytest.mark.parametrize('path', BENCHMARKS, ids=os.path.basename)
+def test_interfering_values_never_share_a_location(path):
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    for level in (0, 2):
+        _, generator, _ = compile_program(source, level)
+        for function in generator.program.functions:
+            check_allocation(function)
+
+
+def test_high_pressure_spills_and_keeps_values_across_calls(check_program):
+    _, generator, _ = compile_program(PRESSURE, 2)
+    main = next(f for f in generator.program.functions if f.name == 'main')
+    allocation = check_allocation(main)
+    assert allocation.spilled
+    assert allocation.callee_saved
+    check_program(PRESSURE)
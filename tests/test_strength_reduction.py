@@ -0,0 +1,85 @@
+# Multiplicación y división entre constantes (user-035)
+
+import pytest
+
+from code_generator import multiplier_shape, signed_magic
+from conftest import compile_program
+
+INT_MIN = -(1 << 31)
+INT_MAX = (1 << 31) - 1
+
+DIVISORS = [2, 3, 5, 6, 7, 8, 10, 16, 25, 100, 641, 1000, 1 << 30, INT_MAX,
+            -2, -3, -7, -8, -10, -1000, INT_MIN]
+MULTIPLIERS = [0, 1, -1, 2, 3, 5, 6, 9, 10, 12, 24, 40, 72, -3, -6, -9, 7, 1000]
+
+
+def truncated_division(x, divisor):
+    quotient = abs(x) // abs(divisor)
+    return quotient if (x < 0) == (divisor < 0) else -quotient
+
+
+def magic_division(x, divisor):
+    """La secuencia que emite generate_division_by_constant, en Python"""
+    magic, shift = signed_magic(divisor, 32)
+    high = (magic * x) >> 32
+    if divisor > 0 and magic < 0:
+        high += x
+    elif divisor < 0 and magic > 0:
+        high -= x
+    high = ((high + (1 << 31)) % (1 << 32)) - (1 << 31)
+    high >>= shift
+    return high + (1 if high < 0 else 0)
+
+
+def dividends():
+    values = {INT_MIN, INT_MIN + 1, INT_MAX, INT_MAX - 1, 0, 1, -1}
+    values.update(range(-300, 301))
+    values.update(INT_MIN + step * 99991 * 7919 for step in range(2000))
+    return [((value - INT_MIN) % (1 << 32)) + INT_MIN for value in values]
+
+
+@pytest.mark.parametrize('divisor', [d for d in DIVISORS if d & (d - 1) or d < 0])
+def test_signed_magic_matches_truncated_division(divisor):
+    for x in dividends():
+        assert magic_division(x, divisor) == truncated_division(x, divisor), x
+
+
+def test_multiplier_shape():
+    assert multiplier_shape(1) == (1, 0)
+    assert multiplier_shape(24) == (3, 3)
+    assert multiplier_shape(72) == (9, 3)
+    assert multiplier_shape(40) == (5, 3)
+    assert multiplier_shape(7) is None
+    assert multiplier_shape(1000) is None
+
+
+def arithmetic_program():
+    prints = "".join(f"        print(x / {d});\n" for d in DIVISORS if d != INT_MIN)
+    prints += "".join(f"        print(x * {m});\n" for m in MULTIPLIERS)
+    return f"""int main(){{
+    int x;
+    int i;
+    x = 0 - 2147483647 - 1;
+    i = 0;
+    while (i < 48) {{
+{prints}        x = x + 89478485;
+        i = i + 1;
+    }}
+    x = 0 - 20;
+    while (x < 21) {{
+{prints}        x = x + 1;
+    }}
+    return x / 3;
+}}
+"""
+
+
+def test_constant_operands_match_simulator(check_program):
+    check_program(arithmetic_program())
+
+
+def test_division_by_constant_avoids_idiv():
+    asm, _, _ = compile_program(arithmetic_program(), 1)
+    assert 'idiv' not in asm
+    asm, _, _ = compile_program(arithmetic_program(), 0)
+    assert 'idiv' in asm
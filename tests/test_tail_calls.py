@@ -0,0 +1,79 @@
+# Eliminación de llamadas en posición de cola (user-039)
+
+import re
+
+import pytest
+
+from conftest import NATIVE, compile_program, run_native
+
+TEMPLATE = """int limite;
+int suma(int n, int acumulado){
+    if (n == 0) {
+        return acumulado;
+    }
+    return suma(n - 1, acumulado + n / 1000);
+}
+int impar(int n){
+    if (n == 0) {
+        return 0;
+    }
+    return par(n - 1);
+}
+int par(int n){
+    if (n == 0) {
+        return 1;
+    }
+    return impar(n - 1);
+}
+int main(){
+    limite = LIMITE;
+    print(suma(limite, 0));
+    print(par(limite + 1));
+    return par(limite);
+}
+"""
+
+
+def program(limit):
+    # El límite pasa por una global para que las llamadas no se evalúen al compilar
+    return TEMPLATE.replace('LIMITE', str(limit))
+
+
+def expected(limit):
+    # La suma se trunca a 32 bits como el int del programa
+    total = sum(n // 1000 for n in range(1, limit + 1)) % (1 << 32)
+    total -= (1 << 32) if total >= (1 << 31) else 0
+    return f"{total}\n{(limit + 1) % 2 ^ 1}\nResultado: {limit % 2 ^ 1}\n"
+
+
+def function_body(asm, name):
+    match = re.search(rf"^{name}:\n(.*?)\n\n", asm, re.M | re.S)
+    return match.group(1)
+
+
+def test_self_tail_recursion_becomes_a_loop():
+    asm, generator, _ = compile_program(program(10), 1, inline_threshold=0)
+    suma = next(f for f in generator.program.functions if f.name == 'suma')
+    calls = [instr for instr in suma.instructions() if instr.op == 'call']
+    assert not calls
+    assert 'call suma' not in function_body(asm, 'suma')
+
+
+def test_sibling_tail_calls_become_jumps():
+    asm, _, _ = compile_program(program(10), 1, inline_threshold=0)
+    assert 'jmp par' in function_body(asm, 'impar')
+    assert 'jmp impar' in function_body(asm, 'par')
+    asm, _, _ = compile_program(program(10), 0)
+    assert 'call par' in function_body(asm, 'impar')
+
+
+def test_shallow_recursion_matches_simulator(check_program):
+    assert check_program(program(300)) == expected(300)
+
+
+@pytest.mark.skipif(not NATIVE, reason="requiere Linux x86-64")
+@pytest.mark.parametrize('level', [1, 2])
+def test_deep_recursion_runs_in_constant_stack(level, tmp_path):
+    # Tres millones de llamadas anidadas desbordan el stack sin la optimización
+    asm, _, _ = compile_program(program(3000000), level)
+    assert run_native(asm, tmp_path) == expected(3000000)
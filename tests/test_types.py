@@ -0,0 +1,63 @@
+# Tipos como enteros y tablas de resultados precalculadas (user-026)
+
+from diagnostics import INCOMPATIBLE_ASSIGNMENT, INVALID_OPERATION, ARGUMENT_TYPE, ARGUMENT_COUNT
+from semantic_analyzer import SemanticAnalyzer
+from type_system import (BINARY_RESULT, UNARY_RESULT, ASSIGNABLE, ARGUMENT_COMPATIBLE,
+                         OP_SUMA, OP_MUL, OP_RELAC, OP_AND, OP_NOT,
+                         T_UNKNOWN, T_INT, T_FLOAT, T_VOID, T_ERROR,
+                         intern_type, type_name, op_class)
+from conftest import parse_program
+
+
+def test_interned_names():
+    assert [intern_type(name) for name in ('int', 'float', 'void', 'char')] == \
+        [T_INT, T_FLOAT, T_VOID, T_UNKNOWN]
+    assert [type_name(t) for t in (T_INT, T_FLOAT, T_VOID, T_ERROR)] == ['int', 'float', 'void', 'error']
+    assert op_class('opMul') == OP_MUL
+    assert op_class('identificador') is None
+
+
+def test_binary_results():
+    assert BINARY_RESULT[OP_SUMA][T_INT][T_INT] == T_INT
+    assert BINARY_RESULT[OP_SUMA][T_INT][T_FLOAT] == T_FLOAT
+    assert BINARY_RESULT[OP_MUL][T_FLOAT][T_INT] == T_FLOAT
+    assert BINARY_RESULT[OP_SUMA][T_VOID][T_INT] == T_ERROR
+    assert BINARY_RESULT[OP_RELAC][T_FLOAT][T_FLOAT] == T_INT
+    assert BINARY_RESULT[OP_RELAC][T_VOID][T_FLOAT] == T_ERROR
+    assert BINARY_RESULT[OP_AND][T_VOID][T_FLOAT] == T_INT
+    # Un operando desconocido (ya reportado) no genera otro error
+    assert BINARY_RESULT[OP_SUMA][T_UNKNOWN][T_VOID] == T_UNKNOWN
+
+
+def test_unary_assignment_and_argument_tables():
+    assert UNARY_RESULT[OP_SUMA][T_FLOAT] == T_FLOAT
+    assert UNARY_RESULT[OP_SUMA][T_VOID] == T_ERROR
+    assert UNARY_RESULT[OP_NOT][T_FLOAT] == T_INT
+    assert ASSIGNABLE[T_FLOAT][T_INT]
+    assert not ASSIGNABLE[T_INT][T_FLOAT]
+    assert not ARGUMENT_COMPATIBLE[T_INT][T_FLOAT]
+    assert ARGUMENT_COMPATIBLE[T_FLOAT][T_FLOAT]
+
+
+def test_analyzer_reports_type_errors_from_the_tables():
+    source = """void nada(){
+}
+int suma(int a, int b){
+    return a + b;
+}
+int main(){
+    int x;
+    float y;
+    y = 2;
+    x = y;
+    x = nada() + 1;
+    x = suma(y, 1);
+    x = suma(1);
+    return x;
+}
+"""
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(parse_program(source))
+    found = [(record.code, record.line) for record in analyzer.diagnostics.errors()]
+    assert found == [(INCOMPATIBLE_ASSIGNMENT, 10), (INVALID_OPERATION, 11),
+                     (ARGUMENT_TYPE, 12), (ARGUMENT_COUNT, 13)]
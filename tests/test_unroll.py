@@ -0,0 +1,81 @@
+# Desenrollado de ciclos con número de iteraciones conocido (user-045)
+
+import pytest
+
+from loops import trip_count, compare, INT_MAX
+from conftest import compile_program
+
+OPERATORS = ('<', '<=', '>', '>=', '!=', '==')
+
+# (inicio, paso, comparación, límite) de ciclos que se desenrollan
+LOOPS = [
+    (0, 1, '<', 10),
+    (0, 2, '<', 9),
+    (0, 3, '<=', 30),
+    (5, 1, '<', 6),
+    (0, 1, '<', 37),
+    (-7, 2, '<', 50),
+    (10, -1, '>', 0),
+    (20, -3, '>=', 1),
+    (100, -7, '>', -5),
+    (0, 4, '!=', 40),
+    (3, 5, '<=', 203),
+]
+
+
+def iterations(start, step, op, bound, limit=200):
+    """Iteraciones de un ciclo rotado ejecutado paso a paso; None si no termina"""
+    i, count = start, 0
+    while count < limit:
+        count += 1
+        i += step
+        if not compare(op, i, bound):
+            return count
+    return None
+
+
+def test_trip_count_matches_execution():
+    for start in range(-8, 9):
+        for step in range(-3, 4):
+            for op in OPERATORS:
+                for bound in range(-10, 11):
+                    expected = iterations(start, step, op, bound)
+                    assert trip_count(start, step, op, bound) == expected, (start, step, op, bound)
+
+
+def test_trip_count_rejects_overflow():
+    assert trip_count(INT_MAX - 5, 1, '<=', INT_MAX) is None
+    assert trip_count(INT_MAX - 5, 1, '<', INT_MAX) == 5
+    assert trip_count(-INT_MAX, -1, '>', -INT_MAX - 1) == 1
+    assert trip_count(-INT_MAX, -2, '>', -INT_MAX - 1) is None
+
+
+def loop_program():
+    body = []
+    for start, step, op, bound in LOOPS:
+        stride = f"i + {step}" if step > 0 else f"i - {-step}"
+        body.append(f"""    i = {start};
+    s = 0;
+    while (i {op} {bound}) {{
+        s = s + i * 3 + 1;
+        i = {stride};
+    }}
+    print(s);
+    print(i);
+""")
+    return "int main(){\n    int i;\n    int s;\n" + "".join(body) + "    return s;\n}\n"
+
+
+@pytest.mark.parametrize('factor', [0, 1, 2, 3, 4, 8])
+def test_unrolled_loops_match_simulator(factor, check_program):
+    check_program(loop_program(), unroll_factor=factor)
+
+
+def test_unroller_reports_exact_trip_counts():
+    _, generator, _ = compile_program(loop_program(), 2, unroll_factor=4)
+    unrolled = generator.pass_manager.unroller.unrolled
+    counts = [count for _, _, count, _, _ in unrolled]
+    assert counts == [iterations(*loop) for loop in LOOPS]
+    for _, _, count, factor, remainder in unrolled:
+        if factor is not None:
+            assert remainder == count % factor
@@ -0,0 +1,136 @@
+# Lattice de tipos internados como enteros pequeños.
+# Las tablas de resultado y compatibilidad se precalculan una sola vez al
+# importar el módulo, de modo que verificar un nodo de expresión se reduce a
+# indexar dos tablas en lugar de comparar cadenas.
+
+# T_UNKNOWN vale 0 a propósito: es falsy igual que el antiguo None, así que
+# un tipo no resuelto se propaga sin generar errores en cascada.
+T_UNKNOWN = 0
+T_INT = 1
+T_FLOAT = 2
+T_VOID = 3
+T_ERROR = 4  # Solo aparece como resultado en las tablas: operación inválida
+
+NUM_TYPES = 4  # Tipos que pueden aparecer como operandos (T_UNKNOWN..T_VOID)
+
+TYPE_NAMES = ('?', 'int', 'float', 'void', 'error')
+
+_TYPE_IDS = {'int': T_INT, 'float': T_FLOAT, 'void': T_VOID}
+
+# Clases de operador, indexadas por el tipo de token del operador
+OP_SUMA = 0
+OP_MUL = 1
+OP_RELAC = 2
+OP_IGUALDAD = 3
+OP_AND = 4
+OP_OR = 5
+OP_NOT = 6  # Solo unario
+
+OP_CLASSES = {
+    'opSuma': OP_SUMA,
+    'opMul': OP_MUL,
+    'opRelac': OP_RELAC,
+    'opIgualdad': OP_IGUALDAD,
+    'opAnd': OP_AND,
+    'opOr': OP_OR,
+    'opNot': OP_NOT,
+}
+
+_NUMERIC = (T_INT, T_FLOAT)
+
+
+def intern_type(name):
+    """Convierte el nombre de un tipo ('int', 'float', 'void') a su id entero."""
+    return _TYPE_IDS.get(name, T_UNKNOWN)
+
+
+def type_name(type_id):
+    """Retorna el nombre legible de un id de tipo."""
+    return TYPE_NAMES[type_id]
+
+
+def op_class(token_tipo):
+    """Retorna la clase de operador para un tipo de token, o None si no es operador."""
+    return OP_CLASSES.get(token_tipo)
+
+
+def _arithmetic_result(left, right):
+    if left == T_UNKNOWN or right == T_UNKNOWN:
+        return T_UNKNOWN
+    if left in _NUMERIC and right in _NUMERIC:
+        return T_FLOAT if T_FLOAT in (left, right) else T_INT
+    return T_ERROR
+
+
+def _comparison_result(left, right):
+    if left == T_UNKNOWN or right == T_UNKNOWN:
+        return T_UNKNOWN
+    if left in _NUMERIC and right in _NUMERIC:
+        return T_INT
+    return T_ERROR
+
+
+def _logical_result(left, right):
+    if left == T_UNKNOWN or right == T_UNKNOWN:
+        return T_UNKNOWN
+    return T_INT
+
+
+def _build_table(rule):
+    return tuple(
+        tuple(rule(left, right) for right in range(NUM_TYPES))
+        for left in range(NUM_TYPES)
+    )
+
+
+# BINARY_RESULT[clase][izq][der] -> tipo resultado (T_ERROR si es inválida)
+BINARY_RESULT = (
+    _build_table(_arithmetic_result),   # OP_SUMA
+    _build_table(_arithmetic_result),   # OP_MUL
+    _build_table(_comparison_result),   # OP_RELAC
+    _build_table(_comparison_result),   # OP_IGUALDAD
+    _build_table(_logical_result),      # OP_AND
+    _build_table(_logical_result),      # OP_OR
+)
+
+
+def _unary_negate(operand):
+    if operand == T_UNKNOWN:
+        return T_UNKNOWN
+    return operand if operand in _NUMERIC else T_ERROR
+
+
+def _unary_not(operand):
+    if operand == T_UNKNOWN:
+        return T_UNKNOWN
+    return T_INT
+
+
+# UNARY_RESULT[clase][operando] -> tipo resultado ('-x' y '!x')
+UNARY_RESULT = {
+    OP_SUMA: tuple(_unary_negate(t) for t in range(NUM_TYPES)),
+    OP_NOT: tuple(_unary_not(t) for t in range(NUM_TYPES)),
+}
+
+# ASSIGNABLE[esperado][real]: se permite promover int -> float en asignaciones
+ASSIGNABLE = tuple(
+    tuple(expected == actual or (expected == T_FLOAT and actual == T_INT)
+          for actual in range(NUM_TYPES))
+    for expected in range(NUM_TYPES)
+)
+
+# ARGUMENT_COMPATIBLE[real][esperado]: los argumentos no admiten conversiones
+ARGUMENT_COMPATIBLE = tuple(
+    tuple(actual == expected for expected in range(NUM_TYPES))
+    for actual in range(NUM_TYPES)
+)
+
+# Mensajes de error por clase de operador binario
+BINARY_ERROR_MESSAGES = {
+    OP_SUMA: "Operación aritmética '{op}' no válida entre '{left}' y '{right}'",
+    OP_MUL: "Operación aritmética '{op}' no válida entre '{left}' y '{right}'",
+    OP_RELAC: "Comparación '{op}' no válida entre '{left}' y '{right}'",
+    OP_IGUALDAD: "Comparación '{op}' no válida entre '{left}' y '{right}'",
+}
+
+UNARY_ERROR_MESSAGE = "Operación unaria '{op}' no válida sobre '{operand}'"
@@ -4,7 +4,7 @@ import subprocess
 import shutil
 
 
-def cargar_gramatica_lr(ruta):
+def cargar_gramatica_lr(ruta, verbose=False):
     with open(ruta, 'r', encoding='utf-8') as f:
         lineas = [line.strip() for line in f if line.strip()]
 
@@ -52,18 +52,19 @@ def cargar_gramatica_lr(ruta):
             break
     nonterminal_a_columna = {nombre: idx for idx, nombre in enumerate(columnas_csv[num_term:], start=num_term)}
 
-    print("[DEBUG] Mapeo de columnas de terminales:")
-    for nombre, idx in token_a_columna.items():
-        if idx < num_term:
+    if verbose:
+        print("[DEBUG] Mapeo de columnas de terminales:")
+        for nombre, idx in token_a_columna.items():
+            if idx < num_term:
+                print(f"  {nombre}: columna {idx}")
+        
+        print("[DEBUG] Mapeo de columnas de no terminales (GOTO):")
+        for nombre, idx in nonterminal_a_columna.items():
             print(f"  {nombre}: columna {idx}")
-    
-    print("[DEBUG] Mapeo de columnas de no terminales (GOTO):")
-    for nombre, idx in nonterminal_a_columna.items():
-        print(f"  {nombre}: columna {idx}")
-    
-    print(f"[DEBUG] Número de terminales: {num_term}")
-    print(f"[DEBUG] Número de no terminales: {len(nonterminal_a_columna)}")
-    print(f"[DEBUG] Total columnas en tabla LR: {columnas}")
+        
+        print(f"[DEBUG] Número de terminales: {num_term}")
+        print(f"[DEBUG] Número de no terminales: {len(nonterminal_a_columna)}")
+        print(f"[DEBUG] Total columnas en tabla LR: {columnas}")
 
     return {
         'n_reglas': n_reglas,